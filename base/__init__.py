@@ -1,4 +1,5 @@
 import base64
+import concurrent.futures
 import copy
 import hashlib
 import itertools
@@ -7,8 +8,11 @@ import logging
 import pickle
 import random
 import sys
+import threading
 import time
+import urllib.parse
 from collections.abc import Sequence
+from email.utils import parsedate_to_datetime
 from threading import Thread
 from types import SimpleNamespace
 
@@ -624,18 +628,396 @@ lan_ctr = [
 logger = logging.getLogger(__name__)
 
 
+class token_bucket:
+    """Thread-safe token bucket rate limiter.
+
+    Requests take a token, tokens refill at `rate` per second up to `burst`.
+    reserve() takes a token without blocking and returns how long the caller has
+    to wait before it may send its request, so the bucket can be used from
+    threads (acquire) and from asyncio code (await asyncio.sleep(reserve())).
+
+    Attributes:
+        rate (float): Tokens added per second, 0 disables the limit.
+        burst (int): Maximum number of tokens, i.e. requests sent at once.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return the seconds to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            wait = max(self.paused_until - now, 0.0)
+            if self.rate <= 0:
+                return wait
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def acquire(self):
+        """Block the calling thread until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back all requests for the given seconds (e.g. from Retry-After)."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class ordered_map(Sequence):
+    """The results of a function for a list of items, computed a few at once.
+
+    The calls are started in the order of the items. Indexing and iterating only
+    wait for the result asked for, so a caller can use the first results while
+    later ones are still being computed. Items whose call raised are None. Copies
+    and pickles are plain lists of the results.
+
+    Attributes:
+        items (list): The items the function is called for.
+        futures (list): The pending results, in the order of the items.
+    """
+
+    def __init__(self, function, items, workers=4, bucket=None):
+        """Start calling function for every item.
+
+        Args:
+            function (callable): Called with one item, returns its result.
+            items (iterable): The items.
+            workers (int): Calls running at once.
+            bucket (token_bucket): Optional rate limit, a token is taken per call.
+        """
+        self.items = list(items)
+
+        def call(item):
+            if bucket is not None:
+                bucket.acquire()
+            try:
+                return function(item)
+            except Exception:
+                return None
+
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max(min(workers, len(self.items)), 1)
+        )
+        self.futures = [executor.submit(call, item) for item in self.items]
+        executor.shutdown(wait=False)
+
+    def __len__(self):
+        return len(self.futures)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [future.result() for future in self.futures[index]]
+        return self.futures[index].result()
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, ordered_map)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+    def any(self):
+        """Wait until a call returned a result or all calls finished.
+
+        Returns:
+            bool: Whether any item has a result other than None.
+        """
+        for future in concurrent.futures.as_completed(self.futures):
+            if future.result() is not None:
+                return True
+        return False
+
+
+class bulk_poller:
+    """Waits for the states of remote jobs, like the torrents of a debrid service.
+
+    wait() registers a job id and returns a future. One background thread asks
+    fetch() for the states of all pending ids at once, first after `interval`
+    seconds, then less often while nothing changes (times `backoff`, up to
+    `max_interval`), and again every `interval` seconds after a change or a new id.
+    A future gets the state of its job when done(state) is true, or the last state
+    seen (None if there was none) when its timeout passed. The thread ends when no
+    job is pending.
+
+    Attributes:
+        interval (float): Seconds between polls after a change.
+        max_interval (float): Longest time between polls.
+        backoff (float): Factor the time between polls grows by without changes.
+        polls (int): Calls of fetch() so far.
+    """
+
+    def __init__(self, fetch, interval=2.0, max_interval=15.0, backoff=1.5):
+        """Create a poller.
+
+        Args:
+            fetch (callable): Called with a list of ids, returns {id: state} for the
+                ids whose state it found.
+            interval (float): Seconds between polls after a change.
+            max_interval (float): Longest time between polls.
+            backoff (float): Factor the time between polls grows by without changes.
+        """
+        self.fetch = fetch
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.delay = interval
+        self.next_poll = 0.0
+        self.polls = 0
+        self.pending = {}
+        self.states = {}
+        self.thread = None
+        self.condition = threading.Condition()
+
+    def wait(self, id_, done, timeout):
+        """Register a job.
+
+        Args:
+            id_: The id of the job, as fetch() knows it.
+            done (callable): Called with a state, whether the job is finished.
+            timeout (float): Seconds after which the future gets the last state.
+
+        Returns:
+            concurrent.futures.Future: Resolved with the state of the job.
+        """
+        future = concurrent.futures.Future()
+        now = time.monotonic()
+        with self.condition:
+            self.pending.setdefault(id_, []).append((future, done, now + timeout))
+            self.delay = self.interval
+            if self.thread is None:
+                self.next_poll = now + self.interval
+                self.thread = Thread(target=self.run, daemon=True)
+                self.thread.start()
+            else:
+                self.next_poll = min(self.next_poll, now + self.interval)
+            self.condition.notify()
+        return future
+
+    def cancel(self, id_):
+        """Stop waiting for a job, its futures get its last state."""
+        with self.condition:
+            waiters = self.pending.pop(id_, [])
+            state = self.states.pop(id_, None)
+        for future, _, _ in waiters:
+            future.set_result(state)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if not self.pending:
+                        self.thread = None
+                        return
+                    # the next poll, or the first timeout if that comes earlier
+                    remaining = (
+                        min(
+                            [self.next_poll]
+                            + [
+                                waiter[2]
+                                for waiters in self.pending.values()
+                                for waiter in waiters
+                            ]
+                        )
+                        - time.monotonic()
+                    )
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                ids = list(self.pending)
+            try:
+                states = self.fetch(ids)
+            except Exception:
+                states = {}
+            finished = []
+            with self.condition:
+                self.polls += 1
+                changed = False
+                now = time.monotonic()
+                for id_, waiters in list(self.pending.items()):
+                    if id_ in states and states[id_] != self.states.get(id_):
+                        self.states[id_] = states[id_]
+                        changed = True
+                    state = self.states.get(id_)
+                    for waiter in list(waiters):
+                        future, done, timeout = waiter
+                        if (state is not None and done(state)) or now >= timeout:
+                            waiters.remove(waiter)
+                            finished.append((future, state))
+                    if not waiters:
+                        del self.pending[id_]
+                        self.states.pop(id_, None)
+                if changed:
+                    self.delay = self.interval
+                else:
+                    self.delay = min(self.delay * self.backoff, self.max_interval)
+                self.next_poll = time.monotonic() + self.delay
+            for future, state in finished:
+                future.set_result(state)
+
+
+class inventory:
+    """The torrents of a debrid account, by hash.
+
+    Lets downloads reuse a torrent the account has already, instead of adding its
+    magnet again. fetch(page, limit) returns a page of torrents, newest first, as
+    objects with an `id` and a `hash`. A refresh reads pages until it reaches a
+    torrent it has seen before, which after the first refresh is usually the first
+    page. Every `full_ttl` seconds all pages are read again, which also forgets the
+    torrents that were deleted.
+
+    Attributes:
+        ttl (float): Seconds a refresh is used for.
+        full_ttl (float): Seconds after which all pages are read again.
+        torrents (dict): {hash: torrent}, the ready torrent of a hash if there are
+            several.
+    """
+
+    def __init__(self, fetch, ready, ttl=60, full_ttl=3600, limit=100, pages=10):
+        """Create an inventory.
+
+        Args:
+            fetch (callable): Called with a page number (starting at 0) and the page
+                size, returns the torrents of that page, None if the request failed.
+            ready (callable): Called with a torrent, whether it can be downloaded.
+            ttl (float): Seconds a refresh is used for.
+            full_ttl (float): Seconds after which all pages are read again.
+            limit (int): Torrents per page.
+            pages (int): Most pages read by a refresh.
+        """
+        self.fetch = fetch
+        self.ready = ready
+        self.ttl = ttl
+        self.full_ttl = full_ttl
+        self.limit = limit
+        self.pages = pages
+        self.torrents = {}
+        self.updated = 0.0
+        self.full_update = 0.0
+        self.lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """Read the new torrents of the account, if the last refresh is too old.
+
+        Returns:
+            dict: {hash: torrent}.
+        """
+        with self.lock:
+            now = time.time()
+            if not force and now - self.updated <= self.ttl:
+                return self.torrents
+            full = now - self.full_update > self.full_ttl
+            seen = {
+                str(getattr(torrent, "id", "")) for torrent in self.torrents.values()
+            }
+            found = {}
+            for page in range(self.pages):
+                listed = self.fetch(page, self.limit)
+                if listed is None and page > 0:
+                    break
+                if listed is None:
+                    # keeps what is known, and tries again after ttl
+                    self.updated = now
+                    return self.torrents
+                for torrent in listed:
+                    hash_ = str(getattr(torrent, "hash", "")).lower()
+                    if hash_ and (
+                        hash_ not in found
+                        or (self.ready(torrent) and not self.ready(found[hash_]))
+                    ):
+                        found[hash_] = torrent
+                if len(listed) < self.limit:
+                    break
+                if not full and any(
+                    str(getattr(torrent, "id", "")) in seen for torrent in listed
+                ):
+                    break
+            if full:
+                self.torrents = found
+                self.full_update = now
+            else:
+                for hash_, torrent in found.items():
+                    known = self.torrents.get(hash_)
+                    if known is None or self.ready(torrent) or not self.ready(known):
+                        self.torrents[hash_] = torrent
+            self.updated = now
+            return self.torrents
+
+    def get(self, hash_):
+        """The ready torrent of a hash, None if the account has none."""
+        torrent = self.refresh().get(hash_.lower())
+        if torrent is not None and self.ready(torrent):
+            return torrent
+        return None
+
+    def put(self, torrent):
+        """Add a torrent that was just added to the account."""
+        with self.lock:
+            hash_ = str(getattr(torrent, "hash", "")).lower()
+            known = self.torrents.get(hash_)
+            if hash_ and (known is None or not self.ready(known)):
+                self.torrents[hash_] = torrent
+
+    def drop(self, hash_):
+        """Forget the torrent of a hash, e.g. after it was deleted."""
+        with self.lock:
+            self.torrents.pop(hash_.lower(), None)
+
+
+def retry_after(response, default, maximum=300):
+    """Seconds to wait before retrying a response, from its Retry-After header.
+
+    Args:
+        response: Response with a 429/503 status code.
+        default (float): Seconds to wait without a (valid) header.
+        maximum (float): Upper bound of the wait.
+
+    Returns:
+        float: Seconds to wait.
+    """
+    value = (getattr(response, "headers", None) or {}).get("Retry-After")
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            date = parsedate_to_datetime(value)
+            seconds = date.timestamp() - time.time()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return default
+    return min(max(seconds, 0.0), maximum)
+
+
 class custom_session(requests.Session):
     """Custom session class inheriting from requests.Session.
 
-    This class provides per-instance rate limiting, automatic retry for
-    certain error codes, and a default timeout.
+    This class provides per-host token bucket rate limiting, automatic retry
+    for certain error codes (honoring Retry-After), and a default timeout.
+    It is safe to share between threads.
 
     Attributes:
         DEFAULT_TIMEOUT (int): Default timeout for requests.
         RETRY_CODES (list): List of HTTP status codes to be retried.
         MAX_RETRIES (int): Maximum number of retries.
-        GET_RATE_LIMIT (float): Time (in seconds) to wait between GET requests.
-        POST_RATE_LIMIT (float): Time (in seconds) to wait between POST requests.
+        GET_RATE_LIMIT (float): Time (in seconds) to wait before retrying a GET request.
+        POST_RATE_LIMIT (float): Time (in seconds) to wait before retrying a POST request.
+        RATE (float): Requests per second per host, 0 disables the limit.
+        BURST (int): Requests per host that may be sent at once.
         last_request_time (float): Timestamp of the last request made.
     """
 
@@ -646,6 +1028,8 @@ class custom_session(requests.Session):
         max_retries=3,
         get_rate_limit=5,
         post_rate_limit=5,
+        rate=2,
+        burst=5,
     ):
         """Initialize a new CustomSession instance.
 
@@ -653,8 +1037,12 @@ class custom_session(requests.Session):
             timeout (int): Default timeout for requests.
             retry_codes (list): List of HTTP status codes to be retried.
             max_retries (int): Maximum number of retries.
-            get_rate_limit (float): Time (in seconds) to wait between GET requests.
-            post_rate_limit (float): Time (in seconds) to wait between POST requests.
+            get_rate_limit (float): Time (in seconds) to wait before retrying a GET request
+                without a Retry-After header.
+            post_rate_limit (float): Time (in seconds) to wait before retrying a POST
+                request without a Retry-After header.
+            rate (float): Requests per second per host, 0 disables the limit.
+            burst (int): Requests per host that may be sent at once.
         """
         super(custom_session, self).__init__()
 
@@ -663,7 +1051,26 @@ class custom_session(requests.Session):
         self.MAX_RETRIES = max_retries
         self.GET_RATE_LIMIT = get_rate_limit
         self.POST_RATE_LIMIT = post_rate_limit
+        self.RATE = rate
+        self.BURST = burst
         self.last_request_time = 0
+        self.buckets = {}
+        self.buckets_lock = threading.Lock()
+
+    def bucket(self, url):
+        """Return the token bucket of the host of a URL.
+
+        Args:
+            url (str): URL a request is sent to.
+
+        Returns:
+            token_bucket: The bucket shared by all requests to that host.
+        """
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        with self.buckets_lock:
+            if host not in self.buckets:
+                self.buckets[host] = token_bucket(self.RATE, self.BURST)
+            return self.buckets[host]
 
     def request(self, method, url, **kwargs):
         """Override the request method to include rate limiting, retries, and default timeout.
@@ -680,15 +1087,13 @@ class custom_session(requests.Session):
         if "timeout" not in kwargs:
             kwargs["timeout"] = self.DEFAULT_TIMEOUT
 
-        # Ensure rate limiting
-        elapsed_time = time.time() - self.last_request_time
-        if method == "GET" and elapsed_time < self.GET_RATE_LIMIT:
-            time.sleep(self.GET_RATE_LIMIT - elapsed_time)
-        elif method == "POST" and elapsed_time < self.POST_RATE_LIMIT:
-            time.sleep(self.POST_RATE_LIMIT - elapsed_time)
+        backoff = self.POST_RATE_LIMIT if method == "POST" else self.GET_RATE_LIMIT
+        bucket = self.bucket(url)
 
         retries = 0
         while retries < self.MAX_RETRIES:
+            # Ensure rate limiting
+            bucket.acquire()
             try:
                 response = super(custom_session, self).request(method, url, **kwargs)
 
@@ -697,10 +1102,8 @@ class custom_session(requests.Session):
                 if response.status_code in self.RETRY_CODES:
                     logger.error(f"request error: {response.status_code} - retrying...")
                     retries += 1
-                    if method == "GET":
-                        time.sleep(self.GET_RATE_LIMIT)
-                    elif method == "POST":
-                        time.sleep(self.POST_RATE_LIMIT)
+                    # hold back every request to this host, not just this one
+                    bucket.pause(retry_after(response, backoff))
                     continue
 
                 return response
@@ -708,10 +1111,8 @@ class custom_session(requests.Session):
             except requests.RequestException as e:
                 logger.error(f"request error: {e}")
                 retries += 1
-                if method == "GET":
-                    time.sleep(self.GET_RATE_LIMIT)
-                elif method == "POST":
-                    time.sleep(self.POST_RATE_LIMIT)
+                if retries < self.MAX_RETRIES:
+                    time.sleep(backoff)
 
         logger.error(f"failed to fetch URL {url} after {self.MAX_RETRIES} attempts")
         return None
@@ -0,0 +1,76 @@
+"""Deterministic release corpora shaped like a comet/aiostreams show scrape."""
+
+import random
+from types import SimpleNamespace
+
+GROUPS = ["NTb", "FLUX", "GROUP", "RARBG", "EPSiLON", "KILLERS", "SAiNTS", "CAKES"]
+SOURCES = ["BluRay", "WEB-DL", "WEBRip", "AMZN.WEB-DL", "NF.WEB-DL", "HDTV", "HDTS"]
+EXTRAS = ["", "", "", "REPACK.", "EXTENDED.", "PROPER.", "3D.", "DV.HDR.", "HDR."]
+CODECS = ["x264", "x265", "H264", "H265", "AVC"]
+RESOLUTIONS = ["2160p", "1080p", "1080p", "720p", "480p"]
+SCRAPERS = ["[comet-selfhosted]", "[aiostreams]", "[comet-elfhosted]"]
+
+
+EXTENSIONS = ["mkv", "mkv", "mkv", "mp4", "avi"]
+EXTRA_FILES = ["Sample.mkv", "RARBG.txt", "Subs/English.srt", "Cover.jpg"]
+
+
+def files(rng, name, tag, size):
+    # the file list of a release: one debrid version with the episode files of a
+    # season pack, or the file of an episode plus some extras
+    extension = rng.choice(EXTENSIONS)
+    if "E" not in tag:
+        count = rng.randint(6, 12)
+        videos = [
+            SimpleNamespace(
+                name=name.replace(tag, tag + "E" + str(episode).zfill(2))
+                + "."
+                + extension,
+                size=round(size / count, 2),
+            )
+            for episode in range(1, count + 1)
+        ]
+        return [SimpleNamespace(files=videos)]
+    found = [SimpleNamespace(name=name + "." + extension, size=size)]
+    for extra in rng.sample(EXTRA_FILES, rng.randint(0, 2)):
+        found += [SimpleNamespace(name=extra, size=round(rng.uniform(0.001, 0.2), 3))]
+    return found
+
+
+def show_scrape(releases, size=500, title="Show", seed=0, with_files=False):
+    # a season/episode mix like a full show scrape returns it, with the cache
+    # status that debrid.check would have set and optionally the file lists
+    rng = random.Random(seed)
+    scraped = []
+    for index in range(size):
+        season = rng.randint(1, 6)
+        if rng.random() < 0.3:
+            tag = "S" + str(season).zfill(2)
+        else:
+            tag = "S" + str(season).zfill(2) + "E" + str(rng.randint(1, 12)).zfill(2)
+        name = ".".join(
+            [
+                title,
+                tag,
+                rng.choice(RESOLUTIONS),
+                rng.choice(EXTRAS) + rng.choice(SOURCES),
+                rng.choice(CODECS) + "-" + rng.choice(GROUPS),
+            ]
+        )
+        info_hash = "%040x" % rng.getrandbits(160)
+        item = releases.release(
+            rng.choice(SCRAPERS),
+            "torrent",
+            name,
+            [info_hash],
+            round(rng.uniform(0.2, 90.0), 2),
+            ["magnet:?xt=urn:btih:" + info_hash + "&dn=" + name],
+            rng.randint(0, 900),
+        )
+        if rng.random() < 0.6:
+            item.cached = ["RD"] if rng.random() < 0.7 else ["RD", "TB"]
+        item.bitrate = rng.uniform(1, 60)
+        if with_files:
+            item.files = files(rng, name, tag, item.size)
+        scraped.append(item)
+    return scraped
@@ -0,0 +1,128 @@
+"""Copies made by media.debrid_download for a 500-release show scrape.
+
+Runs the release handling of media.debrid_download/debrid.download for every
+configured version, with a debrid service that rejects the first few releases,
+and compares:
+
+    deepcopy  the original path, deep copies of the scrape per version and per list
+    clone     release.clone() instead of deep copies
+    view      shared releases per version, taken best first (releases.sort.candidates),
+              one copy per release handed to a service
+
+Usage (from the repository root):
+
+    python -m bench.debrid_download [--releases 500] [--rounds 5] [--attempts 8]
+"""
+
+import argparse
+import copy
+import time
+import tracemalloc
+
+import ui  # noqa: F401 (releases can't be imported on its own)
+
+# isort: split
+import releases
+from bench import corpus
+
+VERSIONS = releases.sort.versions + [
+    [
+        "2160p",
+        [["media type", "all", ""]],
+        "true",
+        [
+            ["cache status", "requirement", "cached", ""],
+            ["resolution", "requirement", ">=", "2160"],
+            ["title", "requirement", "exclude", "(3D)"],
+            ["size", "preference", "highest", ""],
+        ],
+    ],
+]
+
+
+def deepcopy_path(scraped_releases, versions, attempts):
+    table = copy.deepcopy(scraped_releases)
+    for version in versions:
+        candidates = copy.deepcopy(table)
+        releases.sort(candidates, version, False)
+        for release in copy.deepcopy(candidates):
+            for item in copy.deepcopy([release]):
+                attempts -= 1
+                if attempts < 0:
+                    return item
+
+
+def clone_path(scraped_releases, versions, attempts):
+    table = releases.clone(scraped_releases)
+    for version in versions:
+        candidates = releases.clone(table)
+        releases.sort(candidates, version, False)
+        for release in releases.clone(candidates):
+            for item in releases.clone([release]):
+                attempts -= 1
+                if attempts < 0:
+                    return item
+
+
+def view_path(scraped_releases, versions, attempts):
+    table = scraped_releases
+    for version in versions:
+        candidates = releases.sort.candidates(
+            releases.view(table, version), version, False
+        )
+        for release in candidates:
+            item = releases.materialize(release)
+            attempts -= 1
+            if attempts < 0:
+                return item
+
+
+PATHS = {"deepcopy": deepcopy_path, "clone": clone_path, "view": view_path}
+
+
+def measure(path, scraped_releases, versions, attempts, rounds):
+    path(scraped_releases, versions, attempts)
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        path(scraped_releases, versions, attempts)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    path(scraped_releases, versions, attempts)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--releases", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--attempts", type=int, default=8)
+    args = parser.parse_args()
+    scraped_releases = corpus.show_scrape(releases, args.releases)
+    versions = [releases.sort.version(*version) for version in VERSIONS]
+    print(
+        str(len(scraped_releases))
+        + " releases, "
+        + str(len(versions))
+        + " versions, "
+        + str(args.attempts)
+        + " rejected downloads"
+    )
+    for name, path in PATHS.items():
+        elapsed, peak = measure(
+            path, scraped_releases, versions, args.attempts, args.rounds
+        )
+        print(
+            name.ljust(10)
+            + str(round(elapsed * 1000, 2)).rjust(9)
+            + " ms"
+            + str(round(peak / 1024, 1)).rjust(11)
+            + " KiB peak"
+        )
+
+
+if __name__ == "__main__":
+    main()
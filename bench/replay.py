@@ -0,0 +1,191 @@
+"""Recorded stremio stream responses, served to the scraper sessions offline.
+
+Responses are kept as one gzipped json fixture per url. A fixture is keyed by the
+host and the stream path of its url (stream/series/<imdb>:<s>:<e>.json), the config
+segments in front of it (b64config, uuid) are neither stored nor needed to find it
+again. Both adapters are mounted on a requests session, usually the custom_session
+of a scraper service, so rate limits, retries, breakers and the scrape cache see
+them like the network.
+
+    recorder    sends requests with another adapter and writes a fixture for every
+                stream response
+    replayer    answers stream requests from the fixtures after an injected latency,
+                404 for urls without one
+"""
+
+import base64
+import contextlib
+import gzip
+import http
+import io
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# headers kept in a fixture
+HEADERS = ["Content-Type", "Retry-After"]
+
+
+def key(url):
+    # the host and stream path of a stremio stream url, None for other urls
+    parts = urllib.parse.urlsplit(url)
+    segments = [segment for segment in parts.path.split("/") if segment]
+    if "stream" not in segments:
+        return None
+    start = len(segments) - 1 - segments[::-1].index("stream")
+    tail = [urllib.parse.unquote(segment) for segment in segments[start:]]
+    return parts.netloc.lower() + "/" + "/".join(tail)
+
+
+def filename(key_):
+    # keys end in .json
+    return re.sub(r"[^A-Za-z0-9.]+", "_", key_) + ".gz"
+
+
+def save(directory, fixture):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, filename(fixture["key"]))
+    with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+        json.dump(fixture, f)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        fixture = json.load(f)
+    fixture["body"] = base64.b64decode(fixture["body"])
+    return fixture
+
+
+def fixtures(directory):
+    # all fixtures of a directory, by key
+    found = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json.gz"):
+            fixture = load(os.path.join(directory, name))
+            found[fixture["key"]] = fixture
+    return found
+
+
+def fixture(key_, source, status, body, headers=None, elapsed=0.0):
+    return {
+        "key": key_,
+        "source": source,
+        "status": status,
+        "headers": {
+            name: value
+            for name, value in (headers or {}).items()
+            if name.lower() in [header.lower() for header in HEADERS]
+        },
+        "elapsed": round(elapsed, 4),
+        "recorded": round(time.time()),
+        "body": base64.b64encode(body).decode("ascii"),
+    }
+
+
+def response(request, status, body, headers=None):
+    # a requests response reading body like a streamed one
+    response_ = requests.Response()
+    response_.status_code = status
+    response_.reason = {x.value: x.phrase for x in http.HTTPStatus}.get(status, "")
+    response_.headers = CaseInsensitiveDict(headers or {})
+    response_.raw = io.BytesIO(body)
+    response_.url = request.url
+    response_.request = request
+    response_.encoding = "utf-8"
+    return response_
+
+
+class recorder(BaseAdapter):
+    def __init__(self, directory, source, adapter=None):
+        super().__init__()
+        self.directory = directory
+        # the scraper service the responses are recorded for, e.g. "comet"
+        self.source = source
+        self.adapter = adapter or HTTPAdapter()
+        self.recorded = 0
+        self.lock = threading.Lock()
+
+    def send(self, request, stream=False, **kwargs):
+        start = time.perf_counter()
+        response_ = self.adapter.send(request, stream=stream, **kwargs)
+        key_ = key(request.url)
+        if key_ is None:
+            return response_
+        # reads the whole body, iter_content then serves it from memory
+        body = response_.content
+        save(
+            self.directory,
+            fixture(
+                key_,
+                self.source,
+                response_.status_code,
+                body,
+                response_.headers,
+                time.perf_counter() - start,
+            ),
+        )
+        with self.lock:
+            self.recorded += 1
+        return response_
+
+    def close(self):
+        self.adapter.close()
+
+
+class replayer(BaseAdapter):
+    def __init__(self, directory, latency=0.0, scale=0.0):
+        super().__init__()
+        self.fixtures = fixtures(directory)
+        # seconds every response is delayed by, plus scale times the recorded latency
+        self.latency = latency
+        self.scale = scale
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def delay(self, fixture_):
+        return self.latency + self.scale * (fixture_ or {}).get("elapsed", 0.0)
+
+    def send(self, request, stream=False, **kwargs):
+        fixture_ = self.fixtures.get(key(request.url) or "")
+        with self.lock:
+            if fixture_ is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        wait = self.delay(fixture_)
+        if wait > 0:
+            time.sleep(wait)
+        if fixture_ is None:
+            return response(request, 404, b"{}", {"Content-Type": "application/json"})
+        return response(
+            request, fixture_["status"], fixture_["body"], fixture_["headers"]
+        )
+
+    def close(self):
+        pass
+
+
+@contextlib.contextmanager
+def mounted(adapter, sessions):
+    # mounts adapter for http and https on every session until the block ends
+    previous = [dict(session.adapters) for session in sessions]
+    for session in sessions:
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    try:
+        yield adapter
+    finally:
+        for session, adapters in zip(sessions, previous):
+            session.adapters.clear()
+            for prefix, adapter_ in adapters.items():
+                session.mount(prefix, adapter_)
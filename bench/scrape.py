@@ -0,0 +1,333 @@
+"""Throughput of the scrape→sort path, replayed from recorded scraper responses.
+
+Runs scraper.scrape and the sorting of every configured version
+(releases.sort.candidates) for every query the fixtures answer, with the stream
+responses served by bench.replay instead of the network. The comet and aiostreams
+scrapers are pointed at the hosts of the fixtures, the scrape cache is off and the
+per host rate limit of custom_session is off unless --rate is given, so the numbers
+are the cost of the scrapers, the engine and the sorting plus the injected latency.
+
+    generate    writes synthetic fixtures made from bench.corpus show scrapes
+    record      scrapes with the settings of a config dir and writes a fixture for
+                every stream response (this one uses the network)
+    run         replays the fixtures and reports the best of some rounds
+
+Usage (from the repository root):
+
+    python -m bench.scrape generate --dir bench/fixtures
+    python -m bench.scrape record --config-dir ~/config --dir bench/fixtures tt0903747:1:2
+    python -m bench.scrape run --dir bench/fixtures [--latency 0.05] [--scale 1]
+        [--rounds 3] [--prefetch] [--rate 2]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import time
+import urllib.parse
+
+import ui
+
+# isort: split
+import releases
+import scraper
+from bench import corpus, replay
+from scraper import cache
+from scraper import services as scraper_services
+
+# the hosts generate writes fixtures for
+HOSTS = [
+    ("comet", "comet.replay.invalid"),
+    ("comet", "comet-mirror.replay.invalid"),
+    ("aiostreams", "aiostreams.replay.invalid"),
+]
+
+
+def sessions():
+    # the sessions of the scraper services, by source
+    found = {}
+    for name in ["comet", "aiostreams"]:
+        module = getattr(scraper_services, name, None)
+        if module is not None:
+            found[name] = module.session
+    return found
+
+
+def query(key):
+    # the scraper.scrape arguments a fixture answers, None for the show fallback urls
+    path = key.split("/", 1)[1]
+    kind, id_ = path.split("/")[1:3]
+    id_ = id_[: -len(".json")].split(":")
+    if kind == "movie":
+        return (id_[0], id_[0], id_[0])
+    if len(id_) == 3:
+        return ("", "S" + id_[1].zfill(2) + "E" + id_[2].zfill(2), id_[0])
+    if len(id_) == 2:
+        return ("", "S" + id_[1].zfill(2), id_[0])
+    return None
+
+
+def queries(fixtures):
+    found = {query(key) for key in fixtures}
+    found.discard(None)
+    return sorted(found, key=lambda query_: (query_[2], query_[1]))
+
+
+def hosts(fixtures):
+    # the fixture hosts per source, in the order they were first seen
+    found = {}
+    for key, fixture in fixtures.items():
+        host = key.split("/", 1)[0]
+        if host not in found.setdefault(fixture["source"], []):
+            found[fixture["source"]].append(host)
+    return found
+
+
+@contextlib.contextmanager
+def patched(changes):
+    # sets (object, attribute, value) until the block ends
+    previous = [(object_, name, getattr(object_, name)) for object_, name, _ in changes]
+    for object_, name, value in changes:
+        setattr(object_, name, value)
+    try:
+        yield
+    finally:
+        for object_, name, value in previous:
+            setattr(object_, name, value)
+
+
+def configured(fixtures, rate=0.0):
+    # the scrapers pointed at the fixture hosts, the scrape cache off and the rate
+    # limit set to rate
+    changes = [(cache, "ttl", "0"), (cache, "ttls", {})]
+    active = []
+    hosts_ = hosts(fixtures)
+    comets = [
+        service
+        for service in scraper_services.scrapers
+        if service.name.startswith("comet-")
+    ]
+    for service, host in zip(comets, hosts_.get("comet", [])):
+        changes += [
+            (service, "base_url", "https://" + host),
+            (service, "b64config", "replay"),
+        ]
+        active += [service.name]
+    if hosts_.get("aiostreams") and scraper_services.aiostreams is not None:
+        module = scraper_services.aiostreams
+        changes += [
+            (module, "base_url", "https://" + hosts_["aiostreams"][0]),
+            (module, "uuid", "replay"),
+            (module, "b64config", "replay"),
+        ]
+        active += [module.name]
+    changes += [
+        (scraper_services, "active", active),
+        (scraper_services, "overwrite", []),
+    ]
+    for session in sessions().values():
+        changes += [(session, "RATE", rate), (session, "buckets", {})]
+    return patched(changes)
+
+
+def scrape_sort(queries_, versions, prefetch=False):
+    # one round: the seconds spent scraping and sorting and the releases found
+    scrape_time = sort_time = 0.0
+    found = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        if prefetch:
+            start = time.perf_counter()
+            scraper.prefetch(queries_)
+            scrape_time += time.perf_counter() - start
+        for query_ in queries_:
+            start = time.perf_counter()
+            scraped_releases = scraper.scrape(*query_)
+            scrape_time += time.perf_counter() - start
+            found += len(scraped_releases)
+            start = time.perf_counter()
+            for version in versions:
+                releases.sort.candidates(
+                    releases.view(scraped_releases, version), version, False
+                )
+            sort_time += time.perf_counter() - start
+    return scrape_time, sort_time, found
+
+
+def run(directory, rounds=3, latency=0.0, scale=0.0, prefetch=False, rate=0.0):
+    adapter = replay.replayer(directory, latency, scale)
+    queries_ = queries(adapter.fixtures)
+    versions = [releases.sort.version(*version) for version in releases.sort.versions]
+    best = None
+    with (
+        configured(adapter.fixtures, rate),
+        replay.mounted(adapter, list(sessions().values())),
+    ):
+        for _ in range(rounds):
+            result = scrape_sort(queries_, versions, prefetch)
+            if best is None or sum(result[:2]) < sum(best[:2]):
+                best = result
+    scrape_time, sort_time, found = best or (0.0, 0.0, 0)
+    return {
+        "fixtures": len(adapter.fixtures),
+        "queries": len(queries_),
+        "versions": len(versions),
+        "releases": found,
+        "scrape_s": round(scrape_time, 4),
+        "sort_s": round(sort_time, 4),
+        "queries_per_s": round(len(queries_) / max(scrape_time + sort_time, 1e-9), 1),
+        "releases_per_s": round(found / max(scrape_time + sort_time, 1e-9), 1),
+        "hits": adapter.hits,
+        "misses": adapter.misses,
+    }
+
+
+def stream(source, host, release):
+    # a stremio stream for a release, shaped like the responses of source
+    filename = release.title + ".mkv"
+    hints = {"filename": filename, "videoSize": int(release.size * 1024**3)}
+    if source == "aiostreams":
+        return {
+            "name": "[RD+] AIOStreams " + release.resolution + "p",
+            "title": release.title,
+            "url": "https://"
+            + host
+            + "/rd/"
+            + release.hash
+            + "/"
+            + urllib.parse.quote(filename),
+            "behaviorHints": hints,
+        }
+    hints["bingeGroup"] = "comet|realdebrid|" + release.hash
+    return {
+        "name": "[RD+] Comet " + release.resolution + "p",
+        "title": release.title,
+        "description": release.title
+        + "\n👤 "
+        + str(release.seeders)
+        + " 💾 "
+        + str(release.size)
+        + " GB",
+        "infoHash": release.hash,
+        "behaviorHints": hints,
+    }
+
+
+def generate(directory, shows=2, seasons=2, episodes=8, streams=100, seed=0):
+    # a season and an episode fixture per host for every episode of some shows
+    rng = random.Random(seed)
+    written = 0
+    for show in range(shows):
+        imdb_id = "tt" + str(9000000 + show)
+        title = "Replay.Show." + str(show + 1)
+        for season in range(1, seasons + 1):
+            ids = [imdb_id + ":" + str(season)]
+            ids += [
+                imdb_id + ":" + str(season) + ":" + str(episode)
+                for episode in range(1, episodes + 1)
+            ]
+            for source, host in HOSTS:
+                for id_ in ids:
+                    scraped = corpus.show_scrape(
+                        releases,
+                        rng.randint(streams // 2, streams),
+                        title,
+                        rng.random(),
+                    )
+                    body = json.dumps(
+                        {"streams": [stream(source, host, x) for x in scraped]}
+                    ).encode()
+                    key = host + "/stream/series/" + id_ + ".json"
+                    replay.save(
+                        directory,
+                        replay.fixture(
+                            key,
+                            source,
+                            200,
+                            body,
+                            {"Content-Type": "application/json"},
+                            rng.uniform(0.2, 3.0),
+                        ),
+                    )
+                    written += 1
+    return written
+
+
+def settings(config_dir):
+    # the settings of a config dir, without the migrations and saving of ui.load
+    with open(os.path.join(config_dir, "settings.json"), "r") as f:
+        saved = json.load(f)
+    for category, settings_ in ui.settings_list:
+        for setting in settings_:
+            if setting.name in saved and setting.name not in [
+                "version",
+                "Content Services",
+            ]:
+                setting.set(saved[setting.name])
+
+
+def record(directory, ids):
+    # scrapes tt<imdb>[:<s>[:<e>]] ids with the network and writes their responses
+    recorders = [
+        replay.recorder(directory, source) for source, session in sessions().items()
+    ]
+    queries_ = []
+    for id_ in ids:
+        kind = "series" if ":" in id_ else "movie"
+        found = query("host/stream/" + kind + "/" + id_ + ".json")
+        if found is not None:
+            queries_ += [found]
+    with (
+        contextlib.ExitStack() as stack,
+        patched([(cache, "ttl", "0"), (cache, "ttls", {})]),
+    ):
+        for recorder_, session in zip(recorders, sessions().values()):
+            stack.enter_context(replay.mounted(recorder_, [session]))
+        for query_ in queries_:
+            scraper.scrape(*query_)
+    return sum(recorder_.recorded for recorder_ in recorders)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate_ = commands.add_parser("generate")
+    generate_.add_argument("--dir", required=True)
+    generate_.add_argument("--shows", type=int, default=2)
+    generate_.add_argument("--seasons", type=int, default=2)
+    generate_.add_argument("--episodes", type=int, default=8)
+    generate_.add_argument("--streams", type=int, default=100)
+    record_ = commands.add_parser("record")
+    record_.add_argument("--dir", required=True)
+    record_.add_argument("--config-dir", required=True)
+    record_.add_argument("ids", nargs="+", help="tt<imdb>, tt<imdb>:<s>[:<e>]")
+    run_ = commands.add_parser("run")
+    run_.add_argument("--dir", required=True)
+    run_.add_argument("--rounds", type=int, default=3)
+    run_.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    run_.add_argument(
+        "--scale", type=float, default=0.0, help="times the recorded latency"
+    )
+    run_.add_argument("--prefetch", action="store_true", help="use scraper.prefetch")
+    run_.add_argument("--rate", type=float, default=0.0, help="requests/s per host")
+    args = parser.parse_args()
+    if args.command == "generate":
+        written = generate(
+            args.dir, args.shows, args.seasons, args.episodes, args.streams
+        )
+        print(str(written) + " fixtures written to " + args.dir)
+    elif args.command == "record":
+        settings(args.config_dir)
+        print(str(record(args.dir, args.ids)) + " responses recorded to " + args.dir)
+    else:
+        result = run(
+            args.dir, args.rounds, args.latency, args.scale, args.prefetch, args.rate
+        )
+        for name, value in result.items():
+            print(name.ljust(16) + str(value).rjust(12))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Cost of the release sorting and filtering engine.
+
+Times every built-in version rule (each weight, operator and a typical value),
+the configured versions, taking the best candidate of a version
+(releases.sort.candidates), adding a batch to a ranked version
+(releases.sort.ranked), print_releases and media.season_pack on generated show
+scrapes of 100, 1k and 10k releases with file lists, and reports the best wall
+time and the peak allocations of each. Results can be saved as a baseline and
+later runs compared against it.
+
+Usage (from the repository root):
+
+    python -m bench.sort                    run and print the results
+    python -m bench.sort --save             also write bench/baseline.json
+    python -m bench.sort --compare          fail if a case got slower than the baseline
+    python -m bench.sort --sizes 100 --filter "size"
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import ui  # noqa: F401 (releases can't be imported on its own)
+
+# isort: split
+import releases
+from bench import corpus
+
+baseline_path = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+SIZES = [100, 1000, 10000]
+
+# a typical value for every rule, so that requirements keep part of the releases
+VALUES = {
+    "resolution": "1080",
+    "bitrate": "20",
+    "size": "10",
+    "seeders": "100",
+    "title": "(REPACK|PROPER|EXTENDED)",
+    "source": "comet",
+    "cache status": "",
+    "file names": "(sample|\\.txt)",
+    "file sizes": "0.5",
+}
+
+
+def rule_versions():
+    # one version per rule, weight and operator
+    versions = []
+    for rule in releases.sort.version.rule.__subclasses__():
+        for weight in rule.weights:
+            for operator in rule.operators:
+                value = VALUES.get(rule.name, "")
+                name = " ".join(["rule", rule.name, weight, operator]).strip()
+                versions += [
+                    releases.sort.version(
+                        name, [], "true", [[rule.name, weight, operator, value]]
+                    )
+                ]
+    return versions
+
+
+def configured_versions():
+    return [
+        releases.sort.version("version " + version[0], *version[1:])
+        for version in releases.sort.versions
+    ]
+
+
+def episode(index):
+    # an episode of media.season_pack, with the pattern of episode.deviation
+    pattern = "[^A-Za-z0-9]*(Show:?.)(series.)?(\\(?2019\\)?.)?(S01E{:02d}.)"
+    return SimpleNamespace(deviation=lambda: pattern.format(index))
+
+
+def cases(scraped_releases):
+    # (name, setup, run) of every measured case. setup returns the argument of run
+    # and isn't timed.
+    found = []
+    for version in rule_versions() + configured_versions():
+        found += [
+            (
+                version.name,
+                lambda version=version: releases.view(scraped_releases, version),
+                lambda releases_, version=version: releases.sort(
+                    releases_, version, False
+                ),
+            )
+        ]
+    for version in configured_versions():
+        found += [
+            (
+                version.name + " best candidate",
+                lambda version=version: releases.view(scraped_releases, version),
+                lambda releases_, version=version: next(
+                    releases.sort.candidates(releases_, version, False), None
+                ),
+            )
+        ]
+    # the last tenth of the releases arriving as another scrape batch
+    split = len(scraped_releases) * 9 // 10
+    for version in configured_versions():
+        found += [
+            (
+                version.name + " +10% ranked",
+                lambda version=version: (
+                    releases.sort.ranked(version, scraped_releases[:split]),
+                    scraped_releases[split:],
+                ),
+                lambda state: state[0].add(state[1]),
+            )
+        ]
+    found += [
+        (
+            "print_releases",
+            lambda: scraped_releases,
+            lambda releases_: print_quietly(releases_),
+        )
+    ]
+    try:
+        import content.classes
+
+        season_pack = content.classes.media.season_pack
+        media = SimpleNamespace(
+            Releases=[r for r in scraped_releases if not r.features.episodes],
+            Episodes=[episode(index) for index in range(1, 13)],
+        )
+        found += [
+            (
+                "media.season_pack",
+                lambda: scraped_releases,
+                lambda releases_: season_pack(media, releases_),
+            )
+        ]
+    except Exception as e:
+        print("skipping media.season_pack: " + str(e), file=sys.stderr)
+    return found
+
+
+def print_quietly(scraped_releases):
+    # print_releases skips lists it printed within the last second
+    releases._last_releases_print["fingerprint"] = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        releases.print_releases(scraped_releases)
+
+
+def measure(setup, run, rounds):
+    best = None
+    for _ in range(rounds):
+        argument = setup()
+        start = time.perf_counter()
+        run(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    argument = setup()
+    tracemalloc.start()
+    run(argument)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": round(best * 1000, 3), "peak_kib": round(peak / 1024, 1)}
+
+
+def run(sizes, rounds, pattern=""):
+    results = {}
+    for size in sizes:
+        scraped_releases = corpus.show_scrape(releases, size, with_files=True)
+        results[str(size)] = {}
+        for name, setup, call in cases(scraped_releases):
+            if pattern and pattern not in name:
+                continue
+            results[str(size)][name] = measure(setup, call, rounds)
+    return results
+
+
+def report(results, baseline=None, threshold=1.5):
+    # prints the results and returns the cases that got slower than the baseline
+    regressions = []
+    for size, timings in results.items():
+        print()
+        print(size + " releases")
+        width = max([len(name) for name in timings] + [0])
+        for name, result in timings.items():
+            line = (
+                "  "
+                + name.ljust(width)
+                + str(result["ms"]).rjust(11)
+                + " ms"
+                + str(result["peak_kib"]).rjust(11)
+                + " KiB"
+            )
+            before = (baseline or {}).get(size, {}).get(name)
+            if before and before["ms"] > 0:
+                ratio = result["ms"] / before["ms"]
+                line += "  x" + str(round(ratio, 2))
+                # differences below a millisecond are noise
+                if ratio > threshold and result["ms"] - before["ms"] > 1:
+                    regressions += [size + " " + name]
+                    line += " (slower)"
+            print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--filter", default="", help="only run matching cases")
+    parser.add_argument("--baseline", default=baseline_path)
+    parser.add_argument("--save", action="store_true", help="write the baseline")
+    parser.add_argument("--compare", action="store_true", help="fail on regressions")
+    parser.add_argument("--threshold", type=float, default=1.5)
+    args = parser.parse_args()
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file).get("results")
+    results = run(args.sizes, args.rounds, args.filter)
+    regressions = report(results, baseline, args.threshold)
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "rounds": args.rounds,
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+            file.write("\n")
+        print()
+        print("saved baseline to " + args.baseline)
+    if regressions:
+        print()
+        print("slower than the baseline: " + ", ".join(regressions))
+        if args.compare:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1336,7 +1336,72 @@ class media:
             return not self.isContinuingSeries
         return False
 
+    def ids(self):
+        # the imdb and tmdb id of the movie or show, "." if unknown
+        EIDS = []
+        imdbID = "."
+        tmdbID = "."
+        if hasattr(self, "EID"):
+            EIDS = self.EID
+        if hasattr(self, "parentEID"):
+            EIDS = self.parentEID
+        if hasattr(self, "grandparentEID"):
+            EIDS = self.grandparentEID
+        for EID in EIDS:
+            if EID.startswith("imdb"):
+                service, imdbID = EID.split("://")
+            elif EID.startswith("tmdb"):
+                service, tmdbID = EID.split("://")
+        return imdbID, tmdbID
+
+    def episode_query(self, title, id_pattern):
+        # the query and altquery an episode is scraped with first
+        if self.isanime():
+            return (
+                self.anime_query(title),
+                self.deviation()
+                + "("
+                + id_pattern
+                + ")?(nyaa"
+                + "|".join(self.alternate_titles)
+                + ")?",
+            )
+        return self.query(title), self.deviation() + "(" + id_pattern + ")?"
+
+    def prefetch_episodes(self, scraped_releases):
+        # scrapes the episodes of a season that will be scraped one by one at once,
+        # each episode.download then takes its releases from scraper.prefetch
+        imdbID, tmdbID = self.ids()
+        id_pattern = imdbID if imdbID != "." else tmdbID
+        queries = []
+        for episode in self.Episodes:
+            if (
+                len(episode.versions()) == 0
+                or hasattr(episode, "skip_download")
+                or hasattr(episode, "skip_scraping")
+                or len(episode.alternate_titles) == 0
+            ):
+                continue
+            # episodes with releases in the season scrape are likely downloaded from those
+            deviation = releases.compile_pattern(episode.deviation(), regex.I)
+            if any(deviation.match(release.title) for release in scraped_releases):
+                continue
+            queries += [episode.episode_query(episode.alternate_titles[0], id_pattern)]
+        if len(queries) > 1:
+            scraper.prefetch(queries)
+
     def download(self, retries=0, library=[], parentReleases=[]):
+        # seasons and episodes scrape again if none of the releases of their parent
+        # was downloaded. the releases are ranked once per version, the ones of the
+        # new scrape are merged into that order (see debrid_download)
+        if self.type in ["season", "episode"]:
+            self.ranked = {}
+        try:
+            return self.scrape_and_download(retries, library, parentReleases)
+        finally:
+            self.__dict__.pop("ranked", None)
+
+    def scrape_and_download(self, retries=0, library=[], parentReleases=[]):
         global imdb_scraped
         refresh_ = False
         i = 0
@@ -1365,24 +1430,11 @@ class media:
             )
             return
         scraper.services.overwrite = []
-        EIDS = []
-        imdbID = "."
-        tmdbID = "."
         # Ensure show objects always have Seasons attribute
         if self.type == "show":
             if not hasattr(self, "Seasons"):
                 self.Seasons = []
-        if hasattr(self, "EID"):
-            EIDS = self.EID
-        if hasattr(self, "parentEID"):
-            EIDS = self.parentEID
-        if hasattr(self, "grandparentEID"):
-            EIDS = self.grandparentEID
-        for EID in EIDS:
-            if EID.startswith("imdb"):
-                service, imdbID = EID.split("://")
-            elif EID.startswith("tmdb"):
-                service, tmdbID = EID.split("://")
+        imdbID, tmdbID = self.ids()
         # set anime info before episodes are removed
         self.isanime()
         if self.type == "movie":
@@ -1539,7 +1591,7 @@ class media:
                                 if len(self.Releases) > 0:
                                     break
                         debrid.check(self)
-                        parentReleases = copy.deepcopy(self.Releases)
+                        parentReleases = releases.clone(self.Releases)
                         # Ensure Seasons attribute exists for show objects
                         if not hasattr(self, "Seasons"):
                             self.Seasons = []
@@ -1554,15 +1606,17 @@ class media:
                                 season_queries += [season.deviation()]
                             season_queries_str = "(" + ")|(".join(season_queries) + ")"
                             if self.isanime():
+                                anime_count = releases.compile_pattern(
+                                    self.anime_count, regex.I
+                                )
                                 for release in self.Releases:
-                                    if regex.search(
-                                        self.anime_count, release.title, regex.I
-                                    ):
+                                    if anime_count.search(release.title):
                                         multi_season_releases += [release]
+                            season_queries_pattern = releases.compile_pattern(
+                                season_queries_str, regex.I
+                            )
                             for release in self.Releases:
-                                match = regex.match(
-                                    season_queries_str, release.title, regex.I
-                                )
+                                match = season_queries_pattern.match(release.title)
                                 for version in release.files:
                                     if isinstance(version.wanted, int):
                                         # if a multi season pack contains more than half of all uncollected episodes, accept it as a multi-season-pack.
@@ -1574,9 +1628,9 @@ class media:
                                             for index, season_query in enumerate(
                                                 season_queries
                                             ):
-                                                if regex.match(
-                                                    season_query, release.title, regex.I
-                                                ):
+                                                if releases.compile_pattern(
+                                                    season_query, regex.I
+                                                ).match(release.title):
                                                     if (
                                                         version.wanted
                                                         >= len(
@@ -1586,10 +1640,8 @@ class media:
                                                         and season_releases[index]
                                                         is None
                                                     ):
-                                                        quality = regex.search(
-                                                            "(2160|1080|720|480)(?=p|i)",
-                                                            release.title,
-                                                            regex.I,
+                                                        quality = releases.quality_pattern.search(
+                                                            release.title
                                                         )
                                                         if quality:
                                                             quality = int(
@@ -1610,10 +1662,8 @@ class media:
                                 # if all seasons of the show could also be downloaded as single-season packs, compare the quality of the best ranking multi season pack with the lowest quality of the single season packs.
                                 if not download_multi_season_release:
                                     season_quality = min(season_releases)
-                                    quality = regex.search(
-                                        "(2160|1080|720|480)(?=p|i)",
-                                        multi_season_releases[0].title,
-                                        regex.I,
+                                    quality = releases.quality_pattern.search(
+                                        multi_season_releases[0].title
                                     )
                                     if quality:
                                         quality = int(quality.group())
@@ -1669,11 +1719,12 @@ class media:
                     ui_print("took " + str(round(toc - tic, 2)) + "s")
         elif self.type == "season":
             debrid_downloaded = False
+            deviation = releases.compile_pattern(self.deviation(), regex.I)
             for release in parentReleases:
-                if regex.match(self.deviation(), release.title, regex.I):
+                if deviation.match(release.title):
                     self.Releases += [release]
             # Set the episodes parent releases to be the seasons parent releases:
-            scraped_releases = copy.deepcopy(parentReleases)
+            scraped_releases = releases.clone(parentReleases)
             # If there is more than one episode
             if len(self.Episodes) > 2:
                 if self.season_pack(scraped_releases):
@@ -1760,29 +1811,45 @@ class media:
                                 break
                     # Set the episodes parent releases to be the newly scraped releases
                     debrid.check(self)
-                    scraped_releases = copy.deepcopy(self.Releases)
+                    scraped_releases = releases.clone(self.Releases)
             # If there was nothing downloaded, attempt downloading again using the newly scraped releases
             retry = False
             if not debrid_downloaded:
+                deviation = releases.compile_pattern(self.deviation(), regex.I)
                 for release in self.Releases[:]:
-                    if not regex.match(self.deviation(), release.title, regex.I):
+                    if not deviation.match(release.title):
                         self.Releases.remove(release)
                 if self.season_pack(scraped_releases):
                     debrid_downloaded, retry = self.debrid_download()
             retryep = False
+            # The episodes need their own releases, scrape them all at once
+            if not debrid_downloaded:
+                self.prefetch_episodes(scraped_releases)
             # If a season pack was downloaded, make sure there are episode releases available for missing versions before attempting to download
             if debrid_downloaded:
                 refresh_ = True
                 attempt_episodes = False
+                # the episodes mostly share their versions, each one is checked once
+                found = {}
                 for episode in self.Episodes:
                     episode.skip_scraping = True
                     for version in copy.deepcopy(episode.versions()):
                         for rule in version.rules[:]:
                             if rule[0] == "bitrate":
                                 version.rules.remove(rule)
-                        test_releases = copy.deepcopy(scraped_releases)
-                        releases.sort(test_releases, version, False)
-                        if len(test_releases) > 0:
+                        if repr(version.rules) not in found:
+                            found[repr(version.rules)] = (
+                                next(
+                                    releases.sort.candidates(
+                                        releases.view(scraped_releases, version),
+                                        version,
+                                        False,
+                                    ),
+                                    None,
+                                )
+                                is not None
+                            )
+                        if found[repr(version.rules)]:
                             attempt_episodes = True
                             break
                     if not attempt_episodes:
@@ -1802,8 +1869,9 @@ class media:
                         episode.watch()
             return refresh_, (retry or retryep)
         elif self.type == "episode":
+            deviation = releases.compile_pattern(self.deviation(), regex.I)
             for release in parentReleases:
-                if regex.match(self.deviation(), release.title, regex.I):
+                if deviation.match(release.title):
                     self.Releases += [release]
             debrid_downloaded = False
             retry = True
@@ -1816,13 +1884,7 @@ class media:
                     for title in self.alternate_titles[:3]:
                         id_pattern = imdbID if imdbID != "." else tmdbID
                         self.Releases += scraper.scrape(
-                            self.anime_query(title),
-                            self.deviation()
-                            + "("
-                            + id_pattern
-                            + ")?(nyaa"
-                            + "|".join(self.alternate_titles)
-                            + ")?",
+                            *self.episode_query(title, id_pattern)
                         )
                         if len(self.Releases) > 0:
                             break
@@ -1836,8 +1898,7 @@ class media:
                             )
                         else:
                             self.Releases += scraper.scrape(
-                                self.query(title),
-                                self.deviation() + "(" + id_pattern + ")?",
+                                *self.episode_query(title, id_pattern)
                             )
                         if len(self.Releases) > 0:
                             break
@@ -1892,11 +1953,7 @@ class media:
             # 1. Dub filter: keep only dubbed releases
             if releases.sort.anime_dub_filter == "true":
                 before = len(self.Releases)
-                self.Releases = [
-                    r
-                    for r in self.Releases
-                    if regex.search(releases.sort.anime_dub_pattern, r.title, regex.I)
-                ]
+                self.Releases = [r for r in self.Releases if r.features.dub]
                 filtered = before - len(self.Releases)
                 if filtered > 0:
                     ui_print(
@@ -1906,13 +1963,7 @@ class media:
             # 2. Hardsub exclusion: remove releases with burned-in subtitles
             if releases.sort.anime_hardsub_exclude == "true":
                 before = len(self.Releases)
-                self.Releases = [
-                    r
-                    for r in self.Releases
-                    if not regex.search(
-                        releases.sort.anime_hardsub_pattern, r.title, regex.I
-                    )
-                ]
+                self.Releases = [r for r in self.Releases if not r.features.hardsub]
                 filtered = before - len(self.Releases)
                 if filtered > 0:
                     ui_print(
@@ -1926,20 +1977,23 @@ class media:
                 if g.strip()
             ]
             if groups:
-                group_pattern = "|".join(regex.escape(g) for g in groups)
+                group_pattern = releases.compile_pattern(
+                    "|".join(regex.escape(g) for g in groups), regex.I
+                )
                 self.Releases.sort(
-                    key=lambda r: bool(regex.search(group_pattern, r.title, regex.I)),
+                    key=lambda r: bool(group_pattern.search(r.title)),
                     reverse=True,
                 )
             # 4. Uncensored preference: sort uncensored releases to the top
             if releases.sort.anime_uncensored_prefer == "true":
                 self.Releases.sort(
-                    key=lambda r: bool(regex.search(r"(?i)\buncensored\b", r.title)),
+                    key=lambda r: r.features.uncensored,
                     reverse=True,
                 )
         if len(self.Releases) > 0:
             releases.print_releases(self.Releases, True)
-        scraped_releases = copy.deepcopy(self.Releases)
+        # shared by all versions, see releases.view
+        scraped_releases = self.Releases
         downloaded = []
         if len(scraped_releases) > 0:
             if len(self.versions()) == 0:
@@ -1949,12 +2003,36 @@ class media:
                 )
             for version in self.versions():
                 self.version = version
-                self.Releases = copy.deepcopy(scraped_releases)
-                releases.sort(self.Releases, self.version)
-                if len(self.Releases) > 0:
-                    releases.print_releases(self.Releases, True)
+                # the sorted release list is only printed for debugging, otherwise
+                # the releases are taken best first until one is downloaded
+                printed = (
+                    releases.sort.selection == "full"
+                    or ui_settings.debug == "true"
+                    or ui_settings.log == "true"
+                )
+                ranked = getattr(self, "ranked", None)
+                if ranked is not None and not releases.sort.compile(version).mutates:
+                    # the releases this version ranked in an earlier call keep their
+                    # order, only the new ones are ranked
+                    key = repr(version.rules)
+                    if key not in ranked:
+                        ranked[key] = releases.sort.ranked(version)
+                    self.Releases = ranked[key].update(scraped_releases)
+                    if printed and len(self.Releases) > 0:
+                        releases.sort.report(self.Releases, self.version)
+                        releases.print_releases(self.Releases, True)
+                    candidates = list(self.Releases)
+                elif printed:
+                    self.Releases = releases.view(scraped_releases, self.version)
+                    releases.sort(self.Releases, self.version)
+                    if len(self.Releases) > 0:
+                        releases.print_releases(self.Releases, True)
+                    candidates = list(self.Releases)
+                else:
+                    self.Releases = releases.view(scraped_releases, self.version)
+                    candidates = releases.sort.candidates(self.Releases, self.version)
                 ver_dld = False
-                for release in copy.deepcopy(self.Releases):
+                for release in debrid.speculate(self, candidates):
                     self.Releases = [
                         release,
                     ]
@@ -2031,15 +2109,15 @@ class media:
         except Exception:
             ui_print("error: couldnt set release bitrate", ui_settings.debug)
 
-    def season_pack(self, releases):
+    def season_pack(self, scraped_releases):
         season_releases = -1
         episode_releases = [-2] * len(self.Episodes)
         for release in self.Releases:
             if len(release.cached) > 0 and int(release.resolution) > season_releases:
                 season_releases = int(release.resolution)
         for i, episode in enumerate(self.Episodes):
-            ep_match = regex.compile(episode.deviation(), regex.IGNORECASE)
-            for release in releases:
+            ep_match = releases.compile_pattern(episode.deviation(), regex.I)
+            for release in scraped_releases:
                 if (
                     len(release.cached) > 0
                     and int(release.resolution) >= season_releases
@@ -298,6 +298,17 @@ def resolve_imdb_id(query, media_type="movie"):
     Returns:
         IMDB ID string (e.g. "tt1234567") or None if not found.
     """
+    return lookup_imdb_id(query, media_type)[0]
+
+
+def lookup_imdb_id(query, media_type="movie"):
+    """Like resolve_imdb_id, but tells failed requests apart from unknown titles.
+
+    Returns:
+        (IMDB ID or None, error message or None). The error is set when TMDB
+        could not be asked, the IMDB ID is None without an error when TMDB
+        doesn't know the title.
+    """
     import re
 
     # Normalize dotted scraper queries: "war.of.the.worlds.2025" → "war of the worlds"
@@ -310,17 +321,21 @@ def resolve_imdb_id(query, media_type="movie"):
 
     tmdb_type = "tv" if media_type in ("show", "season") else "movie"
     result = search(clean, media_type=tmdb_type)
+    if result.get("error"):
+        return None, result["error"]
     results = result.get("results", [])
     if not results:
-        return None
+        return None, None
 
     tmdb_id = results[0].get("id")
     if not tmdb_id:
-        return None
+        return None, None
 
     if tmdb_type == "movie":
         details = get_movie_details(tmdb_id)
     else:
         details = get_show_details(tmdb_id)
+    if not details:
+        return None, "TMDB details request failed"
 
-    return details.get("imdb_id") or None
+    return details.get("imdb_id") or None, None
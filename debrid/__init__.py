@@ -1,4 +1,4 @@
-import copy
+import itertools
 
 import regex
 
@@ -10,19 +10,53 @@ tracker: list = []
 downloading: list = []
 
 
+def cached(release):
+    # the services a release is cached on, as overridden for its source by tracker
+    found = release.cached
+    for t, s in tracker:
+        if regex.search(t, release.source, regex.I):
+            found = s
+    return found
+
+
+def speculate(element, candidates):
+    # the candidates, taken in batches by services that add several releases at
+    # once (see realdebrid.speculate) before they are handed to download()
+    speculative = [
+        service
+        for service in services.get()
+        if hasattr(service, "speculate") and service.lookahead() > 1
+    ]
+    candidates = iter(candidates)
+    if not speculative:
+        yield from candidates
+        return
+    size = max(service.lookahead() for service in speculative)
+    while True:
+        batch = list(itertools.islice(candidates, size))
+        if not batch:
+            return
+        for service in speculative:
+            service.speculate(
+                element,
+                [release for release in batch if service.short in cached(release)],
+            )
+        yield from batch
+
+
 # Download Method:
 def download(element, query="", force=False):
+    import releases
+
     downloaded_files = []
-    cached_releases = copy.deepcopy(element.Releases)
     downloaded = False
-    for release in cached_releases:
+    for release in list(element.Releases):
+        # the releases may be shared with other versions, the services get a copy
+        release = releases.materialize(release)
         element.Releases = [
             release,
         ]
-        if len(tracker) > 0:
-            for t, s in tracker:
-                if regex.search(t, release.source, regex.I):
-                    release.cached = s
+        release.cached = cached(release)
         for service in services.get():
             if service.short in release.cached:
                 if service.download(element, query=query, force=force):
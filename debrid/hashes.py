@@ -0,0 +1,123 @@
+# Debrid hash cache: what a debrid service found out about a torrent hash, whether it
+# was cached and the files it had, kept in an sqlite file in the config dir. Hashes
+# that turned out to be uncached are skipped before their magnet is added again, the
+# file lists of cached ones save the request for them. Entries expire after the hours
+# the service passes in.
+import json
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+# the cache file, defaults to debrid_cache.db in the config dir
+path = ""
+
+_lock = threading.Lock()
+_ready = set()
+
+
+def file():
+    if path:
+        return path
+    from ui.ui_print import config_dir
+
+    return os.path.join(config_dir, "debrid_cache.db")
+
+
+def hours(value):
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def connect():
+    name = file()
+    connection = sqlite3.connect(name, timeout=10)
+    if name not in _ready:
+        with _lock:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS hashes (service TEXT, hash TEXT, "
+                "cached INTEGER, files TEXT, checked REAL, PRIMARY KEY (service, hash))"
+            )
+            connection.commit()
+            _ready.add(name)
+    return connection
+
+
+def get(service, hashes, ttl, uncached_ttl):
+    # the fresh entries of a service for hashes, as {hash: namespace(cached, files,
+    # checked)}. ttl and uncached_ttl are the hours cached and uncached hashes are kept.
+    found = {}
+    hashes = [hash_.lower() for hash_ in hashes]
+    if not hashes or hours(ttl) == hours(uncached_ttl) == 0:
+        return found
+    now = time.time()
+    try:
+        connection = connect()
+        try:
+            connection.execute(
+                "DELETE FROM hashes WHERE service = ? AND checked < ?",
+                (service, now - max(hours(ttl), hours(uncached_ttl)) * 3600),
+            )
+            connection.commit()
+            # sqlite allows 999 parameters per statement
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start : start + 500]
+                rows = connection.execute(
+                    "SELECT hash, cached, files, checked FROM hashes WHERE service = ? "
+                    "AND hash IN (" + ",".join("?" * len(batch)) + ")",
+                    [service] + batch,
+                ).fetchall()
+                for hash_, cached, files, checked in rows:
+                    lifetime = hours(ttl) if cached else hours(uncached_ttl)
+                    if now - checked <= lifetime * 3600:
+                        found[hash_] = SimpleNamespace(
+                            cached=bool(cached),
+                            files=json.loads(files or "[]"),
+                            checked=checked,
+                        )
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return {}
+    return found
+
+
+def put(service, hash_, cached, files=None):
+    # files: [{"id": ..., "path": ..., "bytes": ...}] as the service listed them
+    try:
+        connection = connect()
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)",
+                (
+                    service,
+                    hash_.lower(),
+                    int(cached),
+                    json.dumps(files or []),
+                    time.time(),
+                ),
+            )
+            connection.commit()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        pass
+
+
+def clear(service=None):
+    # removes the entries of a service, or all entries. returns how many.
+    connection = connect()
+    try:
+        if service:
+            cursor = connection.execute(
+                "DELETE FROM hashes WHERE service = ?", (service,)
+            )
+        else:
+            cursor = connection.execute("DELETE FROM hashes")
+        connection.commit()
+        return cursor.rowcount
+    finally:
+        connection.close()
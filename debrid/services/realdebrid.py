@@ -1,5 +1,8 @@
 # import modules
+import concurrent.futures
 import json
+import threading
+import time
 from types import SimpleNamespace
 
 import regex
@@ -13,6 +16,31 @@ name = "Real Debrid"
 short = "RD"
 # (required) Authentification of the Debrid service.
 api_key = ""
+# hours the outcome of a cached and of an uncached hash is kept (see debrid.hashes)
+hash_ttl = "168"
+uncached_hash_ttl = "12"
+# seconds the torrent list of the account is reused between checks
+account_ttl = 60
+# releases whose magnets are added at once, "1" adds them one after another
+speculative = "1"
+# seconds speculative magnets are waited for
+speculative_timeout = 10
+# links unrestricted at once, and per second (the api allows 250 requests a minute)
+unrestrict_workers = 4
+unrestrict_rate = 3
+# seconds between the polls of added torrents, and how long they are waited for
+poll_interval = 2
+poll_timeout = 30
+# torrent states that will not become downloaded
+failed_states = ["magnet_error", "error", "virus", "dead"]
+# torrent states that are still on their way to downloaded
+pending_states = [
+    "magnet_conversion",
+    "queued",
+    "downloading",
+    "compressing",
+    "uploading",
+]
 # Define Variables
 session = requests.Session()
 errors = [
@@ -135,6 +163,384 @@ def delete(url, context=None):
     return None
 
 
+video_extensions = [
+    ".mkv",
+    ".mp4",
+    ".avi",
+    ".mov",
+    ".flv",
+    ".wmv",
+    ".webm",
+    ".m4v",
+    ".mpg",
+    ".mpeg",
+    ".3gp",
+    ".ogv",
+    ".ts",
+    ".m2ts",
+    ".mts",
+    ".m2v",
+    ".m4p",
+    ".mxf",
+    ".asf",
+    ".rm",
+    ".rmvb",
+    ".vob",
+    ".f4v",
+    ".divx",
+]
+
+
+def video_file_ids(files):
+    # the ids of the video files of a torrent, as listed by torrents/info
+    return [
+        str(f.id)
+        for f in files
+        if any(
+            getattr(f, "path", getattr(f, "filename", getattr(f, "name", "")))
+            .lower()
+            .endswith(ext)
+            for ext in video_extensions
+        )
+    ]
+
+
+_index = SimpleNamespace(instance=None, lock=threading.Lock())
+
+
+def page(number, limit):
+    # a page of the torrents of the account, newest first, None if it failed
+    response = get(
+        "https://api.real-debrid.com/rest/1.0/torrents?page="
+        + str(number + 1)
+        + "&limit="
+        + str(limit),
+        context="account torrents",
+    )
+    return response if isinstance(response, list) else None
+
+
+def torrents(limit=1000, pages=5):
+    # the torrents of the account, newest first, one request per page
+    found = []
+    for number in range(pages):
+        response = page(number, limit)
+        if response is None:
+            break
+        found += response
+        if len(response) < limit:
+            break
+    return found
+
+
+def downloaded(torrent):
+    return getattr(torrent, "status", "") == "downloaded"
+
+
+def index():
+    # the torrents of the account by hash, the new ones are read after account_ttl
+    # seconds (see base.inventory)
+    from base import inventory
+
+    with _index.lock:
+        if _index.instance is None:
+            _index.instance = inventory(page, downloaded, account_ttl, pages=50)
+        return _index.instance
+
+
+def existing(hash_):
+    # the downloaded torrent of the account for hash_, None if there is none
+    if not hash_ or not api_key:
+        return None
+    try:
+        return index().get(hash_)
+    except Exception as e:
+        ui_print(
+            "[realdebrid] error: account torrents unavailable: " + str(e),
+            debug=ui_settings.debug,
+        )
+        return None
+
+
+def tracked(hash_):
+    # the torrent of the account for hash_ that did not fail, None if there is none
+    if not hash_ or not api_key:
+        return None
+    try:
+        torrent = index().refresh().get(hash_)
+    except Exception as e:
+        ui_print(
+            "[realdebrid] error: account torrents unavailable: " + str(e),
+            debug=ui_settings.debug,
+        )
+        return None
+    if torrent is None or getattr(torrent, "status", "") in failed_states:
+        return None
+    return torrent
+
+
+def known(hashes):
+    # what is known about hashes: the hash cache first, then one look at the torrents
+    # of the account for the rest. {hash: namespace(cached, files)}
+    try:
+        from debrid import hashes as store
+
+        found = store.get(short, hashes, hash_ttl, uncached_hash_ttl)
+        missing = set(hashes) - set(found)
+        if not missing or not api_key:
+            return found
+        for torrent in index().refresh().values():
+            hash_ = str(getattr(torrent, "hash", "")).lower()
+            if hash_ not in missing:
+                continue
+            if torrent.status == "downloaded":
+                cached = True
+            elif torrent.status in failed_states:
+                cached = False
+            else:
+                continue
+            store.put(short, hash_, cached)
+            found[hash_] = SimpleNamespace(cached=cached, files=[])
+        return found
+    except Exception as e:
+        ui_print(
+            "[realdebrid] error: hash cache unavailable: " + str(e),
+            debug=ui_settings.debug,
+        )
+        return {}
+
+
+def remember(hash_, cached, files=None):
+    # stores the outcome of a download attempt, files as listed by torrents/info
+    try:
+        from debrid import hashes as store
+
+        store.put(
+            short,
+            hash_,
+            cached,
+            [
+                {
+                    "id": f.id,
+                    "path": getattr(f, "path", ""),
+                    "bytes": getattr(f, "bytes", 0),
+                }
+                for f in files or []
+                if hasattr(f, "id")
+            ],
+        )
+    except Exception as e:
+        ui_print(
+            "[realdebrid] error: hash cache unavailable: " + str(e),
+            debug=ui_settings.debug,
+        )
+
+
+_poller = SimpleNamespace(instance=None, lock=threading.Lock())
+
+
+def states(ids):
+    # the torrents of ids, from one request for the latest torrents of the account
+    return {
+        str(torrent.id): torrent
+        for torrent in torrents(limit=100, pages=1)
+        if str(getattr(torrent, "id", "")) in ids
+    }
+
+
+def poller():
+    # waits for added torrents, all of them are polled together (see base.bulk_poller)
+    from base import bulk_poller
+
+    with _poller.lock:
+        if _poller.instance is None:
+            _poller.instance = bulk_poller(states, poll_interval)
+        return _poller.instance
+
+
+def finished(torrent):
+    status = getattr(torrent, "status", "")
+    return status == "downloaded" or status in failed_states
+
+
+_unrestrict = SimpleNamespace(bucket=None, lock=threading.Lock())
+
+
+def unrestrict(links, context=None, names=None):
+    # the download links of the hoster links of a torrent in their order, unrestricted
+    # a few at once while the first ones are already used. Failed links are None.
+    # The unknown (None) file names in names are filled in from the responses.
+    from base import ordered_map, token_bucket
+
+    with _unrestrict.lock:
+        if _unrestrict.bucket is None:
+            _unrestrict.bucket = token_bucket(unrestrict_rate, unrestrict_workers)
+
+    def resolve(item):
+        idx, link = item
+        try:
+            response = post(
+                "https://api.real-debrid.com/rest/1.0/unrestrict/link",
+                {"link": link},
+                context=context,
+            )
+        except Exception as e:
+            ui_print(
+                "[realdebrid] error getting unrestricted link: " + str(e),
+                debug=True,
+            )
+            return None
+        if names is not None and names[idx] is None:
+            names[idx] = getattr(response, "filename", None)
+        return getattr(response, "download", None)
+
+    return ordered_map(
+        resolve, list(enumerate(links)), unrestrict_workers, _unrestrict.bucket
+    )
+
+
+# torrents of releases tried by speculate(), by hash: (torrent id or "" for releases
+# download() skips, time)
+_speculated: dict = {}
+
+
+def lookahead():
+    # releases speculate() adds at once
+    try:
+        return max(int(speculative), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _add(release, context):
+    # adds the magnet of a release and selects its video files, returns the torrent id
+    response = post(
+        "https://api.real-debrid.com/rest/1.0/torrents/addMagnet",
+        {"magnet": str(release.download[0])},
+        context=context,
+    )
+    if not response or hasattr(response, "error") or not hasattr(response, "id"):
+        return ""
+    torrent_id = str(response.id)
+    # the files of a new magnet are listed after a moment
+    time.sleep(2)
+    response = get(
+        "https://api.real-debrid.com/rest/1.0/torrents/info/" + torrent_id,
+        context=context,
+    )
+    files = getattr(response, "files", [])
+    if files:
+        post(
+            "https://api.real-debrid.com/rest/1.0/torrents/selectFiles/" + torrent_id,
+            {"files": ",".join(video_file_ids(files) or [str(f.id) for f in files])},
+            context=context,
+        )
+    return torrent_id
+
+
+def speculate(element, candidates):
+    # adds the magnets of the first candidates at once and polls them together, with
+    # one torrent list request per poll, until one of them was downloaded. The best
+    # of the downloaded ones is kept for download(), the failed ones are deleted.
+    # The ones that are still downloading stay in the account for a later download:
+    # download() skips them if there is a winner, and reuses them if there is none.
+    now = time.time()
+    for hash_, (_, added) in list(_speculated.items()):
+        if now - added > 600:
+            _speculated.pop(hash_, None)
+    picked = {}
+    for release in candidates:
+        hash_ = str(getattr(release, "hash", "")).lower()
+        download_ = getattr(release, "download", None) or [""]
+        if (
+            getattr(release, "type", "") != "http"
+            and len(hash_) == 40
+            and str(download_[0]).startswith("magnet:")
+            and hash_ not in picked
+        ):
+            picked[hash_] = release
+    verdicts = known(list(picked))
+    picked = {
+        hash_: release
+        for hash_, release in picked.items()
+        if hash_ not in verdicts or verdicts[hash_].cached
+    }
+    picked = dict(list(picked.items())[: lookahead()])
+    if len(picked) < 2:
+        return
+    context = "speculative download | item: '" + str(element.query()) + "'"
+    ui_print(
+        "[realdebrid] adding " + str(len(picked)) + " releases at once ...",
+        ui_settings.debug,
+    )
+
+    def add(hash_, release):
+        # a torrent of the account is polled instead of adding the magnet again
+        torrent = tracked(hash_)
+        return str(torrent.id) if torrent is not None else _add(release, context)
+
+    with concurrent.futures.ThreadPoolExecutor(len(picked)) as pool:
+        ids = list(pool.map(add, picked, picked.values()))
+        pending = {
+            torrent_id: hash_ for torrent_id, hash_ in zip(ids, picked) if torrent_id
+        }
+        futures = {
+            poller().wait(torrent_id, finished, speculative_timeout): torrent_id
+            for torrent_id in pending
+        }
+        rank = list(pending)
+        tried = set(pending.values())
+        winner = ""
+        waiting = set(futures)
+        while waiting and not winner:
+            done, waiting = concurrent.futures.wait(
+                waiting, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            # of the torrents that finished together, the best ready one wins
+            for future in sorted(done, key=lambda future: rank.index(futures[future])):
+                torrent_id = futures[future]
+                status = getattr(future.result(), "status", "")
+                if status == "downloaded":
+                    winner = winner or torrent_id
+                    continue
+                if status not in failed_states:
+                    # not downloaded in time, it is kept with the losers below
+                    continue
+                # only a failed torrent says that its hash is not cached
+                hash_ = pending.pop(torrent_id)
+                remember(hash_, False)
+                _speculated[hash_] = ("", time.time())
+                pool.submit(
+                    delete,
+                    "https://api.real-debrid.com/rest/1.0/torrents/delete/"
+                    + torrent_id,
+                    context,
+                )
+        # the magnets that could not be added are skipped as well
+        for hash_ in picked:
+            if hash_ not in tried:
+                _speculated[hash_] = ("", time.time())
+        if winner:
+            _speculated[pending.pop(winner)] = (winner, time.time())
+        # the torrents that are still downloading stay in the account, a later
+        # download reuses them once they are downloaded
+        for torrent_id, hash_ in pending.items():
+            poller().cancel(torrent_id)
+            index().put(
+                SimpleNamespace(id=torrent_id, hash=hash_, status="downloading")
+            )
+            _speculated[hash_] = ("" if winner else torrent_id, time.time())
+    ui_print(
+        "[realdebrid] "
+        + (
+            "torrent " + winner + " was downloaded first"
+            if winner
+            else "none of the releases was downloaded in time"
+        ),
+        ui_settings.debug,
+    )
+
+
 def _post_download_cleanup(element):
     """Remove element from downloading list and refresh library services."""
     import debrid as db
@@ -166,8 +572,6 @@ def _post_download_cleanup(element):
 
 # (required) Download Function.
 def download(element, query="", force=False):
-    import time
-
     cached = element.Releases
     if query == "":
         query = element.deviation()
@@ -252,142 +656,181 @@ def download(element, query="", force=False):
                         )
                         continue
 
-                    try:
-                        response = post(
-                            "https://api.real-debrid.com/rest/1.0/torrents/addMagnet",
-                            {"magnet": magnet_candidate},
-                            context=context,
-                        )
-                    except Exception as add_magnet_error:
+                    release_hash = str(getattr(release, "hash", "")).lower()
+                    verdict = (
+                        known([release_hash]).get(release_hash)
+                        if release_hash
+                        else None
+                    )
+                    if verdict is not None and not verdict.cached:
                         ui_print(
-                            "[realdebrid] error adding magnet (will try next release): "
-                            + str(add_magnet_error),
+                            "[realdebrid] skipping release, it was not cached recently: "
+                            + release.title,
                             ui_settings.debug,
                         )
                         continue
 
-                    if (
-                        not response
-                        or hasattr(response, "error")
-                        or not hasattr(response, "id")
-                    ):
+                    speculated = _speculated.pop(release_hash, None)
+                    if speculated is not None and not speculated[0]:
                         ui_print(
-                            "[realdebrid] error adding magnet: "
-                            + (
-                                response.error
-                                if response and hasattr(response, "error")
-                                else "unknown error"
-                            ),
+                            "[realdebrid] skipping release, it was not downloaded in speculative mode: "
+                            + release.title,
                             ui_settings.debug,
                         )
                         continue
+                    reused = speculated[0] if speculated else ""
+                    reused_info = None
+                    torrent = None if reused else existing(release_hash)
+                    if torrent is not None:
+                        reused_info = get(
+                            "https://api.real-debrid.com/rest/1.0/torrents/info/"
+                            + str(torrent.id),
+                            context=context,
+                        )
+                        if len(getattr(reused_info, "links", None) or []) > 0:
+                            reused = str(torrent.id)
+                            ui_print(
+                                "[realdebrid] reusing torrent of the account: "
+                                + reused,
+                                ui_settings.debug,
+                            )
+                        else:
+                            # deleted since the account was listed
+                            index().drop(release_hash)
+                            reused_info = None
+
+                    if reused:
+                        torrent_id = reused
+                    else:
+                        try:
+                            response = post(
+                                "https://api.real-debrid.com/rest/1.0/torrents/addMagnet",
+                                {"magnet": magnet_candidate},
+                                context=context,
+                            )
+                        except Exception as add_magnet_error:
+                            ui_print(
+                                "[realdebrid] error adding magnet (will try next release): "
+                                + str(add_magnet_error),
+                                ui_settings.debug,
+                            )
+                            continue
 
-                    torrent_id = str(response.id)
-                    ui_print(
-                        "[realdebrid] magnet added, torrent_id: " + torrent_id,
-                        ui_settings.debug,
-                    )
+                        if (
+                            not response
+                            or hasattr(response, "error")
+                            or not hasattr(response, "id")
+                        ):
+                            ui_print(
+                                "[realdebrid] error adding magnet: "
+                                + (
+                                    response.error
+                                    if response and hasattr(response, "error")
+                                    else "unknown error"
+                                ),
+                                ui_settings.debug,
+                            )
+                            continue
 
-                    time.sleep(2)
-                    response = get(
-                        "https://api.real-debrid.com/rest/1.0/torrents/info/"
-                        + torrent_id,
-                        context=context,
-                    )
+                        torrent_id = str(response.id)
+                        ui_print(
+                            "[realdebrid] magnet added, torrent_id: " + torrent_id,
+                            ui_settings.debug,
+                        )
+
+                    if reused_info is not None:
+                        response = reused_info
+                    elif reused:
+                        response = get(
+                            "https://api.real-debrid.com/rest/1.0/torrents/info/"
+                            + torrent_id,
+                            context=context,
+                        )
+                    elif verdict is not None and verdict.files:
+                        # the file ids of a hash don't change, no need to ask for them
+                        response = SimpleNamespace(
+                            status="known",
+                            files=[SimpleNamespace(**f) for f in verdict.files],
+                        )
+                    else:
+                        time.sleep(2)
+                        response = get(
+                            "https://api.real-debrid.com/rest/1.0/torrents/info/"
+                            + torrent_id,
+                            context=context,
+                        )
                     ui_print(
                         "[realdebrid] torrent status: " + response.status,
                         ui_settings.debug,
                     )
 
                     if hasattr(response, "files") and len(response.files) > 0:
-                        video_extensions = [
-                            ".mkv",
-                            ".mp4",
-                            ".avi",
-                            ".mov",
-                            ".flv",
-                            ".wmv",
-                            ".webm",
-                            ".m4v",
-                            ".mpg",
-                            ".mpeg",
-                            ".3gp",
-                            ".ogv",
-                            ".ts",
-                            ".m2ts",
-                            ".mts",
-                            ".m2v",
-                            ".m4p",
-                            ".mxf",
-                            ".asf",
-                            ".rm",
-                            ".rmvb",
-                            ".vob",
-                            ".f4v",
-                            ".divx",
-                        ]
-                        file_ids = [
-                            str(f.id)
-                            for f in response.files
-                            if any(
-                                getattr(
-                                    f,
-                                    "path",
-                                    getattr(
-                                        f,
-                                        "filename",
-                                        getattr(f, "name", ""),
-                                    ),
+                        # a reused torrent was downloaded already
+                        if not (
+                            response.status == "downloaded"
+                            and len(getattr(response, "links", [])) > 0
+                        ):
+                            file_ids = video_file_ids(response.files)
+
+                            if not file_ids:
+                                ui_print(
+                                    "[realdebrid] warning: no video files found, selecting all files",
+                                    ui_settings.debug,
                                 )
-                                .lower()
-                                .endswith(ext)
-                                for ext in video_extensions
-                            )
-                        ]
+                                file_ids = [str(f.id) for f in response.files]
 
-                        if not file_ids:
                             ui_print(
-                                "[realdebrid] warning: no video files found, selecting all files",
+                                "[realdebrid] selecting "
+                                + str(len(file_ids))
+                                + " video files...",
                                 ui_settings.debug,
                             )
-                            file_ids = [str(f.id) for f in response.files]
-
-                        ui_print(
-                            "[realdebrid] selecting "
-                            + str(len(file_ids))
-                            + " video files...",
-                            ui_settings.debug,
-                        )
-                        post(
-                            "https://api.real-debrid.com/rest/1.0/torrents/selectFiles/"
-                            + torrent_id,
-                            {"files": ",".join(file_ids)},
-                            context=context,
-                        )
+                            post(
+                                "https://api.real-debrid.com/rest/1.0/torrents/selectFiles/"
+                                + torrent_id,
+                                {"files": ",".join(file_ids)},
+                                context=context,
+                            )
 
-                        max_polls = 5
-                        final_status = "unknown"
-                        for poll in range(max_polls):
-                            time.sleep(2)
+                            # waits together with the other added torrents
+                            poller().wait(torrent_id, finished, poll_timeout).result()
                             response = get(
                                 "https://api.real-debrid.com/rest/1.0/torrents/info/"
                                 + torrent_id,
                                 context=context,
                             )
                             final_status = response.status
-                            if response.status == "downloaded" or (
-                                hasattr(response, "links") and len(response.links) > 0
-                            ):
-                                break
-                        ui_print(
-                            "[realdebrid] torrent status after polling: "
-                            + final_status,
-                            ui_settings.debug,
-                        )
-
-                        unrestricted_links = []
-                        filenames = []
+                            ui_print(
+                                "[realdebrid] torrent status after polling: "
+                                + final_status,
+                                ui_settings.debug,
+                            )
 
+                        # a torrent that is still downloading says nothing about
+                        # whether its hash is cached
+                        if release_hash and (
+                            len(getattr(response, "links", [])) > 0
+                            or response.status in failed_states
+                        ):
+                            remember(
+                                release_hash,
+                                len(getattr(response, "links", [])) > 0,
+                                getattr(response, "files", []),
+                            )
+                        if release_hash and (
+                            response.status == "downloaded"
+                            or response.status in pending_states
+                        ):
+                            # a later download of the release reuses the torrent,
+                            # once it is downloaded
+                            index().put(
+                                SimpleNamespace(
+                                    id=torrent_id,
+                                    hash=release_hash,
+                                    status=response.status,
+                                    links=getattr(response, "links", []),
+                                )
+                            )
                         if hasattr(response, "links") and len(response.links) > 0:
                             ui_print(
                                 "[realdebrid] getting unrestricted links for "
@@ -420,38 +863,24 @@ def download(element, query="", force=False):
                                             filename = filename.split("/")[-1]
                                         selected_file_names.append(filename)
 
-                            for idx, link in enumerate(response.links):
-                                try:
-                                    unres_response = post(
-                                        "https://api.real-debrid.com/rest/1.0/unrestrict/link",
-                                        {"link": link},
-                                        context=context,
-                                    )
-                                    if hasattr(unres_response, "download"):
-                                        unrestricted_links.append(
-                                            unres_response.download
-                                        )
-                                        if (
-                                            idx < len(selected_file_names)
-                                            and selected_file_names[idx]
-                                        ):
-                                            filename = selected_file_names[idx]
-                                        elif hasattr(unres_response, "filename"):
-                                            filename = unres_response.filename
-                                        else:
-                                            filename = (
-                                                release.title + "_file_" + str(idx)
-                                            )
-                                        filenames.append(filename)
-                                except Exception as e:
-                                    ui_print(
-                                        "[realdebrid] error getting unrestricted link: "
-                                        + str(e),
-                                        debug=True,
-                                    )
-                                    continue
-
-                            if len(unrestricted_links) > 0:
+                            # the downloader starts with the first links while the
+                            # others are still unrestricted, and skips the ones that
+                            # failed. Files without a selected name get the name of
+                            # their unrestricted link.
+                            filenames = [
+                                (
+                                    selected_file_names[idx]
+                                    if idx < len(selected_file_names)
+                                    and selected_file_names[idx]
+                                    else None
+                                )
+                                for idx in range(len(response.links))
+                            ]
+                            unrestricted_links = unrestrict(
+                                response.links, context, filenames
+                            )
+
+                            if unrestricted_links.any():
                                 release.download = unrestricted_links
                                 release.filenames = filenames
                                 ui_print(
@@ -465,12 +894,19 @@ def download(element, query="", force=False):
                                     ui_print("[realdebrid] download complete (torrent)")
                                     _post_download_cleanup(element)
                                     return True
-                        else:
+                        elif response.status in pending_states:
+                            # kept in the account, it is reused once it is downloaded
                             ui_print(
                                 "[realdebrid] no links available yet, status: "
                                 + response.status,
                                 ui_settings.debug,
                             )
+                        else:
+                            ui_print(
+                                "[realdebrid] no links available, status: "
+                                + response.status,
+                                ui_settings.debug,
+                            )
                             ui_print(
                                 "[realdebrid] deleting torrent (cannot use): "
                                 + torrent_id,
@@ -508,6 +944,8 @@ def download(element, query="", force=False):
 def check(element, force=False):
     http_count = 0
     ignored_count = 0
+    uncached_count = 0
+    torrent_releases = []
     for release in element.Releases[:]:
         # Skip hash checking for HTTP type releases (e.g., from AIOStreams)
         if hasattr(release, "type") and release.type == "http":
@@ -517,8 +955,7 @@ def check(element, force=False):
 
         release_hash = getattr(release, "hash", "")
         if isinstance(release_hash, str) and len(release_hash) == 40:
-            release.cached += ["RD"]
-            release.files = []
+            torrent_releases += [release]
         else:
             ui_print(
                 "[realdebrid] error (missing torrent hash): ignoring release '"
@@ -529,6 +966,18 @@ def check(element, force=False):
             element.Releases.remove(release)
             ignored_count += 1
 
+    # hashes that were not cached recently are dropped before any magnet is added,
+    # the others are left to download()
+    verdicts = known([release.hash.lower() for release in torrent_releases])
+    for release in torrent_releases:
+        verdict = verdicts.get(release.hash.lower())
+        if verdict is not None and not verdict.cached:
+            element.Releases.remove(release)
+            uncached_count += 1
+            continue
+        release.cached += ["RD"]
+        release.files = []
+
     # Sort releases by size to prioritize best quality
     element.Releases.sort(key=lambda x: getattr(x, "size", 0), reverse=True)
     ui_print(
@@ -544,6 +993,7 @@ def check(element, force=False):
             if http_count
             else ""
         )
-        + (" [" + str(ignored_count) + " ignored]" if ignored_count else ""),
+        + (" [" + str(ignored_count) + " ignored]" if ignored_count else "")
+        + (" [" + str(uncached_count) + " known uncached]" if uncached_count else ""),
         ui_settings.debug,
     )
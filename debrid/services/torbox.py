@@ -1,3 +1,4 @@
+import threading
 from types import SimpleNamespace
 
 import regex
@@ -12,6 +13,20 @@ api_key = ""
 
 session = requests.Session()
 BASE_URL = "https://api.torbox.app"
+# download links requested at once, and per second
+request_workers = 4
+request_rate = 4
+_requests = SimpleNamespace(bucket=None, lock=threading.Lock())
+# seconds between the polls of torrents that are not ready yet, and how long they are
+# waited for
+poll_interval = 2
+poll_timeout = 30
+# download states of torrents that will not become ready
+failed_states = ["error", "failed", "stalled (no seeds)"]
+_poller = SimpleNamespace(instance=None, lock=threading.Lock())
+# seconds after which new torrents of the account are looked for
+account_ttl = 60
+_index = SimpleNamespace(instance=None, lock=threading.Lock())
 _VIDEO_EXTENSIONS = (
     ".mkv",
     ".mp4",
@@ -234,6 +249,93 @@ def _extract_torrent_info(payload, torrent_id):
     return None
 
 
+def _ready(torrent_info):
+    return (
+        isinstance(torrent_info, dict)
+        and bool(torrent_info.get("files"))
+        and torrent_info.get("download_finished", True) is not False
+    )
+
+
+def _finished(torrent_info):
+    return (
+        _ready(torrent_info)
+        or str(torrent_info.get("download_state", "")).lower() in failed_states
+    )
+
+
+def _states(ids):
+    # the torrents of ids, from one request for all torrents of the account
+    payload = get("/v1/api/torrents/mylist", params={"bypass_cache": "true"})
+    if not _is_success(payload):
+        return {}
+    found = {}
+    for torrent_id in ids:
+        torrent_info = _extract_torrent_info(payload, torrent_id)
+        if isinstance(torrent_info, dict):
+            found[torrent_id] = torrent_info
+    return found
+
+
+def poller():
+    # waits for torrents that are not ready, all of them are polled together (see
+    # base.bulk_poller)
+    from base import bulk_poller
+
+    with _poller.lock:
+        if _poller.instance is None:
+            _poller.instance = bulk_poller(_states, poll_interval)
+        return _poller.instance
+
+
+def _page(number, limit):
+    # a page of the torrents of the account, None if it failed
+    payload = get(
+        "/v1/api/torrents/mylist",
+        params={"bypass_cache": "true", "offset": number * limit, "limit": limit},
+        context="account torrents",
+    )
+    if not _is_success(payload):
+        return None
+    data = _to_plain(getattr(payload, "data", None))
+    return [
+        SimpleNamespace(
+            id=item.get("id", item.get("torrent_id")),
+            hash=str(item.get("hash", "")).lower(),
+            info=item,
+        )
+        for item in (data if isinstance(data, list) else [])
+        if isinstance(item, dict)
+    ]
+
+
+def index():
+    # the torrents of the account by hash, the new ones are read after account_ttl
+    # seconds (see base.inventory)
+    from base import inventory
+
+    with _index.lock:
+        if _index.instance is None:
+            _index.instance = inventory(
+                _page, lambda torrent: _ready(torrent.info), account_ttl
+            )
+        return _index.instance
+
+
+def existing(hash_):
+    # the ready torrent of the account for hash_, None if there is none
+    if len(hash_) != 40 or not api_key:
+        return None
+    try:
+        return index().get(hash_)
+    except Exception as exc:
+        ui_print(
+            "[torbox] error: account torrents unavailable: " + str(exc),
+            debug=ui_settings.debug,
+        )
+        return None
+
+
 def _post_download_cleanup(element):
     import debrid as db
 
@@ -274,6 +376,11 @@ def _fetch_release_links(release, torrent_id, context=None):
         return False
 
     torrent_info = _extract_torrent_info(list_payload, torrent_id)
+    if not _ready(torrent_info):
+        # waits together with the other torrents that are not ready
+        torrent_info = (
+            poller().wait(torrent_id, _finished, poll_timeout).result() or torrent_info
+        )
     files = []
     if isinstance(torrent_info, dict):
         maybe_files = torrent_info.get("files")
@@ -315,9 +422,15 @@ def _fetch_release_links(release, torrent_id, context=None):
                 filename = filename.split("/")[-1]
             selected_files.append({"id": file_id, "name": filename})
 
-    links = []
-    filenames = []
-    for file_entry in selected_files:
+    # the links are requested a few at once, the downloader starts with the first
+    # ones while the others are still requested and skips the failed ones (None)
+    from base import ordered_map, token_bucket
+
+    with _requests.lock:
+        if _requests.bucket is None:
+            _requests.bucket = token_bucket(request_rate, request_workers)
+
+    def request(file_entry):
         dl_payload = get(
             "/v1/api/torrents/requestdl",
             params={
@@ -329,13 +442,18 @@ def _fetch_release_links(release, torrent_id, context=None):
             context=context,
         )
         if not _is_success(dl_payload):
-            continue
+            return None
         download_url = _extract_download_url(dl_payload)
         if isinstance(download_url, str) and download_url:
-            links.append(download_url)
-            filenames.append(file_entry["name"])
+            return download_url
+        return None
 
-    if len(links) == 0:
+    links = ordered_map(request, selected_files, request_workers, _requests.bucket)
+    filenames = [file_entry["name"] for file_entry in selected_files]
+
+    if not links.any():
+        links = []
+        filenames = []
         dl_payload = get(
             "/v1/api/torrents/requestdl",
             params={
@@ -359,6 +477,43 @@ def _fetch_release_links(release, torrent_id, context=None):
     return True
 
 
+def _add_torrent(release, magnet, context=None):
+    # adds the magnet if it is cached and gets the links of its files
+    create_payload = post(
+        "/v1/api/torrents/createtorrent",
+        data={
+            "magnet": magnet,
+            "add_only_if_cached": "true",
+            "as_queued": "false",
+        },
+        context=context,
+    )
+    if not _is_success(create_payload):
+        ui_print(
+            "[torbox] failed to create torrent for release: " + str(release.title),
+            debug=ui_settings.debug,
+        )
+        return False
+
+    torrent_id = _extract_torrent_id(create_payload)
+    if torrent_id is None:
+        ui_print(
+            "[torbox] failed to determine torrent_id for release: "
+            + str(release.title),
+            debug=ui_settings.debug,
+        )
+        return False
+
+    if not _fetch_release_links(release, torrent_id, context=context):
+        ui_print(
+            "[torbox] no downloadable links available for release: "
+            + str(release.title),
+            debug=ui_settings.debug,
+        )
+        return False
+    return True
+
+
 def download(element, query="", force=False):
     cached = element.Releases
     if query == "":
@@ -421,37 +576,20 @@ def download(element, query="", force=False):
             )
             continue
 
-        create_payload = post(
-            "/v1/api/torrents/createtorrent",
-            data={
-                "magnet": magnet,
-                "add_only_if_cached": "true",
-                "as_queued": "false",
-            },
-            context=context,
+        release_hash = str(getattr(release, "hash", "")).lower()
+        torrent = existing(release_hash)
+        reused = torrent is not None and _fetch_release_links(
+            release, torrent.id, context=context
         )
-        if not _is_success(create_payload):
-            ui_print(
-                "[torbox] failed to create torrent for release: " + str(release.title),
-                debug=ui_settings.debug,
-            )
-            continue
-
-        torrent_id = _extract_torrent_id(create_payload)
-        if torrent_id is None:
-            ui_print(
-                "[torbox] failed to determine torrent_id for release: "
-                + str(release.title),
-                debug=ui_settings.debug,
-            )
-            continue
-
-        if not _fetch_release_links(release, torrent_id, context=context):
+        if reused:
             ui_print(
-                "[torbox] no downloadable links available for release: "
-                + str(release.title),
+                "[torbox] reusing torrent of the account: " + str(torrent.id),
                 debug=ui_settings.debug,
             )
+        elif torrent is not None:
+            # deleted since the account was listed
+            index().drop(release_hash)
+        if not (reused or _add_torrent(release, magnet, context)):
             continue
 
         release.size = 0
@@ -9,6 +9,7 @@ import time
 import regex
 import requests
 
+import features
 from ui.ui_print import ui_print
 
 # Download settings - use environment variable if available, otherwise default to E:\Media
@@ -225,63 +226,17 @@ def download_file(url, filename, is_show=False, expected_size=None, element=None
 
 def parse_filename(filename):
     """Parse filename to extract metadata"""
-    # Check if it's a TV show or movie
-    is_show = bool(regex.search(r"S[0-9]+E[0-9]+", filename, regex.I))
-
-    info = {
-        "is_show": is_show,
-        "title": "",
-        "year": "",
-        "season": "",
-        "episode": "",
-        "quality": "",
+    parsed = features.parse(filename)
+    return {
+        "is_show": parsed.is_show,
+        "title": parsed.name,
+        "year": parsed.year,
+        "season": parsed.season,
+        "episode": parsed.episode,
+        "quality": parsed.quality,
         "size": 0,
     }
 
-    # Extract year
-    year_match = regex.search(r"(19|20)\d{2}", filename)
-    if year_match:
-        info["year"] = year_match.group()
-
-    # Extract season and episode for shows
-    if is_show:
-        se_match = regex.search(r"S(\d+)E(\d+)", filename, regex.I)
-        if se_match:
-            info["season"] = se_match.group(1).zfill(2)
-            info["episode"] = se_match.group(2).zfill(2)
-
-        # Extract show title (everything before season/episode)
-        title_match = regex.search(r"^(.+?)[\.\s]+S\d+E\d+", filename, regex.I)
-        if title_match:
-            info["title"] = (
-                title_match.group(1).replace(".", " ").replace("_", " ").strip()
-            )
-    else:
-        # Extract movie title (everything before year or quality markers)
-        title_match = regex.search(r"^(.+?)[\.\s]+(19|20)\d{2}", filename)
-        if title_match:
-            info["title"] = (
-                title_match.group(1).replace(".", " ").replace("_", " ").strip()
-            )
-        else:
-            # Fallback: extract before quality markers
-            title_match = regex.search(
-                r"^(.+?)[\.\s]+(720p|1080p|2160p|4K)", filename, regex.I
-            )
-            if title_match:
-                info["title"] = (
-                    title_match.group(1).replace(".", " ").replace("_", " ").strip()
-                )
-
-    # Extract quality
-    quality_match = regex.search(r"(2160p|4K|1080p|720p|480p)", filename, regex.I)
-    if quality_match:
-        info["quality"] = quality_match.group(1).upper()
-        if info["quality"] == "2160P":
-            info["quality"] = "4K"
-
-    return info
-
 
 def get_quality_score(quality_str):
     """Convert quality string to numerical score for comparison"""
@@ -335,8 +290,6 @@ def is_video_file(filename):
 
     # Handle extensionless filenames from HTTP sources (e.g., AIOStreams)
     # Check for quality indicators (1080p, 720p, 4K, 2160p, etc.)
-    import regex
-
     if regex.search(
         r"(2160p|4K|1080p|720p|480p|BluRay|WEB-?DL|HDTV|WEBRip)", filename, regex.I
     ):
@@ -507,6 +460,21 @@ def organize_path(filename, is_show=False, element=None):
         return os.path.join(dest_dir, filename)
 
 
+def file_url(release, file):
+    """
+    The download URL of a file of a release, waiting for it if it is still being
+    unrestricted (see base.ordered_map). None if there is none.
+    """
+    if file.get("url"):
+        return file["url"]
+    if file.get("link") is not None:
+        return release.download[file["link"]]
+    if len(release.download) > 0:
+        # Use the first download link if URL not specified
+        return release.download[0]
+    return None
+
+
 def download_from_realdebrid(release, element):
     """
     Download files from a Real-Debrid release
@@ -547,15 +515,21 @@ def download_from_realdebrid(release, element):
         if not files_to_download and release.download:
             # Fallback: use actual filenames from RD or release title
             filenames = getattr(release, "filenames", [])
-            for i, link in enumerate(release.download):
+            # the links may still be unrestricted, they are only waited for when their
+            # file is downloaded or its name comes from its link
+            for i in range(len(release.download)):
                 # Use actual filename from RD if available, otherwise fall back to release title
                 filename = filenames[i] if i < len(filenames) else release.title
+                if filename is None and release.download[i] is not None:
+                    filename = filenames[i]
+                filename = filename or release.title
                 files_to_download.append(
                     {
                         "name": filename,
                         "size": getattr(release, "size", 0) * 1000000000,
                         "id": i,
-                        "url": link,
+                        "url": None,
+                        "link": i,
                     }
                 )
 
@@ -592,14 +566,20 @@ def download_from_realdebrid(release, element):
 
             # Download all selected files
             all_success = True
+            skipped = 0
             for file in files_to_download_final:
                 # Get download URL
-                if file.get("url"):
-                    download_url = file["url"]
-                elif len(release.download) > 0:
-                    # Use the first download link if URL not specified
-                    download_url = release.download[0]
-                else:
+                download_url = file_url(release, file)
+                if not download_url and file.get("link") is not None:
+                    # its link could not be unrestricted, the other files are kept
+                    ui_print(
+                        "[downloader] skipping file without a download link: "
+                        + str(file["name"]),
+                        debug="true",
+                    )
+                    skipped += 1
+                    continue
+                if not download_url:
                     ui_print("[downloader] No download URL available", debug="true")
                     all_success = False
                     continue
@@ -616,10 +596,18 @@ def download_from_realdebrid(release, element):
                 if result is None:
                     all_success = False
 
-            return all_success
+            return all_success and skipped < len(files_to_download_final)
         else:
             # For movies: select and download only the best file
             best_file = select_best_file(files_to_download)
+            # the next best file, if the link of the best one could not be unrestricted
+            while (
+                best_file
+                and best_file.get("link") is not None
+                and not file_url(release, best_file)
+            ):
+                files_to_download.remove(best_file)
+                best_file = select_best_file(files_to_download)
 
             if not best_file:
                 ui_print(
@@ -628,12 +616,8 @@ def download_from_realdebrid(release, element):
                 return False
 
             # Get download URL
-            if best_file["url"]:
-                download_url = best_file["url"]
-            elif len(release.download) > 0:
-                # Use the first download link if URL not specified
-                download_url = release.download[0]
-            else:
+            download_url = file_url(release, best_file)
+            if not download_url:
                 ui_print("[downloader] No download URL available", debug="true")
                 return False
 
@@ -0,0 +1,207 @@
+"""Release title features, parsed once per title.
+
+Release titles (and file names) are parsed by the release model, the frontend
+serializer, the downloader and the anime filters. parse() reads everything they
+need from a title in one go and keeps the result in an LRU cache keyed by the
+title, so the same title is only parsed once across scrape cycles.
+"""
+
+import functools
+from typing import NamedTuple
+
+import regex
+
+# number of titles to keep parsed
+cache_size = 8192
+
+resolution_pattern = regex.compile(r"(2160|1080|720|480)(?=p)", regex.I)
+quality_pattern = regex.compile(r"(2160p|4K|1080p|720p|480p)", regex.I)
+year_pattern = regex.compile(r"(19|20)\d{2}")
+episode_pattern = regex.compile(r"S(\d+)E(\d+)", regex.I)
+show_name_pattern = regex.compile(r"^(.+?)[\.\s]+S\d+E\d+", regex.I)
+movie_name_pattern = regex.compile(r"^(.+?)[\.\s]+(19|20)\d{2}")
+quality_name_pattern = regex.compile(r"^(.+?)[\.\s]+(720p|1080p|2160p|4K)", regex.I)
+seasons_pattern = regex.compile(
+    r"(?<![A-Z0-9])S(\d{1,2})(?:[\.\s_-]*(?:S|-)(\d{1,2}))?(?![0-9])", regex.I
+)
+episodes_pattern = regex.compile(
+    r"(?<=[0-9])E(\d{1,4})(?:[\.\s_-]*(?:E|-)(\d{1,4}))?(?![0-9])", regex.I
+)
+group_pattern = regex.compile(
+    r"-([A-Za-z0-9]{2,15})(?:\s*(?:\[|\(|\.(?:mkv|mp4|avi|ts))|$)"
+)
+uncensored_pattern = regex.compile(r"(?i)\buncensored\b")
+
+# (pattern, label) pairs, matched against the upper case title
+encodes = [
+    (r"\bREMUX\b", "REMUX"),
+    (r"\bBLU-?RAY\b", "BluRay"),
+    (r"\bWEB-?DL\b", "WEB-DL"),
+    (r"\bWEBRIP\b", "WEBRip"),
+    (r"\bHDTV\b", "HDTV"),
+    (r"\bBDRIP\b", "BDRip"),
+    (r"\bDVDRIP\b", "DVDRip"),
+    (r"\bWEB\b", "WEB"),
+]
+codecs = [
+    (r"\bAV1\b", "AV1"),
+    (r"\bHEVC\b|\bH\.?265\b|\bX\.?265\b", "H.265"),
+    (r"\bAVC\b|\bH\.?264\b|\bX\.?264\b", "H.264"),
+    (r"\bVC-?1\b", "VC-1"),
+]
+hdr_tags = [
+    (r"\bHDR10\+\b|\bHDR10PLUS\b", "HDR10+"),
+    (r"\bDOLBY.?VISION\b|\bDOVI\b", "DV"),
+    (r"\bHDR10\b", "HDR10"),
+    (r"\bHDR\b", "HDR"),
+    (r"\bHLG\b", "HLG"),
+]
+audio_codecs = [
+    (r"\bTRUEHD.ATMOS\b|\bATMOS.TRUEHD\b", "TrueHD Atmos"),
+    (r"\bATMOS\b", "Atmos"),
+    (r"\bTRUEHD\b", "TrueHD"),
+    (r"\bDTS-HD\.?MA\b", "DTS-HD MA"),
+    (r"\bDTS-?X\b|\bDTSX\b", "DTS:X"),
+    (r"\bDTS-HD\b", "DTS-HD"),
+    (r"\bDTS\b", "DTS"),
+    (r"\bEAC-?3\b|\bDD\+\b|\bDDP\b", "EAC3"),
+    (r"\bAC-?3\b", "AC3"),
+    (r"\bFLAC\b", "FLAC"),
+    (r"\bAAC\b", "AAC"),
+    (r"\bOPUS\b", "Opus"),
+    (r"\bMP3\b", "MP3"),
+]
+channels = [
+    (r"\b7\.1\.\d\b", "7.1.x"),
+    (r"\b5\.1\.\d\b", "5.1.x"),
+    (r"\b7\.1\b", "7.1"),
+    (r"\b5\.1\b", "5.1"),
+    (r"\b2\.0\b", "2.0"),
+    (r"\bSTEREO\b", "Stereo"),
+    (r"\bMONO\b", "Mono"),
+]
+encodes = [(regex.compile(pattern), label) for pattern, label in encodes]
+codecs = [(regex.compile(pattern), label) for pattern, label in codecs]
+hdr_tags = [(regex.compile(pattern), label) for pattern, label in hdr_tags]
+audio_codecs = [(regex.compile(pattern), label) for pattern, label in audio_codecs]
+channels = [(regex.compile(pattern), label) for pattern, label in channels]
+
+
+class record(NamedTuple):
+    # everything parsed from a title. Records are shared by all releases with the
+    # same title and must not be changed.
+    title: str
+    # release.resolution: "2160", "1080", "720", "480" or "0"
+    resolution: str
+    # downloader quality: "4K", "1080P", "720P", "480P" or ""
+    quality: str
+    encode: str
+    codec: str
+    hdr_tags: tuple
+    audio: str
+    channels: str
+    group: str
+    year: str
+    # the first SxxEyy tag, zero padded like the downloader names files
+    is_show: bool
+    season: str
+    episode: str
+    # the show or movie name in front of the SxxEyy tag or year
+    name: str
+    # all season and episode numbers, ranges like S01-S03 or E01-E05 expanded
+    seasons: tuple
+    episodes: tuple
+    uncensored: bool
+    # set by parse() for the given dub/hardsub patterns
+    dub: bool = False
+    hardsub: bool = False
+
+
+def first(labels, title):
+    for pattern, label in labels:
+        if pattern.search(title):
+            return label
+    return ""
+
+
+def numbers(pattern, title):
+    found = []
+    for match in pattern.finditer(title):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else start
+        if end < start or end - start > 100:
+            end = start
+        for number in range(start, end + 1):
+            if number not in found:
+                found += [number]
+    return tuple(found)
+
+
+def name(title, is_show):
+    if is_show:
+        match = show_name_pattern.search(title)
+    else:
+        match = movie_name_pattern.search(title) or quality_name_pattern.search(title)
+    if match:
+        return match.group(1).replace(".", " ").replace("_", " ").strip()
+    return ""
+
+
+@functools.lru_cache(maxsize=cache_size)
+def parse_title(title: str):
+    # the pattern independent features of a title
+    upper = title.upper()
+    match = resolution_pattern.search(title)
+    resolution = match.group(1) if match else "0"
+    match = quality_pattern.search(title)
+    quality = ""
+    if match:
+        quality = match.group(1).upper()
+        if quality == "2160P":
+            quality = "4K"
+    match = year_pattern.search(title)
+    year = match.group() if match else ""
+    match = episode_pattern.search(title)
+    season = match.group(1).zfill(2) if match else ""
+    episode = match.group(2).zfill(2) if match else ""
+    match = group_pattern.search(title)
+    group = match.group(1) if match else ""
+    return record(
+        title=title,
+        resolution=resolution,
+        quality=quality,
+        encode=first(encodes, upper),
+        codec=first(codecs, upper),
+        hdr_tags=tuple(label for pattern, label in hdr_tags if pattern.search(upper)),
+        audio=first(audio_codecs, upper),
+        channels=first(channels, upper),
+        group=group,
+        year=year,
+        is_show=bool(season),
+        season=season,
+        episode=episode,
+        name=name(title, bool(season)),
+        seasons=numbers(seasons_pattern, title),
+        episodes=numbers(episodes_pattern, title),
+        uncensored=bool(uncensored_pattern.search(title)),
+    )
+
+
+@functools.lru_cache(maxsize=cache_size)
+def parse(title: str, dub_pattern: str = "", hardsub_pattern: str = ""):
+    # the features of a title, with the dub/hardsub flags for the given patterns
+    parsed = parse_title(str(title))
+    if not dub_pattern and not hardsub_pattern:
+        return parsed
+    from releases import compile_pattern
+
+    return parsed._replace(
+        dub=bool(dub_pattern)
+        and bool(compile_pattern(dub_pattern, regex.I).search(parsed.title)),
+        hardsub=bool(hardsub_pattern)
+        and bool(compile_pattern(hardsub_pattern, regex.I).search(parsed.title)),
+    )
+
+
+def cache_info():
+    return {"titles": parse_title.cache_info(), "flags": parse.cache_info()}
@@ -44,26 +44,27 @@ def _normalize_cached_via(cached_value):
     return []
 
 
+def _other_season_pattern(season_number):
+    """Compile one pattern matching any season from 1 to 29 except this one."""
+    import releases as releases_mod
+
+    others = "|".join(str(other) for other in range(1, 30) if other != season_number)
+    return releases_mod.compile_pattern(
+        rf"(?<![0-9])(S0?(?:{others})\b|season[ .]?0?(?:{others})\b|TV-0?(?:{others})\b)",
+        regex.I,
+    )
+
+
 def _filter_releases_for_season(releases, season_number):
     """Remove releases whose titles explicitly mention a different season."""
     if season_number is None:
         return releases
 
+    pattern = _other_season_pattern(season_number)
     filtered = []
     for release in releases:
         title = str(getattr(release, "title", ""))
-        has_other_season = False
-        for other in range(1, 30):
-            if other == season_number:
-                continue
-            if regex.search(
-                rf"(?<![0-9])(S0?{other}\b|season[ .]?0?{other}\b|TV-0?{other}\b)",
-                title,
-                regex.I,
-            ):
-                has_other_season = True
-                break
-        if not has_other_season:
+        if not pattern.search(title):
             filtered.append(release)
     return filtered
 
@@ -169,20 +170,10 @@ def _run_scrape_job(
 
         if media_obj.isanime():
             if releases_mod.sort.anime_dub_filter == "true":
-                media_obj.Releases = [
-                    r
-                    for r in media_obj.Releases
-                    if regex.search(
-                        releases_mod.sort.anime_dub_pattern, r.title, regex.I
-                    )
-                ]
+                media_obj.Releases = [r for r in media_obj.Releases if r.features.dub]
             if releases_mod.sort.anime_hardsub_exclude == "true":
                 media_obj.Releases = [
-                    r
-                    for r in media_obj.Releases
-                    if not regex.search(
-                        releases_mod.sort.anime_hardsub_pattern, r.title, regex.I
-                    )
+                    r for r in media_obj.Releases if not r.features.hardsub
                 ]
             groups = [
                 g.strip()
@@ -190,14 +181,16 @@ def _run_scrape_job(
                 if g.strip()
             ]
             if groups:
-                group_pattern = "|".join(regex.escape(g) for g in groups)
+                group_pattern = releases_mod.compile_pattern(
+                    "|".join(regex.escape(g) for g in groups), regex.I
+                )
                 media_obj.Releases.sort(
-                    key=lambda r: bool(regex.search(group_pattern, r.title, regex.I)),
+                    key=lambda r: bool(group_pattern.search(r.title)),
                     reverse=True,
                 )
             if releases_mod.sort.anime_uncensored_prefer == "true":
                 media_obj.Releases.sort(
-                    key=lambda r: bool(regex.search(r"(?i)\buncensored\b", r.title)),
+                    key=lambda r: r.features.uncensored,
                     reverse=True,
                 )
 
@@ -648,6 +641,43 @@ def download_scrape_release(job_id):
         return _json_error("Download failed", 500, job_id=job_id)
 
 
+@app.route("/api/scrape-cache", methods=["DELETE"])
+def clear_scrape_cache():
+    source = (request.args.get("scraper") or "").strip() or None
+    try:
+        from scraper import cache
+
+        removed = cache.clear(source)
+        _log_frontend(
+            f"cleared {removed} cached scrape responses"
+            + (f" of {source}" if source else "")
+        )
+        return jsonify(
+            {"status": "cleared", "error": None, "scraper": source, "removed": removed}
+        )
+    except Exception as e:
+        _log_frontend(f"failed to clear the scrape cache: {str(e)}")
+        return _json_error("Failed to clear the scrape cache", 500, scraper=source)
+
+
+@app.route("/api/scrapers/health", methods=["GET"])
+def get_scraper_health():
+    try:
+        from scraper import health
+
+        return jsonify(
+            {
+                "status": "ok",
+                "error": None,
+                "scrapers": health.report(),
+                "hosts": health.breakers(),
+            }
+        )
+    except Exception as e:
+        _log_frontend(f"failed to read the scraper health: {str(e)}")
+        return _json_error("Failed to read the scraper health", 500)
+
+
 def start_frontend():
     """Start the log viewer in the current thread (use as a daemon thread target)."""
     port = int(os.environ.get("FRONTEND_PORT", "7654"))
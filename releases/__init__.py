@@ -1,11 +1,16 @@
+import bisect
 import copy
 import datetime
 import hashlib
+import threading
 import time
+from array import array
+from collections import OrderedDict
 
 import regex
 import six
 
+import features
 from base import lan_ctr
 from ui import ui_settings
 from ui.ui_print import ui_cls, ui_print
@@ -13,6 +18,79 @@ from ui.ui_print import ui_cls, ui_print
 # Cache last printed sort and releases to avoid duplicate logging when functions are called multiple times in quick succession
 _last_sort_print: dict[str, float] = {}
 _last_releases_print: dict[str, float | None] = {"fingerprint": None, "time": 0.0}
+# Compiled versions, keyed by their rule definitions (see sort.compile)
+_compiled_versions: dict = {}
+# Compiled regex patterns shared by the releases, content.classes and frontend
+# modules, keyed by pattern and flags (see compile_pattern)
+_patterns: OrderedDict = OrderedDict()
+_patterns_lock = threading.Lock()
+_patterns_stats = {"hits": 0, "misses": 0}
+pattern_cache_size = 512
+
+
+def compile_pattern(pattern, flags=0):
+    # returns the compiled pattern from a bounded cache. when the cache is full, the
+    # least recently used pattern is dropped.
+    key = (pattern, flags)
+    with _patterns_lock:
+        compiled = _patterns.get(key)
+        if compiled is not None:
+            _patterns.move_to_end(key)
+            _patterns_stats["hits"] += 1
+            return compiled
+        _patterns_stats["misses"] += 1
+    compiled = regex.compile(pattern, flags)
+    with _patterns_lock:
+        _patterns[key] = compiled
+        while len(_patterns) > pattern_cache_size:
+            _patterns.popitem(last=False)
+    return compiled
+
+
+def pattern_cache_info():
+    with _patterns_lock:
+        return {
+            "hits": _patterns_stats["hits"],
+            "misses": _patterns_stats["misses"],
+            "size": len(_patterns),
+            "max_size": pattern_cache_size,
+        }
+
+
+# Fixed patterns, compiled once at import
+btih_pattern = compile_pattern(r"(?<=btih:).*?(?=&)", regex.I)
+quality_pattern = compile_pattern(r"(2160|1080|720|480)(?=p|i)", regex.I)
+video_formats_pattern = compile_pattern(
+    r"(\.)(YUV|WMV|WEBM|VOB|VIV|SVI|ROQ|RMVB|RM|OGV|OGG|NSV|MXF|MTS|M2TS|TS|MPG|MPEG|M2V|MP2|MPE|MPV|MP4|M4P|M4V|MOV|QT|MNG|MKV|FLV|DRC|AVI|ASF|AMV)",
+    regex.I,
+)
+dots_pattern = compile_pattern(r"\.+")
+
+
+# Marks fields that are not set (see release.clone)
+_unset = object()
+
+
+def materialize(item):
+    # a private copy of a shared release, see release.clone
+    if isinstance(item, release):
+        return item.clone()
+    return copy.deepcopy(item)
+
+
+def clone(scraped_releases: list):
+    # copies of a list of releases, see release.clone
+    return [materialize(item) for item in scraped_releases]
+
+
+def view(scraped_releases: list, version):
+    # The releases to sort for a version. Sorting only reorders and removes
+    # releases, so all versions can share the same release objects and only the
+    # release that is handed to a debrid service gets copied (see debrid.download).
+    # Rules that change the releases themselves (file names/sizes) get copies.
+    if sort.compile(version).mutates:
+        return clone(scraped_releases)
+    return list(scraped_releases)
 
 
 def strike(text):
@@ -30,7 +108,39 @@ def unstrike(text):
 
 
 class release:
-    # Define release attributes
+    # Define release attributes. Releases are created by the thousand for every scrape,
+    # so they are kept in slots. The optional fields are only set by some steps
+    # (bitrate calculation, debrid downloads, sorting and printing) and stay unset
+    # until then, so hasattr/getattr callers see them as missing as before. Any other
+    # attribute (e.g. when the manual scraper uses a release as the media element)
+    # still ends up in __dict__.
+    fields = (
+        "source",
+        "type",
+        "title",
+        "files",
+        "size",
+        "download",
+        "hash",
+        "cached",
+        "checked",
+        "wanted",
+        "unwanted",
+        "seeders",
+        "resolution",
+        # optional
+        "bitrate",
+        "filenames",
+        "file_name_sorting",
+        "file_size_sorting",
+        "printsize",
+        "printbit",
+        "file",
+    )
+    __slots__ = fields + ("__dict__",)
+    # the fields clone() copies instead of sharing
+    mutable = ("cached", "files", "download")
+
     def __init__(self, source, type, title, files, size, download, seeders=0):
         self.source = source
         self.type = type
@@ -40,25 +150,59 @@ class release:
         self.download = download
         self.hash = ""
         if len(self.download) > 0:
-            if regex.search(r"(?<=btih:).*?(?=&)", str(self.download[0]), regex.I):
-                self.hash = regex.findall(
-                    r"(?<=btih:).*?(?=&)", str(self.download[0]), regex.I
-                )[0]
+            match = btih_pattern.search(str(self.download[0]))
+            if match:
+                self.hash = match.group(0)
         self.cached = []
         self.checked = False
         self.wanted = 0
         self.unwanted = 0
         self.seeders = seeders
-        self.resolution = "0"
-        if regex.search(r"(2160|1080|720|480)(?=p)", str(self.title), regex.I):
-            self.resolution = regex.findall(
-                r"(2160|1080|720|480)(?=p)", str(self.title), regex.I
-            )[0]
+        self.resolution = features.parse(str(self.title)).resolution
 
     # Define when releases are Equal
     def __eq__(self, other):
         return self.title == other.title
 
+    @property
+    def features(self):
+        # the parsed title, see features.parse
+        return features.parse(
+            str(self.title), sort.anime_dub_pattern, sort.anime_hardsub_pattern
+        )
+
+    def clone(self):
+        # a copy that shares everything but the lists that get changed per copy
+        clone = object.__new__(type(self))
+        for name in release.fields:
+            value = getattr(self, name, _unset)
+            if value is _unset:
+                continue
+            if name in release.mutable:
+                value = copy.copy(value)
+            setattr(clone, name, value)
+        if self.__dict__:
+            clone.__dict__.update(copy.deepcopy(self.__dict__))
+        return clone
+
+    def __deepcopy__(self, memo):
+        clone = object.__new__(type(self))
+        memo[id(self)] = clone
+        for name in release.fields:
+            value = getattr(self, name, _unset)
+            if value is not _unset:
+                setattr(clone, name, copy.deepcopy(value, memo))
+        if self.__dict__:
+            clone.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return clone
+
+    def __setstate__(self, state):
+        # releases pickled before they had slots store a plain attribute dict
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **(state[1] or {})}
+        for name, value in state.items():
+            setattr(self, name, value)
+
 
 class rename:
     replaceChars = [
@@ -96,11 +240,12 @@ class rename:
         string = string.lower()
         for specialChar, repl in self.replaceChars:
             if specialChar.startswith("{{") and specialChar.endswith("}}"):
-                if regex.search(specialChar[2:-2].lower(), string):
-                    string = regex.sub(specialChar[2:-2].lower(), repl.lower(), string)
+                pattern = compile_pattern(specialChar[2:-2].lower())
+                if pattern.search(string):
+                    string = pattern.sub(repl.lower(), string)
             else:
                 string = string.replace(specialChar.lower(), repl.lower())
-        string = regex.sub(r"\.+", ".", string)
+        string = dots_pattern.sub(".", string)
         return string
 
 
@@ -696,6 +841,11 @@ class sort:
 
             operators = [""]
             weights = ["requirement", "preference"]
+            pattern = None
+            threshold = None
+            # whether a requirement only compares an attribute of each release, so
+            # that it can be checked together with others (see sort.compiled.mask)
+            columnar = True
 
             def __init__(self, attribute, weight, operator, value=None) -> None:
                 self.attribute = attribute
@@ -703,6 +853,104 @@ class sort:
                 self.operator = operator
                 self.value = value
 
+            def compile(self):
+                # resolve the rule value once, instead of once per compared release.
+                # invalid values are left alone so that apply() reports them as before.
+                try:
+                    if self.operator in ["include", "exclude"]:
+                        self.search("")
+                    elif ">=" in self.operator or "<=" in self.operator:
+                        self.limit()
+                except Exception:
+                    pass
+                return self
+
+            def search(self, string):
+                if self.pattern is None:
+                    self.pattern = compile_pattern(self.value, regex.I)
+                return self.pattern.search(string)
+
+            def limit(self):
+                if self.threshold is None:
+                    self.threshold = float(self.value)
+                return self.threshold
+
+            def keys(self, scraped_releases: list):
+                # the sort keys of a preference, with the sort direction folded in,
+                # so that several preferences can be merged into one sort. returns
+                # None if this rule doesn't sort the releases by a plain key.
+                if not self.weight == "preference":
+                    return None
+                attribute = self.attribute
+                if self.operator == "==":
+                    return [
+                        not getattr(s, attribute) == self.value
+                        for s in scraped_releases
+                    ]
+                if self.operator == ">=":
+                    return [
+                        not float(getattr(s, attribute)) >= self.limit()
+                        for s in scraped_releases
+                    ]
+                if self.operator == "<=":
+                    return [
+                        not float(getattr(s, attribute)) <= self.limit()
+                        for s in scraped_releases
+                    ]
+                if self.operator == "highest":
+                    return [-float(getattr(s, attribute)) for s in scraped_releases]
+                if self.operator == "lowest":
+                    return [float(getattr(s, attribute)) for s in scraped_releases]
+                if self.operator == "include":
+                    return [
+                        not bool(self.search(getattr(s, attribute)))
+                        for s in scraped_releases
+                    ]
+                if self.operator == "exclude":
+                    return [
+                        bool(self.search(getattr(s, attribute)))
+                        for s in scraped_releases
+                    ]
+                return None
+
+            def matches(self, scraped_releases: list):
+                # which releases a requirement keeps, independent of their order.
+                # returns None if this rule can't be checked this way.
+                if not self.weight == "requirement":
+                    return None
+                attribute = self.attribute
+                if self.operator == "==":
+                    return [
+                        getattr(s, attribute) == self.value for s in scraped_releases
+                    ]
+                if self.operator == ">=":
+                    return [
+                        float(getattr(s, attribute)) >= self.limit()
+                        for s in scraped_releases
+                    ]
+                if self.operator == "<=":
+                    return [
+                        float(getattr(s, attribute)) <= self.limit()
+                        for s in scraped_releases
+                    ]
+                if self.operator in ["highest", "lowest"]:
+                    values = [float(getattr(s, attribute)) for s in scraped_releases]
+                    if len(values) == 0:
+                        return []
+                    best = max(values) if self.operator == "highest" else min(values)
+                    return [value == best for value in values]
+                if self.operator == "include":
+                    return [
+                        bool(self.search(getattr(s, attribute)))
+                        for s in scraped_releases
+                    ]
+                if self.operator == "exclude":
+                    return [
+                        not bool(self.search(getattr(s, attribute)))
+                        for s in scraped_releases
+                    ]
+                return None
+
             def apply(self, scraped_releases: list):
                 try:
                     if self.weight == "requirement":
@@ -750,23 +998,13 @@ class sort:
                         if self.operator == "include":
                             for release in scraped_releases[:]:
                                 if not bool(
-                                    regex.search(
-                                        self.value,
-                                        getattr(release, self.attribute),
-                                        regex.I,
-                                    )
+                                    self.search(getattr(release, self.attribute))
                                 ):
                                     scraped_releases.remove(release)
                             return scraped_releases
                         if self.operator == "exclude":
                             for release in scraped_releases[:]:
-                                if bool(
-                                    regex.search(
-                                        self.value,
-                                        getattr(release, self.attribute),
-                                        regex.I,
-                                    )
-                                ):
+                                if bool(self.search(getattr(release, self.attribute))):
                                     scraped_releases.remove(release)
                             return scraped_releases
                     elif self.weight == "preference":
@@ -781,8 +1019,7 @@ class sort:
                         if self.operator == ">=":
                             scraped_releases.sort(
                                 key=lambda s: (
-                                    float(getattr(s, self.attribute))
-                                    >= float(self.value)
+                                    float(getattr(s, self.attribute)) >= self.limit()
                                 ),
                                 reverse=True,
                             )
@@ -790,8 +1027,7 @@ class sort:
                         if self.operator == "<=":
                             scraped_releases.sort(
                                 key=lambda s: (
-                                    float(getattr(s, self.attribute))
-                                    <= float(self.value)
+                                    float(getattr(s, self.attribute)) <= self.limit()
                                 ),
                                 reverse=True,
                             )
@@ -811,9 +1047,7 @@ class sort:
                         if self.operator == "include":
                             scraped_releases.sort(
                                 key=lambda s: bool(
-                                    regex.search(
-                                        self.value, getattr(s, self.attribute), regex.I
-                                    )
+                                    self.search(getattr(s, self.attribute))
                                 ),
                                 reverse=True,
                             )
@@ -821,9 +1055,7 @@ class sort:
                         if self.operator == "exclude":
                             scraped_releases.sort(
                                 key=lambda s: bool(
-                                    regex.search(
-                                        self.value, getattr(s, self.attribute), regex.I
-                                    )
+                                    self.search(getattr(s, self.attribute))
                                 ),
                                 reverse=False,
                             )
@@ -895,6 +1127,42 @@ class sort:
             operators = ["==", ">=", "<=", "highest", "lowest"]
             unit = "GB"
 
+            def keys(self, scraped_releases: list):
+                if self.weight == "preference" and self.operator == "highest":
+                    return [
+                        -5 * round(float(getattr(s, self.attribute)) / 5)
+                        for s in scraped_releases
+                    ]
+                if self.weight == "preference" and self.operator == "lowest":
+                    return [
+                        5 * round(float(getattr(s, self.attribute)) / 5)
+                        for s in scraped_releases
+                    ]
+                return super().keys(scraped_releases)
+
+            def matches(self, scraped_releases: list):
+                if self.weight == "requirement" and self.operator in [
+                    "highest",
+                    "lowest",
+                ]:
+                    values = [
+                        5 * round(float(getattr(s, self.attribute)) / 5)
+                        for s in scraped_releases
+                    ]
+                    if len(values) == 0:
+                        return []
+                    if self.operator == "highest":
+                        best = max(values)
+                        # apply() divides the raw value of the first largest release
+                        # before converting it, fail if that could fail.
+                        for value, s in zip(values, scraped_releases):
+                            if value == best:
+                                float(getattr(s, self.attribute) / 5)
+                    else:
+                        best = min(values)
+                    return [value == best for value in values]
+                return super().matches(scraped_releases)
+
             def apply(self, scraped_releases: list):
                 try:
                     if self.weight == "requirement":
@@ -960,8 +1228,7 @@ class sort:
                         if self.operator == ">=":
                             scraped_releases.sort(
                                 key=lambda s: (
-                                    float(getattr(s, self.attribute))
-                                    >= float(self.value)
+                                    float(getattr(s, self.attribute)) >= self.limit()
                                 ),
                                 reverse=True,
                             )
@@ -969,8 +1236,7 @@ class sort:
                         if self.operator == "<=":
                             scraped_releases.sort(
                                 key=lambda s: (
-                                    float(getattr(s, self.attribute))
-                                    <= float(self.value)
+                                    float(getattr(s, self.attribute)) <= self.limit()
                                 ),
                                 reverse=True,
                             )
@@ -1117,6 +1383,15 @@ class sort:
         class file_names(rule):
             name = "file names"
             operators = ["include", "exclude"]
+            columnar = False
+
+            def keys(self, scraped_releases: list):
+                # this rule also sorts and removes the files of each release, it is
+                # always applied on its own.
+                return None
+
+            def matches(self, scraped_releases: list):
+                return None
 
             def apply(self, scraped_releases: list):
                 try:
@@ -1130,20 +1405,12 @@ class sort:
                                     continue
                                 for version in release.files[:]:
                                     if hasattr(version, "name"):
-                                        if bool(
-                                            regex.search(
-                                                self.value, version.name, regex.I
-                                            )
-                                        ):
+                                        if bool(self.search(version.name)):
                                             remove = False
                                     elif hasattr(version, "files"):
                                         remove_version = True
                                         for file in version.files:
-                                            if bool(
-                                                regex.search(
-                                                    self.value, file.name, regex.I
-                                                )
-                                            ):
+                                            if bool(self.search(file.name)):
                                                 remove = False
                                                 remove_version = False
                                         if remove_version:
@@ -1160,20 +1427,12 @@ class sort:
                                     continue
                                 for version in release.files[:]:
                                     if hasattr(version, "name"):
-                                        if bool(
-                                            regex.search(
-                                                self.value, version.name, regex.I
-                                            )
-                                        ):
+                                        if bool(self.search(version.name)):
                                             remove = True
                                     elif hasattr(version, "files"):
                                         remove_version = False
                                         for file in version.files:
-                                            if bool(
-                                                regex.search(
-                                                    self.value, file.name, regex.I
-                                                )
-                                            ):
+                                            if bool(self.search(file.name)):
                                                 remove = True
                                                 remove_version = True
                                         if remove_version:
@@ -1190,19 +1449,11 @@ class sort:
                                 for version in release.files:
                                     version.file_name_sorting = 0
                                     if hasattr(version, "name"):
-                                        if bool(
-                                            regex.search(
-                                                self.value, version.name, regex.I
-                                            )
-                                        ):
+                                        if bool(self.search(version.name)):
                                             release.file_name_sorting = 1
                                     elif hasattr(version, "files"):
                                         for file in version.files:
-                                            if bool(
-                                                regex.search(
-                                                    self.value, file.name, regex.I
-                                                )
-                                            ):
+                                            if bool(self.search(file.name)):
                                                 release.file_name_sorting = 1
                                                 version.file_name_sorting = 1
                                 release.files.sort(
@@ -1220,19 +1471,11 @@ class sort:
                                 for version in release.files:
                                     version.file_name_sorting = 1
                                     if hasattr(version, "name"):
-                                        if bool(
-                                            regex.search(
-                                                self.value, version.name, regex.I
-                                            )
-                                        ):
+                                        if bool(self.search(version.name)):
                                             release.file_name_sorting = 0
                                     elif hasattr(version, "files"):
                                         for file in version.files:
-                                            if bool(
-                                                regex.search(
-                                                    self.value, file.name, regex.I
-                                                )
-                                            ):
+                                            if bool(self.search(file.name)):
                                                 release.file_name_sorting = 0
                                                 version.file_name_sorting = 0
                                 release.files.sort(
@@ -1277,9 +1520,16 @@ class sort:
                 "video files <=",
             ]
             unit = "GB"
+            columnar = False
+
+            def keys(self, scraped_releases: list):
+                # applied on its own, like file names
+                return None
+
+            def matches(self, scraped_releases: list):
+                return None
 
             def apply(self, scraped_releases: list):
-                video_formats = "(\.)(YUV|WMV|WEBM|VOB|VIV|SVI|ROQ|RMVB|RM|OGV|OGG|NSV|MXF|MTS|M2TS|TS|MPG|MPEG|M2V|MP2|MPE|MPV|MP4|M4P|M4V|MOV|QT|MNG|MKV|FLV|DRC|AVI|ASF|AMV)"
                 try:
                     if self.weight == "requirement":
                         if ">=" in self.operator:
@@ -1293,22 +1543,22 @@ class sort:
                                     if hasattr(version, "name"):
                                         if self.operator.startswith(
                                             "video"
-                                        ) and not regex.search(
-                                            video_formats, version.name, regex.I
+                                        ) and not video_formats_pattern.search(
+                                            version.name
                                         ):
                                             continue
-                                        if version.size <= float(self.value):
+                                        if version.size <= self.limit():
                                             remove = True
                                     elif hasattr(version, "files"):
                                         remove_version = False
                                         for file in version.files:
                                             if self.operator.startswith(
                                                 "video"
-                                            ) and not regex.search(
-                                                video_formats, file.name, regex.I
+                                            ) and not video_formats_pattern.search(
+                                                file.name
                                             ):
                                                 continue
-                                            if file.size <= float(self.value):
+                                            if file.size <= self.limit():
                                                 remove = False
                                                 remove_version = True
                                         if remove_version:
@@ -1327,22 +1577,22 @@ class sort:
                                     if hasattr(version, "name"):
                                         if self.operator.startswith(
                                             "video"
-                                        ) and not regex.search(
-                                            video_formats, version.name, regex.I
+                                        ) and not video_formats_pattern.search(
+                                            version.name
                                         ):
                                             continue
-                                        if version.size >= float(self.value):
+                                        if version.size >= self.limit():
                                             remove = True
                                     elif hasattr(version, "files"):
                                         remove_version = False
                                         for file in version.files:
                                             if self.operator.startswith(
                                                 "video"
-                                            ) and not regex.search(
-                                                video_formats, file.name, regex.I
+                                            ) and not video_formats_pattern.search(
+                                                file.name
                                             ):
                                                 continue
-                                            if file.size >= float(self.value):
+                                            if file.size >= self.limit():
                                                 remove = False
                                                 remove_version = True
                                         if remove_version:
@@ -1361,21 +1611,21 @@ class sort:
                                     if hasattr(version, "name"):
                                         if self.operator.startswith(
                                             "video"
-                                        ) and not regex.search(
-                                            video_formats, version.name, regex.I
+                                        ) and not video_formats_pattern.search(
+                                            version.name
                                         ):
                                             continue
-                                        if version.size >= float(self.value):
+                                        if version.size >= self.limit():
                                             release.file_size_sorting = 1
                                     elif hasattr(version, "files"):
                                         for file in version.files:
                                             if self.operator.startswith(
                                                 "video"
-                                            ) and not regex.search(
-                                                video_formats, file.name, regex.I
+                                            ) and not video_formats_pattern.search(
+                                                file.name
                                             ):
                                                 continue
-                                            if file.size >= float(self.value):
+                                            if file.size >= self.limit():
                                                 release.file_size_sorting = 1
                                                 version.file_size_sorting = 1
                                 release.files.sort(
@@ -1395,21 +1645,21 @@ class sort:
                                     if hasattr(version, "name"):
                                         if self.operator.startswith(
                                             "video"
-                                        ) and not regex.search(
-                                            video_formats, version.name, regex.I
+                                        ) and not video_formats_pattern.search(
+                                            version.name
                                         ):
                                             continue
-                                        if version.size <= float(self.value):
+                                        if version.size <= self.limit():
                                             release.file_size_sorting = 1
                                     elif hasattr(version, "files"):
                                         for file in version.files:
                                             if self.operator.startswith(
                                                 "video"
-                                            ) and not regex.search(
-                                                video_formats, file.name, regex.I
+                                            ) and not video_formats_pattern.search(
+                                                file.name
                                             ):
                                                 continue
-                                            if file.size <= float(self.value):
+                                            if file.size <= self.limit():
                                                 release.file_size_sorting = 1
                                                 version.file_size_sorting = 1
                                 release.files.sort(
@@ -1937,6 +2187,12 @@ class sort:
     anime_hardsub_pattern = r"(?i)(\bHardSub(bed|s)?\b|Hard[.\-_\s]?[Cc]oded|\[HS\])"
     anime_preferred_groups = ""
     anime_uncensored_prefer = "false"
+    # "composite" merges the preferences of a version into one sort, "sequential"
+    # sorts the releases once per preference
+    ranking = "composite"
+    # "lazy" lets media.debrid_download take the releases of a version best first
+    # without sorting all of them (see candidates), "full" always sorts them
+    selection = "lazy"
     versions = [
         [
             "1080p SDR",
@@ -1975,50 +2231,457 @@ class sort:
         version.rule("unwanted", "preference", "lowest", ""),
     ]
 
-    def __new__(self, scraped_releases: list, version: version, doprint=True):
-        if len(scraped_releases) > 0:
+    class compiled:
+        # A version's rules resolved into rule objects once, in the order in which
+        # they are applied: always-on rules first, then the version rules from last
+        # to first. Rules that can't be resolved are kept as None and reported when
+        # the version is applied.
+        def __init__(self, rules) -> None:
+            names = {}
+            for subrule in sort.version.rule.__subclasses__():
+                names[subrule.name] = subrule  # type: ignore[attr-defined]
+            self.steps: list = []
             for rule in reversed(sort.always_on_rules):
-                rule.apply(scraped_releases)
-            for rule in reversed(version.rules):
-                for subrule in sort.version.rule.__subclasses__():
-                    if subrule.name == rule[0]:  # type: ignore[index,attr-defined]
-                        rule = subrule(rule[0], rule[1], rule[2], rule[3])  # type: ignore[index]
-                        break
+                self.steps += [rule.compile()]
+            for rule in reversed(rules):
+                step = None
                 try:
-                    scraped_releases = rule.apply(scraped_releases)
+                    if rule[0] in names:
+                        step = names[rule[0]](rule[0], rule[1], rule[2], rule[3])
+                        step.compile()
                 except Exception:
+                    step = None
+                self.steps += [step]
+            # True if a rule changes the releases it sorts, see view()
+            self.mutates = any(
+                step is not None and not step.columnar for step in self.steps
+            )
+            # True if the releases can be ordered by keys per release, see
+            # candidates and ranked. rules with another weight (e.g. upgrade) don't
+            # change the order.
+            self.keyed = all(
+                step is not None
+                and step.columnar
+                and not (
+                    step.weight == "requirement"
+                    and step.operator in ["highest", "lowest"]
+                )
+                for step in self.steps
+            )
+
+        def apply(self, scraped_releases: list):
+            if sort.ranking == "sequential":
+                return self.sequential(scraped_releases)
+            return self.rank(scraped_releases)
+
+        def sequential(self, scraped_releases: list):
+            # every rule on its own: one list.sort per preference
+            for step in self.steps:
+                if step is None:
                     ui_print(
                         "error: there seems to be an undefined rule in your version settings. skipping this rule."
                     )
                     continue
-            if doprint:
-                # Avoid duplicate sort logs for the same version and identical release set within a short window
-                try:
-                    titles = "|".join([r.title for r in scraped_releases])
-                    key = (
-                        version.name
-                        + ":"
-                        + hashlib.md5(titles.encode("utf-8")).hexdigest()
+                scraped_releases = step.apply(scraped_releases)
+            return scraped_releases
+
+        def rank(self, scraped_releases: list):
+            # Same result as sequential(), with a single sort. Stable sorts by the
+            # keys k1, k2, ... kn order the releases like one sort by (kn, ... k1),
+            # and requirements only remove releases, so they can be checked before
+            # the releases are sorted. Rules that don't fit (or fail) are applied
+            # in place, after ordering the releases by the preferences so far.
+            columns = [[] for _ in scraped_releases]
+            batch = []
+            for step in self.steps:
+                if step is not None and step.columnar and step.weight == "requirement":
+                    if step.operator in ["==", ">=", "<=", "include", "exclude"]:
+                        batch += [step]
+                        continue
+                columns = self.filter(scraped_releases, columns, batch)
+                batch = []
+                columns = self.step(scraped_releases, columns, step)
+            columns = self.filter(scraped_releases, columns, batch)
+            sort.compiled.order(scraped_releases, columns)
+            return scraped_releases
+
+        def step(self, scraped_releases: list, columns: list, step):
+            if step is None:
+                ui_print(
+                    "error: there seems to be an undefined rule in your version settings. skipping this rule."
+                )
+                return columns
+            try:
+                keys = step.keys(scraped_releases)
+                if keys is not None:
+                    for column, key in zip(columns, keys):
+                        column.append(key)
+                    return columns
+                keep = step.matches(scraped_releases)
+                if keep is not None:
+                    if sort.compiled.independent(scraped_releases, keep):
+                        return sort.compiled.keep(scraped_releases, columns, keep)
+                    if step.operator not in ["highest", "lowest"] and all(
+                        isinstance(r, release) for r in scraped_releases
+                    ):
+                        sort.compiled.order(scraped_releases, columns)
+                        sort.compiled.remove(
+                            scraped_releases, step.matches(scraped_releases)
+                        )
+                        return [[] for _ in scraped_releases]
+            except Exception:
+                pass
+            sort.compiled.order(scraped_releases, columns)
+            step.apply(scraped_releases)
+            return [[] for _ in scraped_releases]
+
+        def filter(self, scraped_releases: list, columns: list, batch: list):
+            # a run of consecutive requirements, checked together (see mask)
+            if len(batch) == 0:
+                return columns
+            try:
+                keep = sort.compiled.mask(scraped_releases, batch)
+            except Exception:
+                keep = None
+            if keep is None:
+                for step in batch:
+                    columns = self.step(scraped_releases, columns, step)
+                return columns
+            return sort.compiled.keep(scraped_releases, columns, keep)
+
+        def mask(scraped_releases: list, batch: list):
+            # Which releases pass a run of requirements. The numeric attributes are
+            # read and converted once per run, the numeric requirements are checked
+            # first and the regex requirements only on the releases that are left.
+            # returns None if the requirements have to be applied one by one: if a
+            # value can't be converted or matched, or if releases share a title and
+            # a requirement would keep some of them (see independent).
+            count = len(scraped_releases)
+            titles = [release.title for release in scraped_releases]
+            duplicates = len(set(titles)) < count
+            numeric = [step for step in batch if step.operator in [">=", "<="]]
+            rowwise = [step for step in batch if step not in numeric]
+            values = {}
+            for step in numeric:
+                if step.attribute not in values:
+                    values[step.attribute] = array(
+                        "d",
+                        [float(getattr(r, step.attribute)) for r in scraped_releases],
                     )
-                    now = time.time()
-                    last = _last_sort_print.get(key, 0)
-                    if now - last > 1.0:
-                        ui_print(
-                            "sorting releases for version ["
-                            + version.name
-                            + "] ... done - found "
-                            + str(len(scraped_releases))
-                            + " releases"
+            for step in rowwise:
+                if duplicates and not step.attribute == "title":
+                    return None
+                if step.operator in ["include", "exclude"]:
+                    if step.pattern is None:
+                        return None
+                    for release in scraped_releases:
+                        if not isinstance(getattr(release, step.attribute), str):
+                            return None
+            keep = bytearray(b"\x01") * count
+            for step in numeric:
+                column = values[step.attribute]
+                limit = step.limit()
+                removed = set()
+                kept = set()
+                for i in range(count):
+                    if not keep[i]:
+                        continue
+                    if step.operator == ">=":
+                        passed = column[i] >= limit
+                    else:
+                        passed = column[i] <= limit
+                    if passed:
+                        kept.add(titles[i])
+                    else:
+                        removed.add(titles[i])
+                        keep[i] = 0
+                if duplicates and not removed.isdisjoint(kept):
+                    return None
+            for step in rowwise:
+                for i in range(count):
+                    if not keep[i]:
+                        continue
+                    value = getattr(scraped_releases[i], step.attribute)
+                    if step.operator == "==":
+                        passed = value == step.value
+                    elif step.operator == "include":
+                        passed = bool(step.search(value))
+                    else:
+                        passed = not bool(step.search(value))
+                    if not passed:
+                        keep[i] = 0
+            return keep
+
+        def keep(scraped_releases: list, columns: list, keep):
+            scraped_releases[:] = [
+                release for release, kept in zip(scraped_releases, keep) if kept
+            ]
+            return [column for column, kept in zip(columns, keep) if kept]
+
+        def independent(scraped_releases: list, keep: list):
+            # requirements remove releases by title (release.__eq__), i.e. the first
+            # release with that title in the sorted list. unless all releases with a
+            # title are kept or removed together, this depends on the order.
+            removed = set()
+            kept = set()
+            for release, keep_release in zip(scraped_releases, keep):
+                if keep_release:
+                    kept.add(release.title)
+                else:
+                    removed.add(release.title)
+            return removed.isdisjoint(kept)
+
+        def remove(scraped_releases: list, keep: list):
+            # what removing the failed releases one by one does: list.remove drops the
+            # first release with the same title, so the last ones of a title are kept.
+            failed: dict = {}
+            for item, kept in zip(scraped_releases, keep):
+                if not kept:
+                    failed[item.title] = failed.get(item.title, 0) + 1
+            remaining = []
+            for item in scraped_releases:
+                if failed.get(item.title, 0) > 0:
+                    failed[item.title] -= 1
+                    continue
+                remaining += [item]
+            scraped_releases[:] = remaining
+
+        def prepare(self, scraped_releases: list):
+            # The releases that pass the requirements and the keys of the
+            # preferences for compiled.best, most significant first. The rules are
+            # applied in the order of rank(): a run of requirements removes releases
+            # before the next preference is computed, and a preference is computed
+            # for the releases left at that point, so a value that can't be
+            # converted fails here when it fails there. The regex keys are computed
+            # only when they are needed. returns None if the releases can't be
+            # ranked this way (see mask).
+            kept = list(scraped_releases)
+            columns: list = []
+            batch: list = []
+            for step in self.steps + [None]:
+                if step is not None and step.weight == "requirement":
+                    batch += [step]
+                    continue
+                if len(batch) > 0:
+                    keep = sort.compiled.mask(kept, batch)
+                    if keep is None:
+                        return None
+                    kept = [r for r, k in zip(kept, keep) if k]
+                    columns = [
+                        (
+                            [key for key, k in zip(column, keep) if k]
+                            if isinstance(column, list)
+                            else column
                         )
-                        _last_sort_print[key] = now
+                        for column in columns
+                    ]
+                    batch = []
+                if step is None or not step.weight == "preference":
+                    continue
+                if step.operator in ["include", "exclude"]:
+                    if step.pattern is None:
+                        return None
+                    for release in kept:
+                        if not isinstance(getattr(release, step.attribute), str):
+                            return None
+                    columns += [step]
+                    continue
+                keys = step.keys(kept)
+                if keys is None:
+                    return None
+                columns += [keys]
+            return kept, columns[::-1]
+
+        def entries(self, scraped_releases: list, start: int, outcomes: dict):
+            # The (key, position, release) entries of the releases of a batch that
+            # pass the requirements, for ranked. The key holds the keys of prepare,
+            # most significant first. outcomes holds whether the releases of a title
+            # passed, a batch that would give releases with the same title another
+            # outcome depends on their order (see independent), in which case None is
+            # returned.
+            prepared = self.prepare(scraped_releases)
+            if prepared is None:
+                return None
+            kept, columns = prepared
+            passed = {id(release) for release in kept}
+            titles = {}
+            for item in scraped_releases:
+                result = id(item) in passed
+                if outcomes.get(item.title, titles.get(item.title, result)) != result:
+                    return None
+                titles[item.title] = result
+            outcomes.update(titles)
+            columns = [
+                column if isinstance(column, list) else column.keys(kept)
+                for column in columns
+            ]
+            positions = {id(item): start + i for i, item in enumerate(scraped_releases)}
+            return [
+                (tuple(column[i] for column in columns), positions[id(item)], item)
+                for i, item in enumerate(kept)
+            ]
+
+        def best(scraped_releases: list, columns: list, rows: list):
+            # The rows in the order of their keys, by grouping them by the most
+            # significant key and ordering each group by the next key once the
+            # group is reached. rows with equal keys keep their order.
+            if len(columns) == 0 or len(rows) < 2:
+                for row in rows:
+                    yield scraped_releases[row]
+                return
+            column = columns[0]
+            if isinstance(column, list):
+                keys = [column[row] for row in rows]
+            else:
+                keys = column.keys([scraped_releases[row] for row in rows])
+            groups: dict = {}
+            for row, key in zip(rows, keys):
+                groups.setdefault(key, []).append(row)
+            for key in sorted(groups):
+                yield from sort.compiled.best(
+                    scraped_releases, columns[1:], groups[key]
+                )
+
+        def order(scraped_releases: list, columns: list):
+            if len(scraped_releases) < 2 or len(columns[0]) == 0:
+                return
+            ranked = sorted(
+                range(len(scraped_releases)), key=lambda i: columns[i][::-1]
+            )
+            scraped_releases[:] = [scraped_releases[i] for i in ranked]
+
+    class ranked:
+        # The sorted releases of a version, that new scrape results can be added
+        # to. add() only ranks the new releases and merges them into the order, with
+        # the same result as sorting all releases added so far (in the order they
+        # were added). Versions that can't be ranked this way (see compiled.keyed)
+        # are sorted again on every add(). Releases must not be changed once they
+        # are added.
+        def __init__(self, version, scraped_releases=[]) -> None:
+            self.version = version
+            self.compiled = sort.compile(version)
+            self.incremental = self.compiled.keyed and not sort.ranking == "sequential"
+            self.added: list = []
+            self.known: set = set()
+            self.entries: list = []
+            self.outcomes: dict = {}
+            self.sorted: list = []
+            self.add(scraped_releases)
+
+        def add(self, scraped_releases: list):
+            batch = list(scraped_releases)
+            start = len(self.added)
+            self.added += batch
+            self.known.update(id(item) for item in batch)
+            if self.incremental:
+                try:
+                    entries = self.compiled.entries(batch, start, self.outcomes)
                 except Exception:
-                    ui_print(
-                        "sorting releases for version ["
-                        + version.name
-                        + "] ... done - found "
-                        + str(len(scraped_releases))
-                        + " releases"
-                    )
+                    entries = None
+                if entries is not None:
+                    if len(entries) * 16 < len(self.entries):
+                        for entry in entries:
+                            bisect.insort(self.entries, entry)
+                    else:
+                        # two sorted runs, merged in linear time
+                        self.entries += sorted(entries)
+                        self.entries.sort()
+                    return self.releases
+                self.incremental = False
+            self.sorted = sort(list(self.added), self.version, False)
+            return self.releases
+
+        def update(self, scraped_releases: list):
+            # adds the releases it doesn't hold yet, returns the ones of
+            # scraped_releases that the version keeps, in order
+            self.add([item for item in scraped_releases if id(item) not in self.known])
+            wanted = {id(item) for item in scraped_releases}
+            return [item for item in self.releases if id(item) in wanted]
+
+        @property
+        def releases(self):
+            if self.incremental:
+                return [entry[2] for entry in self.entries]
+            return list(self.sorted)
+
+        def __len__(self):
+            if self.incremental:
+                return len(self.entries)
+            return len(self.sorted)
+
+    def compile(version):
+        key = repr(version.rules)
+        compiled = _compiled_versions.get(key)
+        if compiled is None:
+            compiled = sort.compiled(version.rules)
+            if len(_compiled_versions) >= 64:
+                _compiled_versions.clear()
+            _compiled_versions[key] = compiled
+        return compiled
+
+    def compile_versions():
+        # called whenever the versions setting is loaded or changed
+        _compiled_versions.clear()
+        for version in sort.versions:
+            try:
+                sort.compile(
+                    sort.version(version[0], version[1], version[2], version[3])
+                )
+            except Exception:
+                continue
+
+    def candidates(scraped_releases: list, version: version, doprint=True):
+        # The releases a version keeps, best first, in the order of releases.sort.
+        # The requirements are checked for all releases, but the releases are only
+        # ordered as far as they are taken (see compiled.best), so a caller that
+        # stops at the first release that works doesn't pay for sorting the rest.
+        # Versions that can't be ranked by keys (see compiled.keyed) are
+        # fully sorted.
+        compiled = sort.compile(version)
+        prepared = None
+        if compiled.keyed and not sort.ranking == "sequential":
+            try:
+                prepared = compiled.prepare(scraped_releases)
+            except Exception:
+                prepared = None
+        if prepared is None:
+            yield from sort(scraped_releases, version, doprint)
+            return
+        kept, columns = prepared
+        if doprint and len(scraped_releases) > 0:
+            sort.report(kept, version)
+        yield from sort.compiled.best(kept, columns, list(range(len(kept))))
+
+    def report(scraped_releases: list, version: version):
+        # Avoid duplicate sort logs for the same version and identical release set within a short window
+        try:
+            titles = "|".join([r.title for r in scraped_releases])
+            key = version.name + ":" + hashlib.md5(titles.encode("utf-8")).hexdigest()
+            now = time.time()
+            last = _last_sort_print.get(key, 0)
+            if now - last > 1.0:
+                ui_print(
+                    "sorting releases for version ["
+                    + version.name
+                    + "] ... done - found "
+                    + str(len(scraped_releases))
+                    + " releases"
+                )
+                _last_sort_print[key] = now
+        except Exception:
+            ui_print(
+                "sorting releases for version ["
+                + version.name
+                + "] ... done - found "
+                + str(len(scraped_releases))
+                + " releases"
+            )
+
+    def __new__(self, scraped_releases: list, version: version, doprint=True):
+        if len(scraped_releases) > 0:
+            scraped_releases = sort.compile(version).apply(scraped_releases)
+            if doprint:
+                sort.report(scraped_releases, version)
         return scraped_releases
 
 
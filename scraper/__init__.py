@@ -1,14 +1,31 @@
+import threading
 import time
-from threading import Thread
 
 import regex
 
-from scraper import services
+from scraper import cache  # noqa: F401 (settings reach it as scraper.cache)
+from scraper import engine, services
 from ui.ui_print import ui_print, ui_settings
 
+# seconds prefetched releases are kept for scrape()
+prefetch_ttl = 600
+
+_prefetched: dict = {}
+_prefetched_lock = threading.Lock()
+
 
 def scrape(query, altquery="(.*)", imdb_id=None):
     ui_print("done")
+    prefetched = take(query, altquery, imdb_id)
+    if prefetched is not None:
+        ui_print(
+            "using "
+            + str(len(prefetched))
+            + ' prefetched releases for query "'
+            + query
+            + '"'
+        )
+        return prefetched
     scrapers = services.sequential()
     if len(scrapers) == 0:
         scrapers = [services.get()]
@@ -35,37 +52,79 @@ def scrape(query, altquery="(.*)", imdb_id=None):
             'accepting titles that regex match "' + altquery + '" ...',
             debug=ui_settings.debug,
         )
-        results = [None] * len(sequence)
-        threads = []
-        for index, scraper_ in enumerate(sequence):
-            t = Thread(
-                target=multi_scrape,
-                args=(scraper_, query, altquery, results, index),
-                kwargs={"imdb_id": imdb_id},
-            )
-            threads.append(t)
-            try:
-                t.start()
-            except Exception:
-                ui_print(
-                    "error starting new thread (perhaps maximum number of threads reached), will retry in 5 seconds and exit if it fails again."
-                )
-                time.sleep(5)
-                t.start()
-        # wait for the threads to complete
-        for t in threads:
-            t.join()
-        for result in results:
-            if result:
-                scraped_releases += result
-        for release in scraped_releases:
-            release.title = "".join([i if ord(i) < 512 else "" for i in release.title])
+        results = engine.scrape(sequence, query, altquery, imdb_id=imdb_id)
+        scraped_releases += merge(results)
         ui_print("done - found " + str(len(scraped_releases)) + " releases")
         if len(scraped_releases) > 0:
             break
     return scraped_releases
 
 
+def merge(results):
+    # the releases of the scrapers of a sequence
+    scraped_releases = []
+    for result in results:
+        if result:
+            scraped_releases += result
+    for release in scraped_releases:
+        release.title = "".join([i if ord(i) < 512 else "" for i in release.title])
+    return scraped_releases
+
+
+def prefetch(queries):
+    # scrapes several (query, altquery[, imdb_id]) queries at once, e.g. the episodes
+    # of a season, and keeps the releases until scrape() is called with the same
+    # arguments. Returns the releases found per query.
+    queries = [
+        (
+            query[0],
+            query[1] if len(query) > 1 else "(.*)",
+            query[2] if len(query) > 2 else None,
+        )
+        for query in queries
+    ]
+    remaining = list(dict.fromkeys(queries))
+    found = {query: [] for query in remaining}
+    if not remaining:
+        return found
+    scrapers = services.sequential()
+    if len(scrapers) == 0:
+        scrapers = [services.get()]
+    for sequence in scrapers:
+        if not remaining:
+            break
+        ui_print(
+            "scraping sources ["
+            + ",".join(x.name for x in sequence)
+            + "] for "
+            + str(len(remaining))
+            + " queries at once ..."
+        )
+        results = engine.scrape_many([(sequence,) + query for query in remaining])
+        for query, result in zip(remaining, results):
+            found[query] = merge(result)
+        remaining = [query for query in remaining if not found[query]]
+        ui_print(
+            "done - found "
+            + str(sum(len(releases_) for releases_ in found.values()))
+            + " releases"
+        )
+    with _prefetched_lock:
+        for query, releases_ in found.items():
+            _prefetched[query] = (time.time(), releases_)
+    return found
+
+
+def take(query, altquery="(.*)", imdb_id=None):
+    # the prefetched releases of a query, None if it wasn't prefetched
+    with _prefetched_lock:
+        for key, (stored, _) in list(_prefetched.items()):
+            if time.time() - stored > prefetch_ttl:
+                del _prefetched[key]
+        entry = _prefetched.pop((query, altquery, imdb_id), None)
+    return entry[1] if entry is not None else None
+
+
 def traditional():
     scrapers = services.sequential()
     if len(scrapers) == 0:
@@ -0,0 +1,328 @@
+# Scrape cache: the responses of the stremio stream endpoints (/stream/movie/<imdb>.json,
+# /stream/series/<imdb>:<s>:<e>.json) of every scraper, kept in an sqlite file in the
+# config dir. The regular checks ask the same urls every pass, so repeats are answered
+# from here until they expire. Empty responses are kept for a shorter time. Threads
+# that ask for a url that is already being requested wait for that request instead of
+# sending their own. The imdb ids that titles resolved to on TMDB are kept in the same
+# file, for all scrapers.
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from types import SimpleNamespace
+
+from scraper import stremio
+
+# hours a response is kept, "0" disables the cache
+ttl = "6"
+# hours a response without streams is kept
+empty_ttl = "1"
+# hours a response is kept per scraper name, overrides ttl. The settings menu stores
+# it as it was typed in (a json object), see durations
+ttls = {}
+# hours the imdb id of a title is kept
+imdb_ttl = "168"
+# hours a title without an imdb id is kept
+imdb_empty_ttl = "6"
+# the cache file, defaults to scraper_cache.db in the config dir
+path = ""
+
+_lock = threading.Lock()
+_ready = set()
+# requests in flight, by scraper and url
+_flights: dict = {}
+_flights_lock = threading.Lock()
+# resolved imdb ids, by media type and title: (imdb id, time)
+_imdb_ids: dict = {}
+
+
+def file():
+    if path:
+        return path
+    from ui.ui_print import config_dir
+
+    return os.path.join(config_dir, "scraper_cache.db")
+
+
+def hours(value):
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def durations():
+    # ttls as a dict, {} if it can't be read as one
+    value = ttls
+    if isinstance(value, str):
+        try:
+            value = json.loads(value) if value.strip() else {}
+        except ValueError:
+            value = {}
+    return value if isinstance(value, dict) else {}
+
+
+def lifetime(scraper_, empty=False):
+    # seconds a response of a scraper is kept
+    durations_ = durations()
+    if hours(ttl) == 0 and scraper_ not in durations_:
+        return 0.0
+    if empty:
+        return min(hours(empty_ttl), hours(durations_.get(scraper_, ttl))) * 3600
+    return hours(durations_.get(scraper_, ttl)) * 3600
+
+
+def valid(response):
+    # a stream response worth keeping: a list of streams, not a single error stream
+    # (like comet's "first search" notice)
+    streams = getattr(response, "streams", None)
+    if not isinstance(streams, list):
+        return False
+    return not (len(streams) == 1 and not hasattr(streams[0], "title"))
+
+
+def canonical(url):
+    # the same stream url, however the base url was written in the settings
+    parts = urllib.parse.urlsplit(url.strip())
+    path_ = "/".join(part for part in parts.path.split("/") if part)
+    return urllib.parse.urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), "/" + path_, parts.query, "")
+    )
+
+
+def connect():
+    name = file()
+    connection = sqlite3.connect(name, timeout=10)
+    if name not in _ready:
+        with _lock:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS scrapes (scraper TEXT, url TEXT, "
+                "content BLOB, empty INTEGER, stored REAL, PRIMARY KEY (scraper, url))"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS imdb_ids (type TEXT, title TEXT, "
+                "imdb_id TEXT, stored REAL, PRIMARY KEY (type, title))"
+            )
+            # drop what expired since the last run
+            longest = max(
+                [hours(ttl), hours(empty_ttl)]
+                + [hours(x) for x in durations().values()]
+            )
+            connection.execute(
+                "DELETE FROM scrapes WHERE stored < ?", (time.time() - longest * 3600,)
+            )
+            longest = max(hours(imdb_ttl), hours(imdb_empty_ttl))
+            connection.execute(
+                "DELETE FROM imdb_ids WHERE stored < ?",
+                (time.time() - longest * 3600,),
+            )
+            connection.commit()
+            _ready.add(name)
+    return connection
+
+
+def get(scraper_, url):
+    # the cached response of a scraper for a url, or None
+    if lifetime(scraper_) == 0:
+        return None
+    try:
+        connection = connect()
+        try:
+            row = connection.execute(
+                "SELECT content, empty, stored FROM scrapes WHERE scraper = ? AND url = ?",
+                (scraper_, canonical(url)),
+            ).fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return None
+    if row is None or time.time() - row[2] > lifetime(scraper_, bool(row[1])):
+        return None
+    return row[0]
+
+
+def put(scraper_, url, content, empty=False):
+    if lifetime(scraper_, empty) == 0:
+        return
+    try:
+        connection = connect()
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO scrapes VALUES (?, ?, ?, ?, ?)",
+                (scraper_, canonical(url), content, int(empty), time.time()),
+            )
+            connection.commit()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        pass
+
+
+def clear(scraper_=None):
+    # removes the cached responses of a scraper, or all responses and imdb ids.
+    # returns how many.
+    connection = connect()
+    try:
+        if scraper_:
+            cursor = connection.execute(
+                "DELETE FROM scrapes WHERE scraper = ?", (scraper_,)
+            )
+            removed = cursor.rowcount
+        else:
+            removed = connection.execute("DELETE FROM scrapes").rowcount
+            removed += connection.execute("DELETE FROM imdb_ids").rowcount
+            _imdb_ids.clear()
+        connection.commit()
+        return removed
+    finally:
+        connection.close()
+
+
+def shared(key, call):
+    # the result of call(), shared with the threads that ask for the same key while
+    # it runs. Threads that waited for a failed call get None, the thread that made
+    # it gets the error.
+    with _flights_lock:
+        flight = _flights.get(key)
+        sender = flight is None
+        if sender:
+            flight = _flights[key] = SimpleNamespace(
+                done=threading.Event(), result=None
+            )
+    if not sender:
+        flight.done.wait()
+        return flight.result
+    try:
+        flight.result = call()
+        return flight.result
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def stream(scraper_, session, url):
+    # the parsed stream response of a scraper for a url (see fetch), None if it
+    # failed. Fresh cached responses are served whatever the state of the host, a
+    # request is only sent if the breaker of the host lets it through (see
+    # health.available), and its outcome ends a probe.
+    from scraper import health
+
+    host = health.host(url)
+
+    def request():
+        if not health.available(host):
+            from ui.ui_print import ui_print, ui_settings
+
+            ui_print(
+                "[" + scraper_ + "] skipping " + host + ", it failed recently",
+                ui_settings.debug,
+            )
+            return None
+        try:
+            response = session.get(url, timeout=60, stream=True)
+        except Exception:
+            health.failed(host)
+            raise
+        if response is None or response.status_code >= 500:
+            # custom_session returns None when all its retries failed
+            health.failed(host)
+        else:
+            health.succeeded(host)
+        return response
+
+    try:
+        return fetch(scraper_, url, request)
+    except Exception:
+        return None
+
+
+def fetch(scraper_, url, request):
+    # the parsed response of a url: cached, shared with the request of another thread
+    # for the same url or requested with request()
+    return shared(
+        ("response", scraper_, canonical(url)),
+        lambda: load(scraper_, url, request),
+    )
+
+
+def load(scraper_, url, request):
+    content = get(scraper_, url)
+    if content is not None:
+        return stremio.load(
+            content[i : i + stremio.chunk_size]
+            for i in range(0, len(content), stremio.chunk_size)
+        )
+    response = request()
+    if response is None:
+        return None
+    try:
+        keep = response.status_code == 200 and lifetime(scraper_) > 0
+        chunks = []
+
+        def read():
+            for chunk in response.iter_content(chunk_size=stremio.chunk_size):
+                if keep:
+                    chunks.append(chunk)
+                yield chunk
+
+        parsed = stremio.load(read())
+    finally:
+        response.close()
+    if keep and valid(parsed):
+        put(scraper_, url, b"".join(chunks), empty=len(parsed.streams) == 0)
+    return parsed
+
+
+def imdb_id(title, media_type="movie"):
+    # the imdb id of a title as resolved by content.services.tmdb, or None. Titles
+    # are resolved once for all scrapers, failed lookups are not kept.
+    type_ = "tv" if media_type in ("show", "season") else "movie"
+    # titles are kept in a normalized form, TMDB is asked for the title as it is
+    key = (type_, " ".join(str(title).replace(".", " ").lower().split()))
+    if key in _imdb_ids and fresh(*_imdb_ids[key]):
+        return _imdb_ids[key][0]
+    return shared(("imdb",) + key, lambda: resolve(key, title, media_type))
+
+
+def fresh(imdb_id_, stored):
+    lifetime_ = hours(imdb_ttl) if imdb_id_ else hours(imdb_empty_ttl)
+    return time.time() - stored <= lifetime_ * 3600
+
+
+def resolve(key, title, media_type):
+    try:
+        connection = connect()
+        try:
+            row = connection.execute(
+                "SELECT imdb_id, stored FROM imdb_ids WHERE type = ? AND title = ?",
+                key,
+            ).fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        row = None
+    if row is not None and fresh(row[0] or None, row[1]):
+        _imdb_ids[key] = (row[0] or None, row[1])
+        return row[0] or None
+    from content.services import tmdb
+
+    imdb_id_, error = tmdb.lookup_imdb_id(title, media_type)
+    if error:
+        return None
+    _imdb_ids[key] = (imdb_id_, time.time())
+    try:
+        connection = connect()
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO imdb_ids VALUES (?, ?, ?, ?)",
+                key + (imdb_id_ or "", _imdb_ids[key][1]),
+            )
+            connection.commit()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        pass
+    return imdb_id_
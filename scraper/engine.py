@@ -0,0 +1,143 @@
+# Scrape engine: one event loop, shared by every scrape call, that runs the scrapers
+# of a sequence concurrently. The scrapers still make blocking requests, they run in
+# a shared pool of worker threads instead of a new thread per scraper and call, and
+# every scraper host has a limit of concurrent requests. Scrapes of different media
+# items (e.g. from the download threads or the frontend) overlap in the same loop.
+# In the "hedged" mode a scrape doesn't wait for slow scrapers once enough scrapers
+# found releases.
+import asyncio
+import functools
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper import health
+from ui.ui_print import ui_print, ui_settings
+
+# concurrent requests per scraper host
+host_limit = 4
+# threads that run the scrapers
+workers = 16
+# "all" waits for every scraper of a sequence. "hedged" returns once quorum scrapers
+# found releases, and waits for the others only as long as the scrapers that found
+# releases usually take (their 95th latency percentile).
+mode = "all"
+quorum = "1"
+
+_loop = None
+_executor = None
+_lock = threading.Lock()
+_limits: dict = {}
+
+
+def loop():
+    # the event loop, started on first use in a daemon thread
+    global _loop, _executor
+    with _lock:
+        if _loop is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="scraper"
+            )
+            _loop = asyncio.new_event_loop()
+            _loop.set_default_executor(_executor)
+            threading.Thread(
+                target=_loop.run_forever, name="scrape-engine", daemon=True
+            ).start()
+        return _loop
+
+
+def host(scraper_):
+    # the host a scraper sends its requests to, scrapers without a base url are
+    # limited on their own
+    url = getattr(scraper_, "base_url", "") or ""
+    return urllib.parse.urlsplit(url).netloc.lower() or getattr(scraper_, "name", "")
+
+
+def limit(key):
+    # only used inside the loop, so no lock is needed
+    if key not in _limits:
+        _limits[key] = asyncio.Semaphore(host_limit)
+    return _limits[key]
+
+
+async def scrape_one(scraper_, query, altquery, imdb_id=None):
+    async with limit(host(scraper_)):
+        start = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                None,
+                functools.partial(scraper_.scrape, query, altquery, imdb_id=imdb_id),
+            )
+        except Exception as e:
+            ui_print(
+                "[" + str(getattr(scraper_, "name", "scraper")) + "] error: " + str(e),
+                ui_settings.debug,
+            )
+            result = None
+        health.record(
+            getattr(scraper_, "name", ""), time.perf_counter() - start, result
+        )
+        return result
+
+
+async def scrape_all(sequence, query, altquery, imdb_id=None):
+    tasks = [
+        asyncio.ensure_future(scrape_one(scraper_, query, altquery, imdb_id))
+        for scraper_ in sequence
+    ]
+    if not mode == "hedged" or len(tasks) < 2:
+        return await asyncio.gather(*tasks)
+    start = time.perf_counter()
+    try:
+        needed = max(int(quorum), 1)
+    except ValueError:
+        needed = 1
+    pending = set(tasks)
+    found = []
+    while pending and len(found) < needed:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        found += [task for task in done if task.result()]
+    if pending:
+        # the late scrapers finish in the background, their results are dropped
+        deadline = max(
+            health.p95(getattr(sequence[tasks.index(task)], "name", ""))
+            for task in found
+        )
+        await asyncio.wait(
+            pending, timeout=max(deadline - (time.perf_counter() - start), 0)
+        )
+        late = [
+            str(getattr(sequence[tasks.index(task)], "name", "scraper"))
+            for task in tasks
+            if not task.done()
+        ]
+        if late:
+            ui_print(
+                "not waiting for ["
+                + ",".join(late)
+                + "], "
+                + str(len(found))
+                + " scraper/s found releases",
+                ui_settings.debug,
+            )
+    return [task.result() if task.done() else None for task in tasks]
+
+
+def scrape(sequence, query, altquery, imdb_id=None):
+    # the results of all scrapers of a sequence, in the order of the sequence (None
+    # for scrapers that failed). blocks the calling thread until all are done.
+    future = asyncio.run_coroutine_threadsafe(
+        scrape_all(sequence, query, altquery, imdb_id), loop()
+    )
+    return future.result()
+
+
+def scrape_many(jobs):
+    # the results of several (sequence, query, altquery, imdb_id) scrapes, sent at once
+    # under the same host limits
+    async def scrape_jobs():
+        return await asyncio.gather(*[scrape_all(*job) for job in jobs])
+
+    future = asyncio.run_coroutine_threadsafe(scrape_jobs(), loop())
+    return future.result()
@@ -0,0 +1,188 @@
+# Scraper health: the latencies and outcomes of the recent scrapes of every scraper,
+# recorded by the scrape engine, and a circuit breaker per scraper host. A host whose
+# requests failed repeatedly is skipped until a probe request after a growing back-off
+# succeeds.
+import bisect
+import collections
+import threading
+import time
+import urllib.parse
+
+# upper bounds of the latency histogram buckets, in seconds
+buckets = [0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60]
+# scrapes per scraper the latency percentiles are computed from
+window = 100
+
+# failed requests in a row that open the breaker of a host
+threshold = 3
+# seconds until the first probe of an open breaker, doubled after every failed probe
+backoff = 30
+max_backoff = 1800
+# seconds after which a probe without an outcome counts as lost
+probe_timeout = 120
+
+_lock = threading.Lock()
+_stats: dict = {}
+_breakers: dict = {}
+
+
+class stats:
+    def __init__(self, name):
+        self.name = name
+        self.histogram = [0] * (len(buckets) + 1)
+        self.recent = collections.deque(maxlen=window)
+        self.calls = 0
+        self.found = 0
+        self.empty = 0
+        self.errors = 0
+
+    def percentile(self, fraction):
+        # the latency fraction of the recent scrapes finished in, None without any
+        if not self.recent:
+            return None
+        latencies = sorted(self.recent)
+        return latencies[min(int(fraction * len(latencies)), len(latencies) - 1)]
+
+    def report(self):
+        return {
+            "calls": self.calls,
+            "found": self.found,
+            "empty": self.empty,
+            "errors": self.errors,
+            "success_ratio": (
+                round((self.calls - self.errors) / self.calls, 3)
+                if self.calls
+                else None
+            ),
+            "empty_ratio": round(self.empty / self.calls, 3) if self.calls else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "histogram": dict(
+                zip([str(bound) for bound in buckets] + ["inf"], self.histogram)
+            ),
+        }
+
+
+def get(name):
+    # the stats of a scraper, only used with _lock held
+    if name not in _stats:
+        _stats[name] = stats(name)
+    return _stats[name]
+
+
+def record(name, latency, result):
+    # result is what the scraper returned, None if it failed
+    with _lock:
+        scraper_ = get(name)
+        scraper_.calls += 1
+        if result is None:
+            scraper_.errors += 1
+            return
+        if len(result) == 0:
+            scraper_.empty += 1
+        else:
+            scraper_.found += 1
+        scraper_.recent.append(latency)
+        scraper_.histogram[bisect.bisect_left(buckets, latency)] += 1
+
+
+def p95(name):
+    with _lock:
+        return get(name).percentile(0.95)
+
+
+def report():
+    with _lock:
+        return {name: scraper_.report() for name, scraper_ in _stats.items()}
+
+
+class breaker:
+    def __init__(self, host):
+        self.host = host
+        # "closed", "open" or "half-open"
+        self.state = "closed"
+        self.failures = 0
+        self.backoff = backoff
+        self.retry = 0.0
+        self.probe = 0.0
+
+    def report(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": (
+                round(max(self.retry - time.time(), 0), 1)
+                if self.state == "open"
+                else None
+            ),
+        }
+
+
+def host(url):
+    return urllib.parse.urlsplit(url or "").netloc.lower()
+
+
+def service_host(service):
+    # the host of a scraper service, its name for services without a base url
+    return host(getattr(service, "base_url", "")) or getattr(service, "name", "")
+
+
+def get_breaker(key):
+    # the breaker of a host, only used with _lock held
+    if key not in _breakers:
+        _breakers[key] = breaker(key)
+    return _breakers[key]
+
+
+def skipped(key):
+    # whether scrapes should skip a host, without using up the probe of an open
+    # breaker whose back-off passed
+    with _lock:
+        breaker_ = _breakers.get(key)
+        if breaker_ is None or breaker_.state == "closed":
+            return False
+        if breaker_.state == "open":
+            return time.time() < breaker_.retry
+        return time.time() - breaker_.probe < probe_timeout
+
+
+def available(key):
+    # whether a request to a host may be sent. The first request after the back-off
+    # of an open breaker is its probe, others are refused until the probe ended.
+    with _lock:
+        breaker_ = get_breaker(key)
+        now = time.time()
+        if breaker_.state == "closed":
+            return True
+        if breaker_.state == "open" and now < breaker_.retry:
+            return False
+        if breaker_.state == "half-open" and now - breaker_.probe < probe_timeout:
+            return False
+        breaker_.state = "half-open"
+        breaker_.probe = now
+        return True
+
+
+def succeeded(key):
+    with _lock:
+        breaker_ = get_breaker(key)
+        breaker_.state = "closed"
+        breaker_.failures = 0
+        breaker_.backoff = backoff
+
+
+def failed(key):
+    with _lock:
+        breaker_ = get_breaker(key)
+        breaker_.failures += 1
+        if breaker_.state == "half-open":
+            breaker_.backoff = min(breaker_.backoff * 2, max_backoff)
+        elif breaker_.failures < threshold:
+            return
+        breaker_.state = "open"
+        breaker_.retry = time.time() + breaker_.backoff
+
+
+def breakers():
+    with _lock:
+        return {key: breaker_.report() for key, breaker_ in _breakers.items()}
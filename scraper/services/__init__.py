@@ -86,6 +86,22 @@ def _error_no_supported_sources(supported_sources):
     )
 
 
+def _healthy(services):
+    # skips the services whose host failed repeatedly, until it is probed again
+    from scraper import health
+
+    healthy = []
+    for service in services:
+        if health.skipped(health.service_host(service)):
+            ui_print(
+                "[scraper] skipping source '" + service.name + "', it failed recently",
+                debug=ui_settings.debug,
+            )
+            continue
+        healthy += [service]
+    return healthy
+
+
 def setup(cls, new=False):
     from settings import settings_list
 
@@ -141,7 +157,7 @@ def get():
         activeservices += [service]
     if active and activeservices == []:
         _error_no_supported_sources(supported_sources)
-    return activeservices
+    return _healthy(activeservices)
 
 
 def sequential():
@@ -159,5 +175,5 @@ def sequential():
             activesequence += [service]
         if sequence and activesequence == []:
             _error_no_supported_sources(supported_sources)
-        activeservices += [activesequence]
+        activeservices += [_healthy(activesequence)]
     return activeservices
@@ -1,6 +1,6 @@
 # import modules
 import releases
-from base import SimpleNamespace, copy, custom_session, json, regex, time
+from base import copy, custom_session, regex, time
 from ui.ui_print import ui_print, ui_settings
 
 name = "aiostreams"
@@ -21,14 +21,9 @@ session.headers.update(
 
 
 def get(url):
-    try:
-        response = session.get(url, timeout=60)
-        response = json.loads(
-            response.content, object_hook=lambda d: SimpleNamespace(**d)
-        )
-        return response
-    except Exception:
-        return None
+    from scraper import cache
+
+    return cache.stream(name, session, url)
 
 
 def setup(cls, new=False):
@@ -119,9 +114,9 @@ def scrape(query, altquery, imdb_id=None):
         query = regex.search(r"(tt[0-9]+)", altquery, regex.I).group()
     else:
         plain_text = copy.deepcopy(query)
-        from content.services import tmdb
+        from scraper import cache
 
-        resolved_imdb_id = tmdb.resolve_imdb_id(query, media_type=type)
+        resolved_imdb_id = cache.imdb_id(query, media_type=type)
         if not resolved_imdb_id:
             ui_print("[aiostreams] error: could not find IMDB ID via TMDB")
             return scraped_releases
@@ -159,9 +154,9 @@ def scrape(query, altquery, imdb_id=None):
             s = 1
             e = 1
             if plain_text != "":
-                from content.services import tmdb
+                from scraper import cache
 
-                imdb_id = tmdb.resolve_imdb_id(plain_text, media_type="show")
+                imdb_id = cache.imdb_id(plain_text, media_type="show")
                 if not imdb_id:
                     ui_print("[aiostreams] error: could not find IMDB ID via TMDB")
                     return scraped_releases
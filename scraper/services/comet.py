@@ -1,6 +1,6 @@
 # import modules
 import releases
-from base import SimpleNamespace, copy, custom_session, json, regex, time
+from base import SimpleNamespace, copy, custom_session, regex, time
 from ui.ui_print import ui_print, ui_settings
 
 name = "comet"
@@ -19,15 +19,11 @@ session.headers.update(
 )
 
 
-def get(url):
-    try:
-        response = session.get(url, timeout=60)
-        response = json.loads(
-            response.content, object_hook=lambda d: SimpleNamespace(**d)
-        )
-        return response
-    except Exception:
-        return None
+def get(url, scraper_=name):
+    # scraper_: the name of the instance, its responses are cached under it
+    from scraper import cache
+
+    return cache.stream(scraper_, session, url)
 
 
 def create_instance(instance_name):
@@ -151,16 +147,16 @@ def _scrape(instance, query, altquery, imdb_id=None):
         query = regex.search(r"(tt[0-9]+)", altquery, regex.I).group()
     else:
         plain_text = copy.deepcopy(query)
-        from content.services import tmdb
+        from scraper import cache
 
-        resolved_imdb_id = tmdb.resolve_imdb_id(query, media_type=type)
+        resolved_imdb_id = cache.imdb_id(query, media_type=type)
         if not resolved_imdb_id:
             ui_print("[" + instance.name + "] error: could not find IMDB ID via TMDB")
             return scraped_releases
         query = resolved_imdb_id
 
     def _try_url(url):
-        resp = get(url)
+        resp = get(url, instance.name)
         for _attempt in range(2):
             if not resp or not hasattr(resp, "streams"):
                 try:
@@ -186,7 +182,7 @@ def _scrape(instance, query, altquery, imdb_id=None):
                         ui_settings.debug,
                     )
                     time.sleep(8)
-                    resp = get(url)
+                    resp = get(url, instance.name)
                     continue
 
                 err_detail = ""
@@ -222,9 +218,9 @@ def _scrape(instance, query, altquery, imdb_id=None):
             s = 1
             e = 1
             if plain_text != "":
-                from content.services import tmdb
+                from scraper import cache
 
-                imdb_id = tmdb.resolve_imdb_id(plain_text, media_type="show")
+                imdb_id = cache.imdb_id(plain_text, media_type="show")
                 if not imdb_id:
                     ui_print(
                         "[" + instance.name + "] error: could not find IMDB ID via TMDB"
@@ -0,0 +1,117 @@
+# Incremental parser of stremio stream responses ({"streams": [...], ...}). The
+# response is read in chunks and every stream is decoded as soon as it arrived, so the
+# whole response text is never held at once and streams are available before the
+# download finished.
+import codecs
+import json
+import sys
+from types import SimpleNamespace
+
+# bytes read from the response at a time
+chunk_size = 64 * 1024
+
+whitespace = " \t\n\r"
+delimiters = whitespace + ",:]}"
+# keys are interned, json.loads only shares them within one call and every stream is
+# decoded on its own
+decoder = json.JSONDecoder(
+    object_pairs_hook=lambda pairs: SimpleNamespace(
+        **{sys.intern(key): value for key, value in pairs}
+    )
+)
+
+
+def iterparse(chunks, array="streams"):
+    # yields ("value", key, value) for every key of the top level object. The array
+    # under the key array is yielded as an empty list, followed by ("item", key, item)
+    # for every item as soon as it was read. Objects become SimpleNamespaces.
+    chunks = iter(chunks)
+    text = codecs.getincrementaldecoder("utf-8")()
+    state = SimpleNamespace(buffer="", pos=0, eof=False)
+
+    def more():
+        # reads the next chunk, drops what was parsed already
+        if state.eof:
+            return False
+        state.buffer = state.buffer[state.pos :]
+        state.pos = 0
+        try:
+            state.buffer += text.decode(next(chunks))
+        except StopIteration:
+            state.buffer += text.decode(b"", final=True)
+            state.eof = True
+        return True
+
+    def skip():
+        # the next character after whitespace, "" at the end of the response
+        while True:
+            while (
+                state.pos < len(state.buffer) and state.buffer[state.pos] in whitespace
+            ):
+                state.pos += 1
+            if state.pos < len(state.buffer):
+                return state.buffer[state.pos]
+            if not more():
+                return ""
+
+    def expect(characters):
+        char = skip()
+        if char == "" or char not in characters:
+            raise ValueError(
+                "expected " + " or ".join(characters) + " at " + repr(char or "end")
+            )
+        state.pos += 1
+        return char
+
+    def value():
+        skip()
+        while True:
+            try:
+                result, end = decoder.raw_decode(state.buffer, state.pos)
+                # a number cut by the end of the chunk may continue in the next one
+                if state.eof or (
+                    end < len(state.buffer) and state.buffer[end] in delimiters
+                ):
+                    state.pos = end
+                    return result
+            except json.JSONDecodeError:
+                if state.eof:
+                    raise
+            more()
+
+    # a bom at the start of the response
+    skip()
+    if state.buffer.startswith("﻿"):
+        state.pos += 1
+    expect("{")
+    if skip() == "}":
+        state.pos += 1
+        return
+    while True:
+        key = value()
+        expect(":")
+        if key == array and skip() == "[":
+            state.pos += 1
+            yield "value", key, []
+            if skip() == "]":
+                state.pos += 1
+            else:
+                while True:
+                    yield "item", key, value()
+                    if expect(",]") == "]":
+                        break
+        else:
+            yield "value", key, value()
+        if expect(",}") == "}":
+            return
+
+
+def load(chunks, array="streams"):
+    # the whole response, parsed incrementally
+    response = SimpleNamespace()
+    for event, key, item in iterparse(chunks, array):
+        if event == "item":
+            getattr(response, key).append(item)
+        else:
+            setattr(response, key, item)
+    return response
@@ -18,6 +18,22 @@ class LazyScraperServices:
 _lazy_scraper_services = LazyScraperServices()
 
 
+# Lazy loader for scraper submodules, settings are written through to the module
+class LazyScraperModule:
+    def __init__(self, module):
+        object.__setattr__(self, "module", module)
+
+    def __getattr__(self, name):
+        return getattr(getattr(scraper, self.module), name)
+
+    def __setattr__(self, name, value):
+        setattr(getattr(scraper, self.module), name, value)
+
+
+_lazy_scraper_cache = LazyScraperModule("cache")
+_lazy_scraper_engine = LazyScraperModule("engine")
+
+
 class setting:
     def __init__(
         self,
@@ -434,11 +450,15 @@ class setting:
                 # Append as [name, triggers, lang, rules]
                 new_versions += [[profile, triggers, lang, rules]]
             setattr(self.cls, self.key, new_versions)
+            releases.sort.compile_versions()
             return
         # Skip setting if class is None (service not implemented)
         if self.cls is None:
             return
         setattr(self.cls, self.key, value)
+        # Rebuild the compiled versions whenever the version rules change
+        if self.key == "versions" and self.cls is releases.sort:
+            releases.sort.compile_versions()
 
     def get(self):
         # Return None if class is None (service not implemented)
@@ -606,6 +626,77 @@ settings_list = [
                 help="When enabled, releases tagged as 'Uncensored' are sorted above censored versions of the same anime.",
                 hidden=True,
             ),
+            setting(
+                "Release Ranking",
+                "Rank releases with a single composite sort or one sort per preference (type 'composite' or 'sequential'): ",
+                releases.sort,
+                "ranking",
+                help="Both modes produce the same release order. 'composite' builds one sort key per release from all preferences of a version and sorts once, 'sequential' is the previous behaviour of sorting once per preference.",
+                hidden=True,
+            ),
+            setting(
+                "Release Selection",
+                "Take the releases of a version best first or sort all of them before downloading (type 'lazy' or 'full'): ",
+                releases.sort,
+                "selection",
+                help="Both modes try the releases in the same order. 'lazy' only ranks the releases and takes them best first until one is downloaded, 'full' sorts and prints all releases of a version first. The full list is always printed when debug printing or logging is enabled.",
+                hidden=True,
+            ),
+            setting(
+                "Scraper Mode",
+                "Wait for all sources of a sequence or stop waiting for slow sources once enough sources found releases (type 'all' or 'hedged'): ",
+                _lazy_scraper_engine,
+                "mode",
+                help="In the 'hedged' mode a scrape returns once 'Scraper Quorum' sources found releases. The other sources are waited for only as long as the sources that found releases usually take (their 95th latency percentile), releases they return until then are used too.",
+                hidden=True,
+            ),
+            setting(
+                "Scraper Quorum",
+                "Please specify how many sources need to find releases before a hedged scrape stops waiting: ",
+                _lazy_scraper_engine,
+                "quorum",
+                hidden=True,
+            ),
+            setting(
+                "Scrape Cache Duration",
+                "Please specify how many hours scraper responses are cached ('0' disables the cache): ",
+                _lazy_scraper_cache,
+                "ttl",
+                help="The regular checks ask the scrapers for the same movies and episodes every pass. Responses are kept in scraper_cache.db in the config folder and repeated requests are answered from there until they are older than this.",
+                hidden=True,
+            ),
+            setting(
+                "Scrape Cache Empty Duration",
+                "Please specify how many hours scraper responses without any releases are cached: ",
+                _lazy_scraper_cache,
+                "empty_ttl",
+                help="Responses without any releases are kept for a shorter time, so that new releases are found soon after they are published.",
+                hidden=True,
+            ),
+            setting(
+                "Scrape Cache Source Durations",
+                "Please specify how many hours the responses of a source are cached: ",
+                _lazy_scraper_cache,
+                "ttls",
+                help='Cache durations of single sources by name (e.g. {"comet-selfhosted": "2", "aiostreams": "12"}), overriding the scrape cache duration.',
+                hidden=True,
+            ),
+            setting(
+                "IMDB ID Cache Duration",
+                "Please specify how many hours the IMDB ID of a title is cached: ",
+                _lazy_scraper_cache,
+                "imdb_ttl",
+                help="Sources that need an IMDB ID look titles up on TMDB. The IMDB ID of a title is looked up once for all sources and kept in scraper_cache.db for this long.",
+                hidden=True,
+            ),
+            setting(
+                "IMDB ID Cache Empty Duration",
+                "Please specify how many hours titles without an IMDB ID are cached: ",
+                _lazy_scraper_cache,
+                "imdb_empty_ttl",
+                help="Titles TMDB doesn't know are looked up again after this many hours. Failed lookups are never cached.",
+                hidden=True,
+            ),
             setting(
                 "Special character renaming",
                 [
@@ -712,6 +803,30 @@ settings_list = [
                 "api_key",
                 hidden=True,
             ),
+            setting(
+                "Real Debrid Hash Cache Duration",
+                "Please specify how many hours Real Debrid torrents that were cached are remembered: ",
+                debrid.services.realdebrid,
+                "hash_ttl",
+                help="Torrent hashes that turned out to be cached on Real Debrid are kept in debrid_cache.db in the config folder, with their file lists, for this many hours.",
+                hidden=True,
+            ),
+            setting(
+                "Real Debrid Uncached Hash Duration",
+                "Please specify how many hours Real Debrid torrents that were not cached are skipped: ",
+                debrid.services.realdebrid,
+                "uncached_hash_ttl",
+                help="Torrent hashes that Real Debrid could not download are skipped for this many hours instead of adding their magnets again ('0' retries them every time).",
+                hidden=True,
+            ),
+            setting(
+                "Real Debrid Speculative Downloads",
+                "Please specify how many releases are added to Real Debrid at once ('1' adds them one after another): ",
+                debrid.services.realdebrid,
+                "speculative",
+                help="The best releases are added to Real Debrid together and the first one that Real Debrid has downloaded is used, the others are deleted. Items whose best releases are not cached are found faster, at the cost of some more requests.",
+                hidden=True,
+            ),
             setting(
                 "TorBox API Key",
                 "Please enter your TorBox API Key: ",
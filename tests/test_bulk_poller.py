@@ -0,0 +1,93 @@
+"""Tests for base.bulk_poller, which waits for the torrents added to a debrid service."""
+
+import threading
+import time
+
+import base
+
+
+class _service:
+    # torrents that are downloaded after some polls
+    def __init__(self, polls):
+        self.polls = polls
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def fetch(self, ids):
+        with self.lock:
+            self.calls.append(sorted(ids))
+            count = len(self.calls)
+        return {
+            id_: "downloaded" if count >= self.polls[id_] else "downloading"
+            for id_ in ids
+            if id_ in self.polls
+        }
+
+
+def _done(state):
+    return state == "downloaded"
+
+
+def test_pending_torrents_are_fetched_together():
+    service = _service({"1": 1, "2": 2, "3": 2})
+    poller = base.bulk_poller(service.fetch, interval=0.02)
+
+    futures = [poller.wait(id_, _done, 5) for id_ in ["1", "2", "3"]]
+
+    assert [future.result(2) for future in futures] == ["downloaded"] * 3
+    assert service.calls == [["1", "2", "3"], ["2", "3"]]
+    assert poller.pending == {}
+
+
+def test_polls_back_off_while_nothing_changes():
+    service = _service({"1": 6})
+    poller = base.bulk_poller(
+        service.fetch, interval=0.02, max_interval=0.08, backoff=2
+    )
+
+    future = poller.wait("1", _done, 5)
+    future.result(2)
+
+    assert poller.polls == 6
+    assert poller.delay == 0.02
+    assert service.calls == [["1"]] * 6
+
+
+def test_a_timeout_returns_the_last_state():
+    service = _service({"1": 1000})
+    poller = base.bulk_poller(service.fetch, interval=0.02)
+
+    start = time.monotonic()
+    state = poller.wait("1", _done, 0.1).result(2)
+
+    assert state == "downloading"
+    assert time.monotonic() - start < 1
+    assert poller.pending == {}
+
+
+def test_cancelled_torrents_are_no_longer_polled():
+    service = _service({"1": 1000, "2": 3})
+    poller = base.bulk_poller(service.fetch, interval=0.02)
+
+    cancelled = poller.wait("1", _done, 5)
+    waited = poller.wait("2", _done, 5)
+    poller.cancel("1")
+
+    assert cancelled.result(2) is None
+    assert waited.result(2) == "downloaded"
+    assert all(ids == ["2"] for ids in service.calls)
+
+
+def test_fetch_errors_are_polled_again():
+    calls = []
+
+    def fetch(ids):
+        calls.append(ids)
+        if len(calls) == 1:
+            raise ConnectionError("down")
+        return {id_: "downloaded" for id_ in ids}
+
+    poller = base.bulk_poller(fetch, interval=0.02)
+
+    assert poller.wait("1", _done, 5).result(2) == "downloaded"
+    assert len(calls) == 2
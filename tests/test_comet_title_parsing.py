@@ -112,7 +112,7 @@ def test_title_from_behavior_hints_filename(monkeypatch):
         size="15695765913",
     )
     response = SimpleNamespace(streams=[stream])
-    monkeypatch.setattr(comet, "get", lambda url: response)
+    monkeypatch.setattr(comet, "get", lambda url, scraper_="comet": response)
 
     results = comet.scrape("tt1234567", "tt1234567")
     assert len(results) == 1
@@ -133,7 +133,7 @@ def test_title_from_description_first_line(monkeypatch):
         size="15695765913",
     )
     response = SimpleNamespace(streams=[stream])
-    monkeypatch.setattr(comet, "get", lambda url: response)
+    monkeypatch.setattr(comet, "get", lambda url, scraper_="comet": response)
 
     results = comet.scrape("tt1234567", "tt1234567")
     assert len(results) == 1
@@ -152,7 +152,7 @@ def test_title_falls_back_to_title_field(monkeypatch):
         size="5000000000",
     )
     response = SimpleNamespace(streams=[stream])
-    monkeypatch.setattr(comet, "get", lambda url: response)
+    monkeypatch.setattr(comet, "get", lambda url, scraper_="comet": response)
 
     results = comet.scrape("tt1234567", "tt1234567")
     assert len(results) == 1
@@ -172,7 +172,7 @@ def test_title_strips_mkv_extension(monkeypatch):
         size="10000000000",
     )
     response = SimpleNamespace(streams=[stream])
-    monkeypatch.setattr(comet, "get", lambda url: response)
+    monkeypatch.setattr(comet, "get", lambda url, scraper_="comet": response)
 
     results = comet.scrape("tt1234567", "tt1234567")
     assert len(results) == 1
@@ -199,7 +199,7 @@ def test_info_hash_from_binge_group(monkeypatch):
         ),
     )
     response = SimpleNamespace(streams=[stream])
-    monkeypatch.setattr(comet, "get", lambda url: response)
+    monkeypatch.setattr(comet, "get", lambda url, scraper_="comet": response)
 
     results = comet.scrape("tt1234567", "tt1234567")
     assert len(results) == 1
@@ -222,7 +222,7 @@ def test_size_from_video_size(monkeypatch):
         ),
     )
     response = SimpleNamespace(streams=[stream])
-    monkeypatch.setattr(comet, "get", lambda url: response)
+    monkeypatch.setattr(comet, "get", lambda url, scraper_="comet": response)
 
     results = comet.scrape("tt1234567", "tt1234567")
     assert len(results) == 1
@@ -248,7 +248,7 @@ def test_instance_title_from_behavior_hints(monkeypatch):
         size="50000000000",
     )
     response = SimpleNamespace(streams=[stream])
-    monkeypatch.setattr(comet, "get", lambda url: response)
+    monkeypatch.setattr(comet, "get", lambda url, scraper_="comet": response)
 
     results = instance.scrape("tt1234567", "tt1234567")
     assert len(results) == 1
@@ -269,7 +269,7 @@ def test_comet_suppresses_verbose_debug_logs(monkeypatch):
         size="15695765913",
     )
     response = SimpleNamespace(streams=[stream])
-    monkeypatch.setattr(comet, "get", lambda url: response)
+    monkeypatch.setattr(comet, "get", lambda url, scraper_="comet": response)
 
     results = comet.scrape("tt1234567", "tt1234567")
     assert len(results) == 1
@@ -39,3 +39,52 @@ def test_sanitize_filename_edgecases():
         str(repo_root / "downloader" / "__init__.py"), "downloader_test"
     )
     assert dl.sanitize_filename("../secret/evil?.mkv") == "secret.evil.mkv"
+
+
+def test_files_whose_link_failed_are_skipped_and_the_rest_downloaded(monkeypatch):
+    repo_root = Path(__file__).resolve().parents[1]
+    import sys
+    import types
+
+    import base
+
+    ui_print_stub = types.SimpleNamespace()
+    ui_print_stub.ui_print = lambda *a, **k: None
+    monkeypatch.setitem(sys.modules, "ui.ui_print", ui_print_stub)
+    monkeypatch.setitem(
+        sys.modules, "ui", types.SimpleNamespace(ui_print=ui_print_stub)
+    )
+    dl = _load_module_from_path(
+        str(repo_root / "downloader" / "__init__.py"), "downloader_test"
+    )
+    downloaded = []
+    monkeypatch.setattr(
+        dl,
+        "download_file",
+        lambda url, name, is_show, expected_size=None, element=None: downloaded.append(
+            (url, name)
+        )
+        or name,
+    )
+    # like realdebrid.unrestrict: the second link fails, the third names its file
+    filenames = ["Show.S01E01.1080p.mkv", "Show.S01E02.1080p.mkv", None]
+
+    def resolve(index):
+        if index == 2:
+            filenames[2] = "Show.S01E03.1080p.mkv"
+        return None if index == 1 else "https://download/" + str(index)
+
+    release = types.SimpleNamespace(
+        title="Show.S01.1080p",
+        size=1,
+        files=[],
+        download=base.ordered_map(resolve, range(3)),
+        filenames=filenames,
+    )
+    element = types.SimpleNamespace(type="season")
+
+    assert dl.download_from_realdebrid(release, element) is True
+    assert downloaded == [
+        ("https://download/0", "Show.S01E01.1080p.mkv"),
+        ("https://download/2", "Show.S01E03.1080p.mkv"),
+    ]
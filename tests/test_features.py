@@ -0,0 +1,88 @@
+"""Tests for the release title features record."""
+
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+import features
+
+
+def _stub_releases(monkeypatch):
+    """Register releases/__init__.py, loaded with a stubbed ui package."""
+    repo_root = Path(__file__).resolve().parents[1]
+    ui_settings_stub = SimpleNamespace(debug="false", log="false")
+    ui_pkg = ModuleType("ui")
+    ui_pkg.__path__ = []
+    ui_print_mod = ModuleType("ui.ui_print")
+    setattr(ui_print_mod, "ui_print", lambda *a, **k: None)
+    setattr(ui_print_mod, "ui_cls", lambda *a, **k: None)
+    setattr(ui_print_mod, "ui_settings", ui_settings_stub)
+    setattr(ui_pkg, "ui_print", ui_print_mod)
+    setattr(ui_pkg, "ui_settings", ui_settings_stub)
+    monkeypatch.setitem(sys.modules, "ui", ui_pkg)
+    monkeypatch.setitem(sys.modules, "ui.ui_print", ui_print_mod)
+
+    spec = importlib.util.spec_from_file_location(
+        "releases", repo_root / "releases" / "__init__.py"
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "releases", module)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_parse_reads_all_features_from_a_title():
+    parsed = features.parse(
+        "Show.S01E01-E03.2160p.AMZN.WEB-DL.DoVi.HDR.DDP.5.1.Atmos.H.265-FLUX.mkv"
+    )
+
+    assert parsed.resolution == "2160"
+    assert parsed.quality == "4K"
+    assert parsed.encode == "WEB-DL"
+    assert parsed.codec == "H.265"
+    assert parsed.hdr_tags == ("DV", "HDR")
+    assert parsed.audio == "Atmos"
+    assert parsed.channels == "5.1"
+    assert parsed.group == "FLUX"
+    assert parsed.is_show
+    assert (parsed.season, parsed.episode, parsed.name) == ("01", "01", "Show")
+    assert parsed.seasons == (1,)
+    assert parsed.episodes == (1, 2, 3)
+
+
+def test_parse_expands_season_ranges_and_ignores_words():
+    parsed = features.parse("Show.S01-S03.COMPLETE.1080p.BluRay.DTS-HD.MA-EPSiLON")
+
+    assert parsed.seasons == (1, 2, 3)
+    assert parsed.episodes == ()
+    assert not parsed.is_show
+    assert parsed.resolution == "1080"
+
+
+def test_parse_sets_dub_and_hardsub_flags_for_the_given_patterns(monkeypatch):
+    releases = _stub_releases(monkeypatch)
+    title = "[Group] Anime - 01 [1080p] Dual Audio [HS]"
+
+    plain = features.parse(title)
+    before = releases.pattern_cache_info()["misses"]
+    flagged = features.parse(title, r"dual[.\s_-]?audio", r"\[HS\]")
+
+    assert not plain.dub and not plain.hardsub
+    assert flagged.dub and flagged.hardsub
+    assert flagged.group == plain.group
+    assert releases.pattern_cache_info()["misses"] - before == 2
+
+
+def test_parse_is_cached_per_title(monkeypatch):
+    _stub_releases(monkeypatch)
+    title = "Cached.Movie.2020.720p.WEB.x264-GRP"
+    before = features.parse_title.cache_info()
+
+    first = features.parse(title)
+    again = features.parse(title, "dub")
+
+    assert again.title is first.title
+    assert again.year == "2020"
+    assert features.parse_title.cache_info().misses - before.misses == 1
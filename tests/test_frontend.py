@@ -3,7 +3,32 @@
 import importlib.util
 import sys
 from pathlib import Path
-from types import ModuleType
+from types import ModuleType, SimpleNamespace
+
+
+def _stub_releases(monkeypatch):
+    """Register releases/__init__.py, loaded with a stubbed ui package."""
+    repo_root = Path(__file__).resolve().parents[1]
+    ui_settings_stub = SimpleNamespace(debug="false", log="false")
+    ui_pkg = ModuleType("ui")
+    ui_pkg.__path__ = []
+    ui_print_mod = ModuleType("ui.ui_print")
+    setattr(ui_print_mod, "ui_print", lambda *a, **k: None)
+    setattr(ui_print_mod, "ui_cls", lambda *a, **k: None)
+    setattr(ui_print_mod, "ui_settings", ui_settings_stub)
+    setattr(ui_pkg, "ui_print", ui_print_mod)
+    setattr(ui_pkg, "ui_settings", ui_settings_stub)
+    monkeypatch.setitem(sys.modules, "ui", ui_pkg)
+    monkeypatch.setitem(sys.modules, "ui.ui_print", ui_print_mod)
+
+    spec = importlib.util.spec_from_file_location(
+        "releases", repo_root / "releases" / "__init__.py"
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "releases", module)
+    spec.loader.exec_module(module)
+    return module
 
 
 def _load_frontend_module(monkeypatch):
@@ -68,3 +93,32 @@ def test_service_mode_uses_frontend_start_function():
 
     assert "from frontend import start_frontend" in main_source
     assert "target=start_frontend" in main_source
+
+
+def test_season_filter_drops_releases_for_other_seasons(monkeypatch):
+    releases_mod = _stub_releases(monkeypatch)
+    frontend = _load_frontend_module(monkeypatch)
+    titles = [
+        "Show.S02.1080p.WEB-DL",
+        "Show.S12.1080p.WEB-DL",
+        "Show.Season.3.720p",
+        "Show.TV-02.x264",
+        "Show.Complete.Series",
+        "Show.S2E05.720p",
+    ]
+    releases = [type("release", (), {"title": title})() for title in titles]
+
+    kept = frontend._filter_releases_for_season(releases, 2)
+
+    assert [r.title for r in kept] == [
+        "Show.S02.1080p.WEB-DL",
+        "Show.TV-02.x264",
+        "Show.Complete.Series",
+        "Show.S2E05.720p",
+    ]
+
+    before = releases_mod.pattern_cache_info()
+    frontend._filter_releases_for_season(releases, 2)
+    after = releases_mod.pattern_cache_info()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] == before["misses"]
@@ -519,3 +519,51 @@ def test_failed_scrape_job_does_not_expose_internal_error(monkeypatch):
     assert payload["error"] == "Scrape failed"
     assert "Exception" not in (payload["error"] or "")
     assert "Traceback" not in (payload["error"] or "")
+
+
+def test_scrape_cache_endpoint_clears_all_or_one_scraper(monkeypatch):
+    cleared = []
+
+    def clear(scraper=None):
+        cleared.append(scraper)
+        return 3
+
+    scraper_mod = _module(
+        "scraper",
+        scrape=lambda *_args, **_kwargs: [],
+        cache=SimpleNamespace(clear=clear),
+    )
+    frontend = _import_frontend(monkeypatch, scraper_module=scraper_mod)
+    frontend.app.config.update(TESTING=True)
+
+    with frontend.app.test_client() as client:
+        everything = client.delete("/api/scrape-cache")
+        comet = client.delete("/api/scrape-cache?scraper=comet")
+
+    assert cleared == [None, "comet"]
+    assert everything.status_code == 200
+    assert everything.get_json() == {
+        "status": "cleared",
+        "error": None,
+        "scraper": None,
+        "removed": 3,
+    }
+    assert comet.get_json()["scraper"] == "comet"
+
+
+def test_scraper_health_endpoint_reports_latencies_and_breakers(monkeypatch):
+    health = SimpleNamespace(
+        report=lambda: {"comet-selfhosted": {"calls": 4, "p95": 1.2}},
+        breakers=lambda: {"comet.example": {"state": "open", "retry_in": 25.0}},
+    )
+    scraper_mod = _module("scraper", scrape=lambda *_args, **_kwargs: [], health=health)
+    frontend = _import_frontend(monkeypatch, scraper_module=scraper_mod)
+    frontend.app.config.update(TESTING=True)
+
+    with frontend.app.test_client() as client:
+        response = client.get("/api/scrapers/health")
+
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["scrapers"]["comet-selfhosted"]["p95"] == 1.2
+    assert payload["hosts"]["comet.example"]["state"] == "open"
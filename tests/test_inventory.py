@@ -0,0 +1,80 @@
+"""Tests for base.inventory, the torrents of a debrid account by hash."""
+
+from types import SimpleNamespace
+
+import base
+
+
+class _account:
+    # torrents newest first, pages of `limit` torrents
+    def __init__(self, *torrents):
+        self.torrents = list(torrents)
+        self.pages = []
+
+    def fetch(self, page, limit):
+        self.pages.append(page)
+        return self.torrents[page * limit : (page + 1) * limit]
+
+    def add(self, torrent):
+        self.torrents.insert(0, torrent)
+
+
+def _torrent(id_, hash_, status="downloaded"):
+    return SimpleNamespace(id=id_, hash=hash_, status=status)
+
+
+def _ready(torrent):
+    return torrent.status == "downloaded"
+
+
+def test_refreshes_read_only_the_new_torrents():
+    account = _account(*[_torrent(str(i), "h" + str(i)) for i in range(5, 0, -1)])
+    torrents = base.inventory(account.fetch, _ready, ttl=0, limit=2)
+
+    assert torrents.get("H3").id == "3"
+    assert account.pages == [0, 1, 2]
+
+    account.pages.clear()
+    account.add(_torrent("6", "h6"))
+    assert torrents.get("h6").id == "6"
+    # the first page ends with a torrent that was seen before
+    assert account.pages == [0]
+    assert torrents.get("h1").id == "1"
+
+
+def test_a_full_refresh_forgets_deleted_torrents():
+    account = _account(_torrent("2", "h2"), _torrent("1", "h1"))
+    torrents = base.inventory(account.fetch, _ready, ttl=0, full_ttl=0)
+
+    assert torrents.get("h1") is not None
+    account.torrents.pop()
+    assert torrents.get("h1") is None
+    assert list(torrents.torrents) == ["h2"]
+
+
+def test_only_ready_torrents_are_returned():
+    account = _account(
+        _torrent("3", "h1", "magnet_error"),
+        _torrent("2", "h2", "downloading"),
+        _torrent("1", "h1"),
+    )
+    torrents = base.inventory(account.fetch, _ready)
+
+    assert torrents.get("h1").id == "1"
+    assert torrents.get("h2") is None
+
+    torrents.put(_torrent("4", "h2"))
+    assert torrents.get("h2").id == "4"
+    torrents.drop("h2")
+    assert torrents.get("h2") is None
+    assert account.pages == [0]
+
+
+def test_failed_listings_keep_what_is_known():
+    account = _account(_torrent("1", "h1"))
+    torrents = base.inventory(account.fetch, _ready, ttl=0)
+    torrents.refresh()
+
+    torrents.fetch = lambda page, limit: None
+
+    assert torrents.get("h1").id == "1"
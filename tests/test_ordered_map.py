@@ -0,0 +1,79 @@
+"""Tests for base.ordered_map, used to unrestrict the links of a torrent at once."""
+
+import copy
+import pickle
+import threading
+import time
+
+import base
+
+
+def test_results_keep_the_order_of_the_items():
+    def slow_first(item):
+        time.sleep(0.1 if item == 0 else 0.01)
+        return "link" + str(item)
+
+    results = base.ordered_map(slow_first, range(4), workers=4)
+
+    assert len(results) == 4
+    assert list(results) == ["link0", "link1", "link2", "link3"]
+    assert results[1:3] == ["link1", "link2"]
+    assert results == ["link0", "link1", "link2", "link3"]
+
+
+def test_first_results_are_available_before_the_last_ones():
+    release = threading.Event()
+
+    def resolve(item):
+        if item == 2:
+            release.wait(2)
+        return item
+
+    start = time.perf_counter()
+    results = base.ordered_map(resolve, range(3), workers=3)
+
+    assert results[0] == 0
+    assert time.perf_counter() - start < 1
+    release.set()
+    assert results[2] == 2
+
+
+def test_calls_are_bounded_and_failures_are_none():
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def resolve(item):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.02)
+        with lock:
+            running["now"] -= 1
+        if item % 2:
+            raise RuntimeError("hoster down")
+        return item
+
+    results = base.ordered_map(resolve, range(8), workers=2)
+
+    assert list(results) == [0, None, 2, None, 4, None, 6, None]
+    assert running["max"] == 2
+    assert results.any()
+    assert not base.ordered_map(lambda item: None, range(3)).any()
+
+
+def test_calls_take_tokens_from_the_bucket():
+    taken = []
+    bucket = base.token_bucket(rate=0)
+    bucket.acquire = lambda: taken.append(True)
+
+    results = base.ordered_map(str, range(3), bucket=bucket)
+
+    assert list(results) == ["0", "1", "2"]
+    assert len(taken) == 3
+
+
+def test_copies_are_plain_lists_of_the_results():
+    results = base.ordered_map(str, range(3))
+
+    assert pickle.loads(pickle.dumps(results)) == ["0", "1", "2"]
+    assert type(copy.deepcopy(results)) is list
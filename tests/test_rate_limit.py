@@ -0,0 +1,100 @@
+"""Tests for the per-host token bucket rate limiting of base.custom_session."""
+
+import threading
+from types import SimpleNamespace
+
+import requests
+
+import base
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+def _clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(base.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(base.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_token_bucket_allows_a_burst_then_the_rate(monkeypatch):
+    clock = _clock(monkeypatch)
+    bucket = base.token_bucket(rate=2, burst=3)
+
+    waits = [bucket.reserve() for _ in range(5)]
+
+    assert waits == [0, 0, 0, 0.5, 1.0]
+    clock.now += 10
+    assert bucket.reserve() == 0
+    bucket.pause(7)
+    assert bucket.reserve() == 7
+    assert base.token_bucket(rate=0).reserve() == 0
+
+
+def test_token_bucket_is_shared_safely_between_threads():
+    bucket = base.token_bucket(rate=1, burst=2)
+    waits = []
+    lock = threading.Lock()
+
+    def reserve():
+        wait = bucket.reserve()
+        with lock:
+            waits.append(round(wait))
+
+    threads = [threading.Thread(target=reserve) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # every thread got its own slot
+    assert sorted(waits) == [0, 0, 1, 2, 3, 4]
+
+
+def test_retry_after_header():
+    def response(value):
+        return SimpleNamespace(headers={"Retry-After": value} if value else {})
+
+    assert base.retry_after(response("12"), 5) == 12
+    assert base.retry_after(response(None), 5) == 5
+    assert base.retry_after(response("soon"), 5) == 5
+    assert base.retry_after(response("100000"), 5) == 300
+    assert base.retry_after(response("Wed, 21 Oct 2015 07:28:00 GMT"), 5) == 0
+
+
+def test_sessions_limit_per_host_and_honor_retry_after(monkeypatch):
+    clock = _clock(monkeypatch)
+    statuses = {"a.example": [429, 200], "b.example": [200] * 3}
+    sent = []
+
+    def request(self, method, url, **kwargs):
+        host = url.split("/")[2]
+        sent.append((host, clock.now))
+        return SimpleNamespace(
+            status_code=statuses[host].pop(0), headers={"Retry-After": "3"}
+        )
+
+    monkeypatch.setattr(requests.Session, "request", request)
+    session = base.custom_session(rate=1, burst=1)
+
+    assert session.get("http://a.example/x").status_code == 200
+    for _ in range(3):
+        session.get("http://b.example/x")
+
+    # the retry waited for Retry-After, the other host wasn't held back by it
+    assert sent[0] == ("a.example", 100.0)
+    assert sent[1] == ("a.example", 103.0)
+    assert [host for host, _ in sent[2:]] == ["b.example"] * 3
+    assert sent[3][1] - sent[2][1] == 1.0
+    assert sent[4][1] - sent[3][1] == 1.0
@@ -0,0 +1,298 @@
+"""Tests for the Real Debrid hash cache and the lookups of account torrents."""
+
+import importlib.util
+import sys
+import time
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _load(monkeypatch, tmp_path):
+    ui_print_stub = ModuleType("ui.ui_print")
+    ui_print_stub.ui_settings = SimpleNamespace(debug=True)
+    ui_print_stub.ui_print = lambda *args, **kwargs: None
+    monkeypatch.setitem(sys.modules, "ui.ui_print", ui_print_stub)
+    monkeypatch.setitem(sys.modules, "releases", ModuleType("releases"))
+    monkeypatch.setitem(sys.modules, "downloader", ModuleType("downloader"))
+
+    spec = importlib.util.spec_from_file_location(
+        "debrid.hashes", REPO_ROOT / "debrid" / "hashes.py"
+    )
+    hashes = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(hashes)
+    hashes.path = str(tmp_path / "debrid_cache.db")
+    debrid_pkg = ModuleType("debrid")
+    debrid_pkg.__path__ = []
+    debrid_pkg.hashes = hashes
+    monkeypatch.setitem(sys.modules, "debrid", debrid_pkg)
+    monkeypatch.setitem(sys.modules, "debrid.hashes", hashes)
+
+    spec = importlib.util.spec_from_file_location(
+        "realdebrid_hash_cache_test",
+        REPO_ROOT / "debrid" / "services" / "realdebrid.py",
+    )
+    realdebrid = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(realdebrid)
+    return realdebrid, hashes
+
+
+def _element(*hashes_):
+    return SimpleNamespace(
+        Releases=[
+            SimpleNamespace(hash=hash_, title=hash_[0], size=1, files=[], cached=[])
+            for hash_ in hashes_
+        ]
+    )
+
+
+def test_entries_expire_per_outcome(monkeypatch, tmp_path):
+    _, hashes = _load(monkeypatch, tmp_path)
+    now = [1000.0]
+    monkeypatch.setattr(hashes.time, "time", lambda: now[0])
+    hashes.put("RD", "A" * 40, True, [{"id": 1, "path": "/a.mkv", "bytes": 5}])
+    hashes.put("RD", "b" * 40, False)
+
+    found = hashes.get("RD", ["a" * 40, "b" * 40, "c" * 40], "2", "1")
+    now[0] += 1.5 * 3600
+    later = hashes.get("RD", ["a" * 40, "b" * 40], "2", "1")
+
+    assert found["a" * 40].cached is True
+    assert found["a" * 40].files == [{"id": 1, "path": "/a.mkv", "bytes": 5}]
+    assert found["b" * 40].cached is False
+    assert "c" * 40 not in found
+    assert list(later) == ["a" * 40]
+    assert hashes.clear("RD") == 2
+
+
+def test_check_drops_known_uncached_hashes_without_requests(monkeypatch, tmp_path):
+    realdebrid, hashes = _load(monkeypatch, tmp_path)
+    hashes.put("RD", "b" * 40, False)
+    monkeypatch.setattr(realdebrid, "get", lambda *a, **k: 1 / 0)
+    element = _element("a" * 40, "b" * 40)
+
+    realdebrid.check(element)
+
+    assert [release.hash for release in element.Releases] == ["a" * 40]
+    assert element.Releases[0].cached == ["RD"]
+
+
+def test_check_looks_up_unknown_hashes_in_the_account_once(monkeypatch, tmp_path):
+    realdebrid, hashes = _load(monkeypatch, tmp_path)
+    realdebrid.api_key = "key"
+    calls = []
+
+    def fake_get(url, context=None):
+        calls.append(url)
+        return [
+            SimpleNamespace(hash="A" * 40, status="downloaded"),
+            SimpleNamespace(hash="b" * 40, status="magnet_error"),
+            SimpleNamespace(hash="c" * 40, status="downloading"),
+        ]
+
+    monkeypatch.setattr(realdebrid, "get", fake_get)
+
+    first = _element("a" * 40, "b" * 40, "c" * 40, "d" * 40)
+    realdebrid.check(first)
+    second = _element("a" * 40, "b" * 40, "c" * 40)
+    realdebrid.check(second)
+
+    assert len(calls) == 1
+    assert [release.hash for release in first.Releases] == [
+        "a" * 40,
+        "c" * 40,
+        "d" * 40,
+    ]
+    assert [release.hash for release in second.Releases] == ["a" * 40, "c" * 40]
+    stored = hashes.get("RD", ["a" * 40, "b" * 40, "c" * 40], "1", "1")
+    assert {hash_: entry.cached for hash_, entry in stored.items()} == {
+        "a" * 40: True,
+        "b" * 40: False,
+    }
+
+
+def test_download_skips_known_uncached_hashes_before_adding_the_magnet(
+    monkeypatch, tmp_path
+):
+    realdebrid, hashes = _load(monkeypatch, tmp_path)
+    hashes.put("RD", "b" * 40, False)
+    posted = []
+    monkeypatch.setattr(realdebrid, "post", lambda *a, **k: posted.append(a))
+    release = SimpleNamespace(
+        hash="b" * 40,
+        title="Show.S01E01.1080p",
+        size=1,
+        files=[],
+        cached=["RD"],
+        download=["magnet:?xt=urn:btih:" + "b" * 40],
+    )
+    element = SimpleNamespace(
+        Releases=[release], deviation=lambda: "(.*)", query=lambda: "Show"
+    )
+
+    assert realdebrid.download(element) is False
+    assert posted == []
+
+
+def test_download_reuses_a_downloaded_torrent_of_the_account(monkeypatch, tmp_path):
+    realdebrid, _ = _load(monkeypatch, tmp_path)
+    realdebrid.api_key = "key"
+    sys.modules["debrid"].downloading = []
+    posts = []
+
+    def fake_get(url, context=None):
+        if "torrents?" in url:
+            return [
+                SimpleNamespace(id="9", hash="A" * 40, status="downloaded"),
+                SimpleNamespace(id="8", hash="b" * 40, status="downloading"),
+            ]
+        return SimpleNamespace(
+            status="downloaded",
+            files=[SimpleNamespace(id=1, path="/Show.S01E01.mkv", selected=1)],
+            links=["link" + url.rsplit("/", 1)[-1]],
+        )
+
+    def fake_post(url, data, context=None):
+        posts.append(url.rsplit("/", 2)[-2:])
+        return SimpleNamespace(download="https://download/" + data["link"])
+
+    monkeypatch.setattr(realdebrid, "get", fake_get)
+    monkeypatch.setattr(realdebrid, "post", fake_post)
+    monkeypatch.setattr(
+        realdebrid.downloader,
+        "download_from_realdebrid",
+        lambda release, element: True,
+        raising=False,
+    )
+    release = SimpleNamespace(
+        hash="a" * 40,
+        title="Show.S01E01.1080p",
+        size=1,
+        files=[],
+        cached=["RD"],
+        download=["magnet:?xt=urn:btih:" + "a" * 40],
+    )
+    element = SimpleNamespace(
+        Releases=[release], deviation=lambda: "(.*)", query=lambda: "Show"
+    )
+
+    assert realdebrid.download(element) is True
+    assert posts == [["unrestrict", "link"]]
+    assert release.download == ["https://download/link9"]
+    assert realdebrid.existing("b" * 40) is None
+
+
+def test_only_failed_torrents_are_remembered_as_uncached(monkeypatch, tmp_path):
+    realdebrid, hashes = _load(monkeypatch, tmp_path)
+    realdebrid.time = SimpleNamespace(
+        sleep=lambda seconds: None, time=time.time, monotonic=time.monotonic
+    )
+    realdebrid.poll_interval = 0.01
+    realdebrid.poll_timeout = 0.05
+    states = {"a" * 40: "downloading", "b" * 40: "magnet_error"}
+    ids = {"1": "a" * 40, "2": "b" * 40}
+
+    def fake_get(url, context=None):
+        if "torrents?" in url:
+            return [
+                SimpleNamespace(id=id_, hash=hash_, status=states[hash_])
+                for id_, hash_ in ids.items()
+            ]
+        return SimpleNamespace(
+            status=states[ids[url.rsplit("/", 1)[-1]]],
+            files=[SimpleNamespace(id=1, path="/Show.S01E01.mkv", selected=1)],
+            links=[],
+        )
+
+    def fake_post(url, data, context=None):
+        if url.endswith("addMagnet"):
+            return SimpleNamespace(id="1" if data["magnet"][20] == "a" else "2")
+        return None
+
+    monkeypatch.setattr(realdebrid, "get", fake_get)
+    monkeypatch.setattr(realdebrid, "post", fake_post)
+    deleted = []
+    monkeypatch.setattr(
+        realdebrid, "delete", lambda url, context=None: deleted.append(url)
+    )
+    for letter in "ab":
+        release = SimpleNamespace(
+            hash=letter * 40,
+            title="Show.S01E01.1080p",
+            size=1,
+            files=[],
+            cached=["RD"],
+            download=["magnet:?xt=urn:btih:" + letter * 40],
+        )
+        element = SimpleNamespace(
+            Releases=[release], deviation=lambda: "(.*)", query=lambda: "Show"
+        )
+        assert realdebrid.download(element) is False
+
+    # the slow torrent is not known to be uncached, the failed one is
+    stored = hashes.get("RD", ["a" * 40, "b" * 40], "1", "1")
+    assert {hash_: entry.cached for hash_, entry in stored.items()} == {"b" * 40: False}
+    # the slow torrent is left to finish in the account, the failed one is deleted
+    assert [url.rsplit("/", 1)[-1] for url in deleted] == ["2"]
+    assert realdebrid.index().torrents["a" * 40].id == "1"
+
+
+def test_links_that_fail_to_unrestrict_are_left_out(monkeypatch, tmp_path):
+    realdebrid, _ = _load(monkeypatch, tmp_path)
+    realdebrid.api_key = "key"
+    sys.modules["debrid"].downloading = []
+    handed = []
+
+    def fake_get(url, context=None):
+        if "torrents?" in url:
+            return [SimpleNamespace(id="9", hash="a" * 40, status="downloaded")]
+        return SimpleNamespace(
+            status="downloaded",
+            files=[
+                SimpleNamespace(id=1, path="/Show.S01E01.mkv", selected=1),
+                SimpleNamespace(id=2, path="/Show.S01E02.mkv", selected=1),
+            ],
+            links=["link1", "link2", "link3"],
+        )
+
+    def fake_post(url, data, context=None):
+        if data["link"] == "link2":
+            return SimpleNamespace(error="hoster_unavailable")
+        return SimpleNamespace(
+            download="https://download/" + data["link"],
+            filename="Show.S01E0" + data["link"][-1] + ".mkv",
+        )
+
+    monkeypatch.setattr(realdebrid, "get", fake_get)
+    monkeypatch.setattr(realdebrid, "post", fake_post)
+    monkeypatch.setattr(
+        realdebrid.downloader,
+        "download_from_realdebrid",
+        lambda release, element: handed.append(
+            (list(release.download), list(release.filenames))
+        )
+        or True,
+        raising=False,
+    )
+    release = SimpleNamespace(
+        hash="a" * 40,
+        title="Show.S01.1080p",
+        size=1,
+        files=[],
+        cached=["RD"],
+        download=["magnet:?xt=urn:btih:" + "a" * 40],
+    )
+    element = SimpleNamespace(
+        Releases=[release], deviation=lambda: "(.*)", query=lambda: "Show"
+    )
+
+    assert realdebrid.download(element) is True
+    # the failed link is None for the downloader to skip, the third link has no
+    # selected file, its name comes from unrestrict
+    assert handed == [
+        (
+            ["https://download/link1", None, "https://download/link3"],
+            ["Show.S01E01.mkv", "Show.S01E02.mkv", "Show.S01E03.mkv"],
+        )
+    ]
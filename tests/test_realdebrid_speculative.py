@@ -0,0 +1,205 @@
+"""Tests for speculative Real Debrid downloads (realdebrid.speculate)."""
+
+import importlib.util
+import sys
+import time
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _load(monkeypatch, tmp_path):
+    ui_print_stub = ModuleType("ui.ui_print")
+    ui_print_stub.ui_settings = SimpleNamespace(debug=True)
+    ui_print_stub.ui_print = lambda *args, **kwargs: None
+    monkeypatch.setitem(sys.modules, "ui.ui_print", ui_print_stub)
+    monkeypatch.setitem(sys.modules, "releases", ModuleType("releases"))
+    downloader_stub = ModuleType("downloader")
+    downloader_stub.download_from_realdebrid = lambda release, element: True
+    monkeypatch.setitem(sys.modules, "downloader", downloader_stub)
+
+    spec = importlib.util.spec_from_file_location(
+        "debrid.hashes", REPO_ROOT / "debrid" / "hashes.py"
+    )
+    hashes = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(hashes)
+    hashes.path = str(tmp_path / "debrid_cache.db")
+    debrid_pkg = ModuleType("debrid")
+    debrid_pkg.__path__ = []
+    debrid_pkg.hashes = hashes
+    debrid_pkg.downloading = []
+    monkeypatch.setitem(sys.modules, "debrid", debrid_pkg)
+    monkeypatch.setitem(sys.modules, "debrid.hashes", hashes)
+
+    spec = importlib.util.spec_from_file_location(
+        "realdebrid_speculative_test",
+        REPO_ROOT / "debrid" / "services" / "realdebrid.py",
+    )
+    realdebrid = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(realdebrid)
+    realdebrid.time = SimpleNamespace(
+        sleep=lambda seconds: None, time=time.time, monotonic=time.monotonic
+    )
+    realdebrid.poll_interval = 0.01
+    return realdebrid
+
+
+class _api:
+    # a fake account: magnet a is still downloading, b is cached, c is broken
+    ids = {"a": "1", "b": "2", "c": "3"}
+    states = {"1": "downloading", "2": "downloaded", "3": "magnet_error"}
+
+    def __init__(self):
+        self.posts = []
+        self.deleted = []
+        self.lists = 0
+
+    def post(self, url, data, context=None):
+        self.posts.append(url.rsplit("/", 2)[-2:])
+        if url.endswith("addMagnet"):
+            return SimpleNamespace(id=self.ids[data["magnet"][20]])
+        if "unrestrict" in url:
+            return SimpleNamespace(download="https://download/" + data["link"])
+        return None
+
+    def get(self, url, context=None):
+        if "torrents?" in url:
+            self.lists += 1
+            return [
+                SimpleNamespace(id=torrent_id, hash="", status=status)
+                for torrent_id, status in self.states.items()
+            ]
+        torrent_id = url.rsplit("/", 1)[-1]
+        return SimpleNamespace(
+            status=self.states[torrent_id],
+            files=[SimpleNamespace(id=1, path="/Show.S01E01.mkv", selected=1)],
+            links=(
+                ["link" + torrent_id] if self.states[torrent_id] == "downloaded" else []
+            ),
+        )
+
+    def delete(self, url, context=None):
+        self.deleted.append(url.rsplit("/", 1)[-1])
+
+
+def _release(letter):
+    return SimpleNamespace(
+        hash=letter * 40,
+        title="Show.S01E01." + letter,
+        size=1,
+        files=[],
+        cached=["RD"],
+        download=["magnet:?xt=urn:btih:" + letter * 40],
+    )
+
+
+def _element(release=None):
+    return SimpleNamespace(
+        Releases=[release] if release else [],
+        deviation=lambda: "(.*)",
+        query=lambda: "Show S01E01",
+    )
+
+
+def test_the_first_downloaded_release_is_kept_and_the_failed_ones_deleted(
+    monkeypatch, tmp_path
+):
+    realdebrid = _load(monkeypatch, tmp_path)
+    realdebrid.speculative = "3"
+    # long enough for the torrents that are still downloading to be cancelled before
+    # the next poll
+    realdebrid.poll_interval = 0.2
+    api = _api()
+    for name in ["get", "post", "delete"]:
+        monkeypatch.setattr(realdebrid, name, getattr(api, name))
+    candidates = [_release("a"), _release("b"), _release("c")]
+
+    realdebrid.speculate(_element(), candidates)
+
+    assert [post[1] for post in api.posts].count("addMagnet") == 3
+    # the added torrents are polled together
+    assert api.lists == 1
+    assert api.deleted == ["3"]
+    assert realdebrid._speculated["b" * 40][0] == "2"
+
+    # the torrent that lost the race stays in the account for a later download, and
+    # only the failed torrent says that its hash is not cached
+    assert realdebrid._speculated["a" * 40][0] == ""
+    assert realdebrid.index().torrents["a" * 40].id == "1"
+    assert realdebrid._speculated["c" * 40][0] == ""
+    stored = realdebrid.known(["a" * 40, "c" * 40])
+    assert {hash_: entry.cached for hash_, entry in stored.items()} == {"c" * 40: False}
+
+    api.posts.clear()
+    # the losing and the failed release are skipped, the ready one is used as it is
+    assert realdebrid.download(_element(candidates[0])) is False
+    assert realdebrid.download(_element(candidates[2])) is False
+    assert realdebrid.download(_element(candidates[1])) is True
+    assert api.posts == [["unrestrict", "link"]]
+    assert candidates[1].download == ["https://download/link2"]
+
+
+def test_nothing_is_added_at_once_without_speculative_downloads(monkeypatch, tmp_path):
+    realdebrid = _load(monkeypatch, tmp_path)
+    api = _api()
+    monkeypatch.setattr(realdebrid, "post", api.post)
+
+    realdebrid.speculate(_element(), [_release("a"), _release("b")])
+
+    assert api.posts == []
+    assert realdebrid._speculated == {}
+
+
+def _load_debrid(monkeypatch, realdebrid):
+    # debrid.speculate, with realdebrid as the only service
+    services = ModuleType("debrid.services")
+    services.get = lambda: [realdebrid]
+    sys.modules["debrid"].services = services
+    spec = importlib.util.spec_from_file_location(
+        "debrid_speculative_test", REPO_ROOT / "debrid" / "__init__.py"
+    )
+    debrid = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(debrid)
+    return debrid
+
+
+def _first_download(realdebrid, debrid, candidates):
+    # what content.classes does: the candidates best first, until one is downloaded
+    for release in debrid.speculate(_element(), candidates):
+        if realdebrid.download(_element(release)):
+            return release
+    return None
+
+
+def test_releases_added_at_once_are_not_added_again(monkeypatch, tmp_path):
+    realdebrid = _load(monkeypatch, tmp_path)
+    realdebrid.speculative = "3"
+    realdebrid.api_key = "key"
+    api = _api()
+    for name in ["get", "post", "delete"]:
+        monkeypatch.setattr(realdebrid, name, getattr(api, name))
+    debrid = _load_debrid(monkeypatch, realdebrid)
+    candidates = [_release("a"), _release("b"), _release("c")]
+
+    assert _first_download(realdebrid, debrid, candidates) is candidates[1]
+    # the release ranked above the winner is still downloading, it is not waited for
+    assert [post[1] for post in api.posts].count("addMagnet") == 3
+    assert "1" not in api.deleted
+
+
+def test_releases_that_were_not_downloaded_in_time_are_reused(monkeypatch, tmp_path):
+    realdebrid = _load(monkeypatch, tmp_path)
+    realdebrid.speculative = "2"
+    realdebrid.speculative_timeout = 0.05
+    realdebrid.poll_timeout = 0.05
+    api = _api()
+    api.states = dict(api.states, **{"2": "downloading"})
+    for name in ["get", "post", "delete"]:
+        monkeypatch.setattr(realdebrid, name, getattr(api, name))
+    debrid = _load_debrid(monkeypatch, realdebrid)
+
+    assert _first_download(realdebrid, debrid, [_release("a"), _release("b")]) is None
+    # download() waits for the torrents that were added, they stay in the account
+    assert [post[1] for post in api.posts].count("addMagnet") == 2
+    assert api.deleted == []
@@ -0,0 +1,655 @@
+"""Tests for the release model and the version rule pipeline of releases.sort."""
+
+import copy
+import importlib.util
+import pickle
+import sys
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+
+def _import_releases(monkeypatch):
+    """Load releases/__init__.py in isolation with a stubbed ui package."""
+    repo_root = Path(__file__).resolve().parents[1]
+    releases_path = repo_root / "releases" / "__init__.py"
+
+    logs = []
+    ui_pkg = ModuleType("ui")
+    ui_pkg.__path__ = []
+    ui_settings_stub = SimpleNamespace(debug="false", log="false")
+    ui_print_mod = ModuleType("ui.ui_print")
+    setattr(ui_print_mod, "ui_print", lambda *a, **k: logs.append(a))
+    setattr(ui_print_mod, "ui_cls", lambda *a, **k: None)
+    setattr(ui_print_mod, "ui_settings", ui_settings_stub)
+    setattr(ui_pkg, "ui_print", ui_print_mod)
+    setattr(ui_pkg, "ui_settings", ui_settings_stub)
+    monkeypatch.setitem(sys.modules, "ui", ui_pkg)
+    monkeypatch.setitem(sys.modules, "ui.ui_print", ui_print_mod)
+
+    spec = importlib.util.spec_from_file_location("releases_test", releases_path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module, logs
+
+
+RECORDED_TITLES = [
+    ("Show.S01.1080p.BluRay.x264-GROUP", 42.1, 120),
+    ("Show.S01.2160p.WEB-DL.DV.HDR.H265-FLUX", 88.4, 64),
+    ("Show.S01.1080p.WEB-DL.DDP5.1.H264-NTb", 24.9, 310),
+    ("Show.S01.720p.HDTV.x264-KILLERS", 8.2, 12),
+    ("Show.S01.1080p.AMZN.WEB-DL.REPACK.DDP5.1-NTb", 25.3, 88),
+    ("Show.S01.1080p.HDTS.x264-CAMGRP", 4.0, 900),
+    ("Show.S01.1080p.BluRay.REMUX.AVC.DTS-HD.MA-EPSiLON", 160.0, 15),
+    ("Show.S01.480p.DVDRip.XviD-SAiNTS", 3.1, 7),
+    ("Show.S01.1080p.BluRay.EXTENDED.x265-RARBG", 18.7, 240),
+    ("Show.S01.1080p.WEB.3D.x264-GRP", 12.0, 2),
+    ("Show.S01.1080p.NF.WEB-DL.DDP5.1.H264-FLUX", 26.0, 150),
+    ("Show.S01.1080p.WEB.sample-GRP", 0.05, 40),
+    ("Show.S01.720p.WEB-DL.x264-GROUP", 9.5, 120),
+    ("Show.S01.1080p.BluRay.x264-GROUP", 42.1, 3),
+]
+
+
+def _make_releases(releases):
+    scraped = []
+    for index, (title, size, seeders) in enumerate(RECORDED_TITLES):
+        item = releases.release(
+            "[comet-selfhosted]",
+            "torrent",
+            title,
+            [],
+            size,
+            ["magnet:?xt=urn:btih:" + str(index).zfill(40) + "&dn=" + title],
+            seeders,
+        )
+        item.cached = ["RD"] if index % 4 else []
+        item.wanted = index % 3
+        item.unwanted = 1 if "sample" in title else 0
+        item.bitrate = size * 3
+        scraped.append(item)
+    return scraped
+
+
+def _legacy_sort(releases, scraped_releases, version):
+    """The rule loop releases.sort ran before versions were compiled."""
+    for rule in reversed(releases.sort.always_on_rules):
+        rule.apply(scraped_releases)
+    for rule in reversed(version.rules):
+        for subrule in releases.sort.version.rule.__subclasses__():
+            if subrule.name == rule[0]:
+                rule = subrule(rule[0], rule[1], rule[2], rule[3])
+                break
+        try:
+            scraped_releases = rule.apply(scraped_releases)
+        except Exception:
+            continue
+    return scraped_releases
+
+
+def _default_version(releases):
+    return releases.sort.version(*releases.sort.versions[0])
+
+
+def test_compiled_version_is_cached_per_rule_definition(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    version = _default_version(releases)
+
+    first = releases.sort.compile(version)
+    again = releases.sort.compile(_default_version(releases))
+
+    assert first is again
+    assert len(first.steps) == len(version.rules) + len(releases.sort.always_on_rules)
+
+
+def test_compiled_version_is_rebuilt_when_rules_change(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    version = _default_version(releases)
+    first = releases.sort.compile(version)
+
+    changed = releases.sort.version(
+        version.name,
+        version.triggers,
+        version.lang,
+        version.rules + [["seeders", "requirement", ">=", "10"]],
+    )
+
+    assert releases.sort.compile(changed) is not first
+
+
+def test_compile_versions_precompiles_all_configured_versions(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    releases._compiled_versions.clear()
+
+    releases.sort.compile_versions()
+
+    assert len(releases._compiled_versions) == len(releases.sort.versions)
+
+
+def test_compiled_sort_matches_legacy_rule_loop(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    version = _default_version(releases)
+
+    expected = _legacy_sort(releases, _make_releases(releases), version)
+    actual = releases.sort(_make_releases(releases), version, doprint=False)
+
+    assert [r.title for r in actual] == [r.title for r in expected]
+    assert [r.seeders for r in actual] == [r.seeders for r in expected]
+
+
+def test_undefined_rule_is_skipped_and_reported(monkeypatch):
+    releases, logs = _import_releases(monkeypatch)
+    version = releases.sort.version(
+        "broken",
+        "both",
+        "true",
+        [["does not exist", "preference", "highest", ""]],
+    )
+
+    result = releases.sort(_make_releases(releases), version, doprint=False)
+
+    assert len(result) == len(RECORDED_TITLES)
+    assert any("undefined rule" in str(entry[0]) for entry in logs)
+
+
+PREFERENCE_HEAVY_RULES = [
+    ["cache status", "requirement", "cached", ""],
+    ["resolution", "requirement", "<=", "2160"],
+    ["resolution", "preference", "highest", ""],
+    ["title", "requirement", "exclude", "(3D)"],
+    ["title", "preference", "exclude", "(HDTS|CAM)"],
+    ["title", "preference", "include", "(REMUX)"],
+    ["title", "preference", "include", "(BluRay)"],
+    ["title", "preference", "include", "(WEB-DL)"],
+    ["title", "preference", "exclude", "(x265|H265)"],
+    ["title", "preference", "include", "(REPACK|EXTENDED)"],
+    ["file names", "preference", "exclude", "(sample)"],
+    ["source", "preference", "==", "[comet-selfhosted]"],
+    ["size", "preference", "<=", "60"],
+    ["size", "preference", "highest", ""],
+    ["seeders", "preference", ">=", "50"],
+    ["seeders", "preference", "highest", ""],
+    ["bitrate", "preference", "lowest", ""],
+    ["size", "requirement", ">=", "0.1"],
+]
+
+
+def _make_filed_releases(releases):
+    scraped = _make_releases(releases)
+    for index, item in enumerate(scraped):
+        item.source = "[comet-selfhosted]" if index % 2 else "[aiostreams]"
+        item.files = [
+            SimpleNamespace(name=item.title + ".mkv", size=item.size),
+            SimpleNamespace(
+                name=("sample-" if index % 5 == 0 else "extra-") + item.title + ".mkv",
+                size=0.01,
+            ),
+        ]
+    return scraped
+
+
+def _rank_both_ways(releases, monkeypatch, version, make):
+    monkeypatch.setattr(releases.sort, "ranking", "sequential")
+    expected = releases.sort(make(releases), version, doprint=False)
+    monkeypatch.setattr(releases.sort, "ranking", "composite")
+    actual = releases.sort(make(releases), version, doprint=False)
+    return expected, actual
+
+
+def _identity(scraped):
+    return [(r.title, r.seeders, [f.name for f in r.files]) for r in scraped]
+
+
+def test_composite_ranking_matches_sequential_sorts(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    versions = [
+        _default_version(releases),
+        releases.sort.version("heavy", [], "true", PREFERENCE_HEAVY_RULES),
+    ]
+
+    for version in versions:
+        expected, actual = _rank_both_ways(
+            releases, monkeypatch, version, _make_filed_releases
+        )
+        assert _identity(actual) == _identity(expected)
+
+
+def test_composite_ranking_handles_highest_requirements_and_failing_rules(
+    monkeypatch,
+):
+    releases, logs = _import_releases(monkeypatch)
+    version = releases.sort.version(
+        "barriers",
+        [],
+        "true",
+        [
+            ["seeders", "preference", "highest", ""],
+            ["resolution", "requirement", "highest", ""],
+            ["title", "preference", "include", "(WEB)"],
+            ["size", "requirement", "lowest", ""],
+            ["bitrate", "preference", "highest", ""],
+            ["source", "requirement", "include", "(["],
+        ],
+    )
+
+    def make(releases):
+        scraped = _make_filed_releases(releases)
+        del scraped[3].bitrate
+        return scraped
+
+    expected, actual = _rank_both_ways(releases, monkeypatch, version, make)
+
+    assert _identity(actual) == _identity(expected)
+    assert any("version rule exception" in str(entry[0]) for entry in logs)
+
+
+def test_composite_ranking_sorts_the_given_list_in_place(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    scraped = _make_releases(releases)
+
+    result = releases.sort(scraped, _default_version(releases), doprint=False)
+
+    assert result is scraped
+
+
+def test_regex_requirements_only_run_on_numeric_survivors(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    version = releases.sort.version(
+        "filters",
+        [],
+        "true",
+        [
+            ["title", "requirement", "exclude", "(HDTS|CAM)"],
+            ["seeders", "requirement", ">=", "50"],
+            ["size", "requirement", "<=", "60"],
+        ],
+    )
+
+    def make(releases):
+        scraped = _make_releases(releases)
+        for index, item in enumerate(scraped):
+            item.title = item.title + "." + str(index)
+        return scraped
+
+    title_rule = releases.sort.compile(version).steps[-1]
+    search = title_rule.search
+    searched = []
+    monkeypatch.setattr(
+        title_rule, "search", lambda value: searched.append(value) or search(value)
+    )
+
+    result = releases.sort(make(releases), version, doprint=False)
+
+    passed_numeric = [
+        r.title for r in make(releases) if r.seeders >= 50 and r.size <= 60
+    ]
+    assert searched == passed_numeric
+    assert sorted(r.title for r in result) == sorted(
+        title for title in passed_numeric if "HDTS" not in title
+    )
+
+
+def test_composite_ranking_keeps_title_based_removal_of_duplicates(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    version = releases.sort.version(
+        "duplicates",
+        [],
+        "true",
+        [
+            ["seeders", "requirement", ">=", "100"],
+            ["seeders", "preference", "highest", ""],
+        ],
+    )
+
+    expected, actual = _rank_both_ways(releases, monkeypatch, version, _make_releases)
+
+    # the duplicated title with 120 seeders is removed in place of the one with 3
+    assert _identity(actual) == _identity(expected)
+    assert ("Show.S01.1080p.BluRay.x264-GROUP", 3, []) in _identity(actual)
+
+
+def test_compile_pattern_reuses_and_bounds_compiled_patterns(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    monkeypatch.setattr(releases, "pattern_cache_size", 2)
+    before = releases.pattern_cache_info()
+
+    first = releases.compile_pattern("(x264)", releases.regex.I)
+    again = releases.compile_pattern("(x264)", releases.regex.I)
+    releases.compile_pattern("(x265)")
+    releases.compile_pattern("(HEVC)")
+    after = releases.pattern_cache_info()
+
+    assert first is again
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 3
+    assert after["size"] == 2
+    releases.compile_pattern("(x264)", releases.regex.I)
+    assert releases.pattern_cache_info()["misses"] - before["misses"] == 4
+
+
+def test_release_parses_hash_and_resolution_with_precompiled_patterns(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+
+    item = releases.release(
+        "[comet]",
+        "torrent",
+        "Show.S01.2160p.WEB-DL",
+        [],
+        10,
+        ["magnet:?xt=urn:btih:" + "ab" * 20 + "&dn=Show"],
+    )
+
+    assert item.hash == "ab" * 20
+    assert item.resolution == "2160"
+
+
+def test_release_keeps_optional_fields_unset_until_assigned(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    item = _make_releases(releases)[0]
+    del item.bitrate
+
+    assert not hasattr(item, "bitrate")
+    assert getattr(item, "filenames", None) is None
+    item.filenames = ["a.mkv"]
+    assert item.filenames == ["a.mkv"]
+
+
+def test_release_clone_copies_only_mutable_fields(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    item = _make_releases(releases)[1]
+    item.filenames = ["a.mkv"]
+
+    clone = item.clone()
+    clone.cached += ["TB"]
+    clone.download += ["https://example.invalid/a.mkv"]
+    clone.files += ["a.mkv"]
+    clone.size = 1
+
+    assert item.cached == ["RD"]
+    assert len(item.download) == 1
+    assert item.files == []
+    assert item.size == RECORDED_TITLES[1][1]
+    assert clone.title is item.title
+    assert clone.filenames is item.filenames
+    assert [r.title for r in releases.clone([item])] == [item.title]
+
+
+def test_release_deepcopy_and_pickle_roundtrip(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    monkeypatch.setitem(sys.modules, "releases_test", releases)
+    item = _make_releases(releases)[2]
+    item.Releases = [item]
+
+    copied = copy.deepcopy(item)
+    loaded = pickle.loads(pickle.dumps(item))
+
+    for other in (copied, loaded):
+        assert other.title == item.title
+        assert other.cached == item.cached
+        assert other.cached is not item.cached
+        assert other.bitrate == item.bitrate
+        assert other.Releases[0] is other
+
+
+def test_release_restores_attribute_dict_from_old_pickles(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    item = object.__new__(releases.release)
+
+    item.__setstate__({"title": "Old.Release.1080p", "cached": ["RD"], "Releases": []})
+
+    assert item.title == "Old.Release.1080p"
+    assert item.cached == ["RD"]
+    assert item.Releases == []
+    assert "title" not in item.__dict__
+
+
+def test_view_shares_releases_across_versions(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    scraped = _make_releases(releases)
+    version = _default_version(releases)
+
+    view = releases.view(scraped, version)
+    releases.sort(view, version, doprint=False)
+
+    assert len(view) < len(scraped)
+    assert all(any(item is other for other in scraped) for item in view)
+    assert [r.title for r in scraped] == [title for title, _, _ in RECORDED_TITLES]
+    assert releases.materialize(view[0]) is not view[0]
+
+
+def test_view_copies_releases_for_file_rules(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    scraped = _make_releases(releases)
+    version = releases.sort.version(
+        "files", [], "true", [["file names", "preference", "include", "mkv"]]
+    )
+
+    view = releases.view(scraped, version)
+
+    assert releases.sort.compile(version).mutates
+    assert not releases.sort.compile(_default_version(releases)).mutates
+    assert [r.title for r in view] == [r.title for r in scraped]
+    assert all(item is not other for item, other in zip(view, scraped))
+
+
+def test_ranked_merges_batches_like_a_full_sort(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    version = releases.sort.version(
+        "batches",
+        [],
+        "true",
+        [rule for rule in PREFERENCE_HEAVY_RULES if not rule[0] == "file names"]
+        + [["size", "requirement", ">=", "1"]],
+    )
+    scraped = _make_releases(releases)
+
+    ranked = releases.sort.ranked(version, scraped[:5])
+    ranked.add(scraped[5:6])
+    ranked.add(scraped[6:])
+
+    assert ranked.incremental
+    assert _identity(ranked.releases) == _identity(
+        releases.sort(_make_releases(releases), version, doprint=False)
+    )
+
+
+def test_ranked_only_ranks_the_new_batch(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    version = releases.sort.version(
+        "batches", [], "true", [["seeders", "preference", "highest", ""]]
+    )
+    scraped = _make_releases(releases)
+    ranked = releases.sort.ranked(version, scraped[:-2])
+    seen = []
+    step = releases.sort.compile(version).steps[-1]
+    keys = step.keys
+    monkeypatch.setattr(
+        step, "keys", lambda batch: seen.append(len(batch)) or keys(batch)
+    )
+
+    ranked.add(scraped[-2:])
+
+    assert seen == [2]
+    assert [r.seeders for r in ranked.releases] == sorted(
+        [r.seeders for r in scraped], reverse=True
+    )
+
+
+def test_ranked_sorts_again_when_batches_depend_on_each_other(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    highest = releases.sort.version(
+        "best", [], "true", [["seeders", "requirement", "highest", ""]]
+    )
+    duplicate = releases.sort.version(
+        "duplicate", [], "true", [["seeders", "requirement", ">=", "100"]]
+    )
+    scraped = _make_releases(releases)
+
+    for version in (highest, duplicate):
+        ranked = releases.sort.ranked(version, scraped[:3])
+        ranked.add(scraped[3:])
+
+        assert not ranked.incremental
+        assert _identity(ranked.releases) == _identity(
+            releases.sort(_make_releases(releases), version, doprint=False)
+        )
+
+
+def test_ranked_update_only_adds_the_releases_it_does_not_hold(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    version = releases.sort.version(
+        "batches", [], "true", [["seeders", "preference", "highest", ""]]
+    )
+    scraped = _make_releases(releases)
+    ranked = releases.sort.ranked(version, scraped[:4])
+
+    # the first release was dropped by the caller, the last ones are new
+    updated = ranked.update(scraped[1:])
+
+    assert len(ranked.added) == len(scraped)
+    assert _identity(updated) == _identity(
+        releases.sort(list(scraped[1:]), version, doprint=False)
+    )
+
+
+def test_candidates_yield_the_sorted_releases_best_first(monkeypatch):
+    releases, logs = _import_releases(monkeypatch)
+    version = _default_version(releases)
+
+    candidates = releases.sort.candidates(_make_releases(releases), version)
+    first = next(candidates)
+    rest = list(candidates)
+
+    expected = releases.sort(_make_releases(releases), version, doprint=False)
+    assert _identity([first] + rest) == _identity(expected)
+    assert any("found " + str(len(expected)) + " releases" in log[0] for log in logs)
+
+
+def test_candidates_fall_back_to_a_full_sort(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    version = releases.sort.version("files", [], "true", PREFERENCE_HEAVY_RULES)
+    scraped = _make_filed_releases(releases)
+
+    candidates = list(releases.sort.candidates(scraped, version, False))
+
+    assert not releases.sort.compile(version).keyed
+    assert _identity(candidates) == _identity(
+        releases.sort(_make_filed_releases(releases), version, doprint=False)
+    )
+
+
+def test_candidates_only_order_the_releases_that_are_taken(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    version = releases.sort.version(
+        "lazy",
+        [],
+        "true",
+        [
+            ["resolution", "preference", "==", "1080"],
+            ["title", "preference", "include", "(WEB)"],
+        ],
+    )
+    expected = releases.sort(_make_releases(releases), version, doprint=False)
+    scraped = _make_releases(releases)
+    step = releases.sort.compile(version).steps[-2]
+    searched = []
+    keys = step.keys
+    monkeypatch.setattr(
+        step, "keys", lambda batch: searched.extend(batch) or keys(batch)
+    )
+
+    best = next(releases.sort.candidates(scraped, version, False))
+
+    assert best.title == expected[0].title
+    assert 0 < len(searched) < len(scraped)
+    assert all(r.resolution == "1080" for r in searched)
+
+
+def test_candidates_apply_the_rules_in_the_order_of_sort(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    # the preference is applied before the requirement, and fails on the sample
+    # that the requirement removes: sort skips the preference
+    version = releases.sort.version(
+        "order",
+        [],
+        "true",
+        [
+            ["size", "requirement", ">=", "1"],
+            ["bitrate", "preference", "highest", ""],
+        ],
+    )
+
+    def scrape():
+        scraped = _make_releases(releases)
+        for item in scraped:
+            if "sample" in item.title:
+                item.bitrate = "unknown"
+        return scraped
+
+    candidates = list(releases.sort.candidates(scrape(), version, False))
+
+    assert _identity(candidates) == _identity(
+        releases.sort(scrape(), version, doprint=False)
+    )
+
+
+def _import_media(monkeypatch, releases, attempts):
+    """Load content/classes.py with the releases module and a stubbed debrid."""
+    repo_root = Path(__file__).resolve().parents[1]
+    debrid_stub = ModuleType("debrid")
+    debrid_stub.check = lambda element: None
+    debrid_stub.speculate = lambda element, candidates: iter(candidates)
+
+    def download(element, force=False):
+        attempts.append(element.Releases[0].title)
+        return False
+
+    debrid_stub.download = download
+    monkeypatch.setitem(sys.modules, "debrid", debrid_stub)
+    monkeypatch.setitem(sys.modules, "releases", releases)
+    monkeypatch.setitem(sys.modules, "scraper", ModuleType("scraper"))
+
+    spec = importlib.util.spec_from_file_location(
+        "classes_test", repo_root / "content" / "classes.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.media
+
+
+def test_debrid_download_only_ranks_the_releases_of_a_new_scrape(monkeypatch):
+    releases, _logs = _import_releases(monkeypatch)
+    attempts = []
+    media = _import_media(monkeypatch, releases, attempts)
+    version = releases.sort.version(
+        "batches", [], "true", [["seeders", "preference", "highest", ""]]
+    )
+    scraped = _make_releases(releases)
+    for item in scraped:
+        item.cached = ["RD"]
+    episode = SimpleNamespace(
+        type="episode",
+        Releases=scraped[:-2],
+        ranked={},
+        isanime=lambda: False,
+        bitrate=lambda: None,
+        versions=lambda: [version],
+    )
+    media.debrid_download(episode)
+    seen = []
+    step = releases.sort.compile(version).steps[-1]
+    keys = step.keys
+    monkeypatch.setattr(
+        step, "keys", lambda batch: seen.append(len(batch)) or keys(batch)
+    )
+
+    # a fallback scrape adds two releases to the last one that was tried
+    attempts.clear()
+    episode.Releases = [scraped[0]] + scraped[-2:]
+    media.debrid_download(episode)
+
+    assert seen == [2]
+    assert attempts == [
+        item.title
+        for item in releases.sort([scraped[0]] + scraped[-2:], version, False)
+    ]
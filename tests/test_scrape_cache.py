@@ -0,0 +1,340 @@
+"""Tests for the on-disk scrape cache of the stremio based scrapers."""
+
+import importlib.util
+import json
+import sys
+import time
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+import regex
+
+
+def _load(name):
+    repo_root = Path(__file__).resolve().parents[1]
+    spec = importlib.util.spec_from_file_location(
+        "scraper." + name, repo_root / "scraper" / (name + ".py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_cache(monkeypatch, tmp_path):
+    scraper_pkg = ModuleType("scraper")
+    scraper_pkg.__path__ = []
+    monkeypatch.setitem(sys.modules, "scraper", scraper_pkg)
+    scraper_pkg.stremio = _load("stremio")
+    monkeypatch.setitem(sys.modules, "scraper.stremio", scraper_pkg.stremio)
+    scraper_pkg.health = _load("health")
+    monkeypatch.setitem(sys.modules, "scraper.health", scraper_pkg.health)
+    scraper_pkg.cache = cache = _load("cache")
+    monkeypatch.setitem(sys.modules, "scraper.cache", cache)
+    cache.path = str(tmp_path / "scraper_cache.db")
+    return cache
+
+
+def _response(payload, status_code=200):
+    content = json.dumps(payload).encode()
+    return SimpleNamespace(
+        status_code=status_code,
+        iter_content=lambda chunk_size: (
+            content[i : i + 7] for i in range(0, len(content), 7)
+        ),
+        close=lambda: None,
+    )
+
+
+def _load_comet(monkeypatch, cache):
+    repo_root = Path(__file__).resolve().parents[1]
+    ui_print_mod = ModuleType("ui.ui_print")
+    ui_print_mod.ui_print = lambda *args, **kwargs: None
+    ui_print_mod.ui_settings = SimpleNamespace(debug="false")
+    monkeypatch.setitem(sys.modules, "ui.ui_print", ui_print_mod)
+    monkeypatch.setitem(sys.modules, "releases", ModuleType("releases"))
+    base_mod = ModuleType("base")
+    base_mod.SimpleNamespace = SimpleNamespace
+    base_mod.copy = __import__("copy")
+    base_mod.json = json
+    base_mod.regex = regex
+    base_mod.time = time
+    base_mod.custom_session = lambda: SimpleNamespace(headers={})
+    monkeypatch.setitem(sys.modules, "base", base_mod)
+    spec = importlib.util.spec_from_file_location(
+        "scraper.services.comet", repo_root / "scraper" / "services" / "comet.py"
+    )
+    comet = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(comet)
+    return comet
+
+
+def _session(payloads, status_code=200):
+    calls = []
+
+    def get(url, timeout=60, stream=False):
+        calls.append(url)
+        return _response(payloads[url], status_code)
+
+    return SimpleNamespace(get=get, headers={}), calls
+
+
+def test_repeated_stream_urls_are_answered_from_the_cache(monkeypatch, tmp_path):
+    cache = _load_cache(monkeypatch, tmp_path)
+    comet = _load_comet(monkeypatch, cache)
+    url = "http://comet.example/cfg/stream/series/tt1:1:2.json"
+    comet.session, calls = _session(
+        {url: {"streams": [{"title": "Show.S01E02.1080p", "infoHash": "a" * 40}]}}
+    )
+
+    first = comet.get(url)
+    second = comet.get("HTTP://Comet.example//cfg/stream/series/tt1:1:2.json")
+
+    assert calls == [url]
+    assert second.streams[0].title == first.streams[0].title == "Show.S01E02.1080p"
+    assert cache.clear("comet") == 1
+    comet.get(url)
+    assert calls == [url, url]
+
+
+def test_errors_are_not_cached_and_empty_results_expire_sooner(monkeypatch, tmp_path):
+    cache = _load_cache(monkeypatch, tmp_path)
+    comet = _load_comet(monkeypatch, cache)
+    notice = "http://comet.example/cfg/stream/movie/tt1.json"
+    empty = "http://comet.example/cfg/stream/movie/tt2.json"
+    comet.session, calls = _session(
+        {
+            notice: {"streams": [{"name": "[⏳] first search, try again"}]},
+            empty: {"streams": []},
+        }
+    )
+
+    comet.get(notice)
+    comet.get(notice)
+    comet.get(empty)
+    comet.get(empty)
+    assert calls == [notice, notice, empty]
+
+    cache.ttl = "6"
+    cache.empty_ttl = "0.0001"
+    time.sleep(0.5)
+    comet.get(empty)
+    assert calls == [notice, notice, empty, empty]
+
+
+def test_cache_durations_per_scraper_and_disabled_cache(monkeypatch, tmp_path):
+    cache = _load_cache(monkeypatch, tmp_path)
+    url = "http://aio.example/stremio/x/y/stream/movie/tt1.json"
+
+    cache.ttls = {"aiostreams": "0"}
+    cache.put("aiostreams", url, b'{"streams": []}')
+    assert cache.get("aiostreams", url) is None
+
+    cache.put("comet", url, b'{"streams": []}')
+    assert cache.get("comet", url) == b'{"streams": []}'
+
+    cache.ttl = "0"
+    assert cache.get("comet", url) is None
+    assert cache.lifetime("comet") == 0
+
+
+def test_cache_durations_typed_into_the_settings_menu(monkeypatch, tmp_path):
+    cache = _load_cache(monkeypatch, tmp_path)
+    comet = _load_comet(monkeypatch, cache)
+    url = "http://comet.example/cfg/stream/movie/tt1.json"
+    comet.session, calls = _session({url: {"streams": []}})
+
+    # the menu stores the text that was typed in
+    cache.ttls = '{"comet-selfhosted": "0"}'
+    assert cache.lifetime("comet-selfhosted") == 0
+    assert cache.lifetime("aiostreams") == 6 * 3600
+    for _ in range(2):
+        assert comet.get(url, "comet-selfhosted") is not None
+    assert calls == [url, url]
+
+    for value in ["", "not json", "[1, 2]"]:
+        cache.ttls = value
+        assert cache.lifetime("comet-selfhosted") == 6 * 3600
+
+
+def test_comet_instances_are_cached_under_their_own_names(monkeypatch, tmp_path):
+    cache = _load_cache(monkeypatch, tmp_path)
+    comet = _load_comet(monkeypatch, cache)
+    url = "http://comet.example/cfg/stream/movie/tt1.json"
+    comet.session, calls = _session({url: {"streams": []}})
+    cache.ttls = {"comet-base": "0"}
+
+    for _ in range(2):
+        comet.get(url, "comet-selfhosted")
+        comet.get(url, "comet-base")
+
+    assert calls == [url, url, url]
+    assert cache.clear("comet-selfhosted") == 1
+    assert cache.clear("comet") == 0
+
+
+def test_concurrent_requests_for_one_url_are_sent_once(monkeypatch, tmp_path):
+    import threading
+
+    cache = _load_cache(monkeypatch, tmp_path)
+    cache.ttl = "0"
+    comet = _load_comet(monkeypatch, cache)
+    url = "http://comet.example/cfg/stream/movie/tt1.json"
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def get(url, timeout=60, stream=False):
+        calls.append(url)
+        started.set()
+        release.wait(5)
+        return _response({"streams": [{"title": "Movie.2020.1080p"}]})
+
+    comet.session = SimpleNamespace(get=get, headers={})
+    results = [None] * 4
+
+    def scrape(index):
+        results[index] = comet.get(url)
+
+    threads = [threading.Thread(target=scrape, args=(0,))]
+    threads[0].start()
+    started.wait(5)
+    threads += [threading.Thread(target=scrape, args=(i,)) for i in range(1, 4)]
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [url]
+    assert all(result is results[0] for result in results)
+    assert results[0].streams[0].title == "Movie.2020.1080p"
+    # the next request after the first one finished is sent again
+    comet.get(url)
+    assert calls == [url, url]
+
+
+def test_failed_requests_return_none_and_are_not_kept_in_flight(monkeypatch, tmp_path):
+    cache = _load_cache(monkeypatch, tmp_path)
+    comet = _load_comet(monkeypatch, cache)
+
+    def get(url, timeout=60, stream=False):
+        raise ConnectionError("down")
+
+    comet.session = SimpleNamespace(get=get, headers={})
+
+    assert comet.get("http://comet.example/cfg/stream/movie/tt1.json") is None
+    assert cache._flights == {}
+
+
+def _tmdb(monkeypatch, answers):
+    calls = []
+
+    def lookup_imdb_id(query, media_type="movie"):
+        calls.append((query, media_type))
+        return answers[query]
+
+    tmdb = ModuleType("content.services.tmdb")
+    tmdb.lookup_imdb_id = lookup_imdb_id
+    services = ModuleType("content.services")
+    services.__path__ = []
+    services.tmdb = tmdb
+    content = ModuleType("content")
+    content.__path__ = []
+    content.services = services
+    monkeypatch.setitem(sys.modules, "content", content)
+    monkeypatch.setitem(sys.modules, "content.services", services)
+    monkeypatch.setitem(sys.modules, "content.services.tmdb", tmdb)
+    return calls
+
+
+def test_titles_are_resolved_once_for_all_scrapers(monkeypatch, tmp_path):
+    cache = _load_cache(monkeypatch, tmp_path)
+    calls = _tmdb(
+        monkeypatch,
+        {
+            "War.of.the.Worlds.2025": ("tt1", None),
+            "war of the worlds 2025": ("tt1", None),
+            "unknown.title": (None, None),
+            "unknown title": (None, None),
+            "offline": (None, "TMDB search failed"),
+        },
+    )
+
+    assert cache.imdb_id("War.of.the.Worlds.2025", "movie") == "tt1"
+    assert cache.imdb_id("war of the worlds  2025", "movie") == "tt1"
+    assert cache.imdb_id("unknown.title", "show") is None
+    assert cache.imdb_id("Unknown Title", "season") is None
+    assert cache.imdb_id("offline", "movie") is None
+    assert cache.imdb_id("offline", "movie") is None
+    # TMDB gets the title as it was asked for
+    assert calls == [
+        ("War.of.the.Worlds.2025", "movie"),
+        ("unknown.title", "show"),
+        ("offline", "movie"),
+        ("offline", "movie"),
+    ]
+
+    # another process reads the ids from the cache file
+    cache._imdb_ids.clear()
+    assert cache.imdb_id("war of the worlds 2025") == "tt1"
+    assert cache.imdb_id("unknown title", "show") is None
+    assert len(calls) == 4
+
+    cache.imdb_empty_ttl = "0"
+    assert cache.imdb_id("unknown title", "show") is None
+    assert len(calls) == 5
+    assert cache.clear() == 2
+    cache.imdb_id("war of the worlds 2025")
+    assert len(calls) == 6
+
+
+def test_hosts_that_keep_failing_are_skipped(monkeypatch, tmp_path):
+    cache = _load_cache(monkeypatch, tmp_path)
+    comet = _load_comet(monkeypatch, cache)
+    health = sys.modules["scraper.health"]
+    calls = []
+
+    def get(url, timeout=60, stream=False):
+        calls.append(url)
+        if "down.example" in url:
+            raise ConnectionError("down")
+        return _response({"streams": []}, 502 if "error.example" in url else 200)
+
+    comet.session = SimpleNamespace(get=get, headers={})
+    for index in range(health.threshold + 2):
+        assert comet.get("http://down.example/stream/movie/tt" + str(index)) is None
+        comet.get("http://error.example/stream/movie/tt" + str(index) + ".json")
+    comet.get("http://up.example/stream/movie/tt1.json")
+
+    assert len([url for url in calls if "down.example" in url]) == health.threshold
+    assert len([url for url in calls if "error.example" in url]) == health.threshold
+    assert health.breakers()["down.example"]["state"] == "open"
+    assert health.breakers()["up.example"]["state"] == "closed"
+
+
+def test_cached_responses_are_served_while_the_breaker_is_open(monkeypatch, tmp_path):
+    cache = _load_cache(monkeypatch, tmp_path)
+    comet = _load_comet(monkeypatch, cache)
+    health = sys.modules["scraper.health"]
+    cached = "http://flaky.example/cfg/stream/movie/tt1.json"
+    other = "http://flaky.example/cfg/stream/movie/tt2.json"
+    comet.session, calls = _session(
+        {cached: {"streams": [{"title": "Movie.2020.1080p"}]}, other: {"streams": []}}
+    )
+    comet.get(cached)
+    for _ in range(health.threshold):
+        health.failed("flaky.example")
+
+    assert comet.get(cached).streams[0].title == "Movie.2020.1080p"
+    assert comet.get(other) is None
+    assert calls == [cached]
+
+    # the probe after the back-off is the next request that is sent, not a cache hit
+    monkeypatch.setattr(health, "_breakers", {})
+    health.get_breaker("flaky.example").state = "open"
+    assert comet.get(cached).streams[0].title == "Movie.2020.1080p"
+    assert health.breakers()["flaky.example"]["state"] == "open"
+    comet.get(other)
+    assert calls == [cached, other]
+    assert health.breakers()["flaky.example"]["state"] == "closed"
@@ -0,0 +1,86 @@
+"""Tests for scraping several queries at once with scraper.prefetch."""
+
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+
+def _import_scraper(monkeypatch, sequences, answers):
+    repo_root = Path(__file__).resolve().parents[1]
+    ui_print_mod = ModuleType("ui.ui_print")
+    ui_print_mod.ui_print = lambda *args, **kwargs: None
+    ui_print_mod.ui_settings = SimpleNamespace(debug="false")
+    monkeypatch.setitem(sys.modules, "ui.ui_print", ui_print_mod)
+
+    calls = []
+
+    def scrape_many(jobs):
+        calls.append([(job[0][0].name, job[1]) for job in jobs])
+        return [
+            [answers.get((sequence[0].name, query), [])]
+            for sequence, query, altquery, imdb_id in jobs
+        ]
+
+    def scrape(sequence, query, altquery, imdb_id=None):
+        calls.append([(sequence[0].name, query)])
+        return [answers.get((sequence[0].name, query), [])]
+
+    engine = SimpleNamespace(scrape=scrape, scrape_many=scrape_many)
+    services = SimpleNamespace(sequential=lambda: sequences, get=lambda: [])
+    monkeypatch.setitem(sys.modules, "scraper.engine", engine)
+    monkeypatch.setitem(sys.modules, "scraper.services", services)
+    monkeypatch.setitem(sys.modules, "scraper.cache", SimpleNamespace())
+    spec = importlib.util.spec_from_file_location(
+        "scraper", repo_root / "scraper" / "__init__.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "scraper", module)
+    spec.loader.exec_module(module)
+    return module, calls
+
+
+def _release(title):
+    return SimpleNamespace(title=title)
+
+
+def test_queries_are_scraped_at_once_and_taken_by_scrape(monkeypatch):
+    first, second = SimpleNamespace(name="comet"), SimpleNamespace(name="aio")
+    e1, e2 = _release("Show.S01E01.1080p"), _release("Show.S01E02.1080p")
+    scraper, calls = _import_scraper(
+        monkeypatch,
+        [[first], [second]],
+        {("comet", "show.s01e01"): [e1], ("aio", "show.s01e02"): [e2]},
+    )
+
+    found = scraper.prefetch(
+        [
+            ("show.s01e01", "S01E01"),
+            ("show.s01e02", "S01E02"),
+            ("show.s01e01", "S01E01"),
+        ]
+    )
+
+    # both episodes in one batch, the second sequence only for the one not found
+    assert calls == [
+        [("comet", "show.s01e01"), ("comet", "show.s01e02")],
+        [("aio", "show.s01e02")],
+    ]
+    assert found == {
+        ("show.s01e01", "S01E01", None): [e1],
+        ("show.s01e02", "S01E02", None): [e2],
+    }
+    assert scraper.scrape("show.s01e02", "S01E02") == [e2]
+    assert len(calls) == 2
+    # prefetched releases are used once, the next call scrapes again
+    assert scraper.scrape("show.s01e02", "S01E02") == [e2]
+    assert calls[2:] == [[("comet", "show.s01e02")], [("aio", "show.s01e02")]]
+
+
+def test_prefetched_releases_expire(monkeypatch):
+    scraper, calls = _import_scraper(monkeypatch, [[SimpleNamespace(name="comet")]], {})
+    scraper.prefetch([("show.s01e01", "S01E01"), ("show.s01e02", "S01E02")])
+    scraper.prefetch_ttl = -1
+
+    assert scraper.take("show.s01e01", "S01E01") is None
+    assert scraper._prefetched == {}
@@ -0,0 +1,84 @@
+"""Tests for the recorded scraper responses of bench.replay."""
+
+import gzip
+import importlib.util
+import time
+from pathlib import Path
+
+import requests
+
+
+def _load_replay():
+    repo_root = Path(__file__).resolve().parents[1]
+    spec = importlib.util.spec_from_file_location(
+        "bench_replay_under_test", repo_root / "bench" / "replay.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+BODY = b'{"streams": [{"title": "Show.S01E02.1080p.WEB-DL", "infoHash": "abc"}]}'
+
+
+def test_fixtures_are_found_without_the_config_segments(tmp_path):
+    replay = _load_replay()
+    key = replay.key("https://Comet.example/b64config/stream/series/tt1:1:2.json")
+    replay.save(tmp_path, replay.fixture(key, "comet", 200, BODY, elapsed=0.5))
+
+    assert key == "comet.example/stream/series/tt1:1:2.json"
+    assert replay.key("https://comet.example/manifest.json") is None
+    assert list(replay.fixtures(tmp_path)) == [key]
+    assert replay.fixtures(tmp_path)[key]["body"] == BODY
+
+
+def test_replayed_responses_stream_after_the_injected_latency(tmp_path):
+    replay = _load_replay()
+    key = "comet.example/stream/series/tt1:1:2.json"
+    replay.save(tmp_path, replay.fixture(key, "comet", 200, BODY, elapsed=0.5))
+    adapter = replay.replayer(tmp_path, latency=0.02, scale=0.1)
+    session = requests.Session()
+    original = session.get_adapter("https://comet.example")
+
+    with replay.mounted(adapter, [session]):
+        start = time.perf_counter()
+        response = session.get(
+            "https://comet.example/other-config/stream/series/tt1:1:2.json",
+            stream=True,
+        )
+        body = b"".join(response.iter_content(chunk_size=16))
+        elapsed = time.perf_counter() - start
+        missing = session.get("https://comet.example/x/stream/movie/tt2.json")
+
+    assert response.status_code == 200
+    assert body == BODY
+    assert elapsed >= 0.07
+    assert missing.status_code == 404
+    assert (adapter.hits, adapter.misses) == (1, 1)
+    assert session.get_adapter("https://comet.example") is original
+
+
+def test_recorder_writes_stream_responses_only(tmp_path):
+    replay = _load_replay()
+    source = tmp_path / "source"
+    key = "comet.example/stream/movie/tt3.json"
+    replay.save(source, replay.fixture(key, "comet", 200, BODY))
+    recorder = replay.recorder(tmp_path / "recorded", "comet", replay.replayer(source))
+    session = requests.Session()
+
+    with replay.mounted(recorder, [session]):
+        response = session.get(
+            "https://comet.example/secret-config/stream/movie/tt3.json", stream=True
+        )
+        session.get("https://comet.example/secret-config/manifest.json")
+
+    recorded = replay.fixtures(tmp_path / "recorded")
+    assert response.json()["streams"][0]["infoHash"] == "abc"
+    assert list(recorded) == [key]
+    assert recorded[key]["body"] == BODY
+    assert recorded[key]["source"] == "comet"
+    assert recorder.recorded == 1
+    assert not any(
+        b"secret-config" in gzip.decompress(path.read_bytes())
+        for path in (tmp_path / "recorded").iterdir()
+    )
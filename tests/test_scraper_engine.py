@@ -0,0 +1,183 @@
+"""Tests for the shared scrape engine used by scraper.scrape."""
+
+import importlib.util
+import sys
+import threading
+import time
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+
+def _load_engine(monkeypatch):
+    repo_root = Path(__file__).resolve().parents[1]
+    ui_pkg = ModuleType("ui")
+    ui_print_mod = ModuleType("ui.ui_print")
+    ui_print_mod.ui_print = lambda *args, **kwargs: None
+    ui_print_mod.ui_settings = SimpleNamespace(debug="false")
+    monkeypatch.setitem(sys.modules, "ui", ui_pkg)
+    monkeypatch.setitem(sys.modules, "ui.ui_print", ui_print_mod)
+    spec = importlib.util.spec_from_file_location(
+        "scraper.health", repo_root / "scraper" / "health.py"
+    )
+    health = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(health)
+    scraper_pkg = ModuleType("scraper")
+    scraper_pkg.__path__ = []
+    scraper_pkg.health = health
+    monkeypatch.setitem(sys.modules, "scraper", scraper_pkg)
+    monkeypatch.setitem(sys.modules, "scraper.health", health)
+    spec = importlib.util.spec_from_file_location(
+        "scraper_engine_under_test", repo_root / "scraper" / "engine.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _scraper(name, base_url="", delay=0.0, result=None, error=None, seen=None):
+    def scrape(query, altquery="(.*)", imdb_id=None):
+        if seen is not None:
+            seen.append((name, threading.current_thread(), query, imdb_id))
+        time.sleep(delay)
+        if error:
+            raise error
+        return result if result is not None else [name + ":" + query]
+
+    return SimpleNamespace(name=name, base_url=base_url, scrape=scrape)
+
+
+def test_results_keep_sequence_order_and_failures_are_none(monkeypatch):
+    engine = _load_engine(monkeypatch)
+    sequence = [
+        _scraper("slow", "https://a.example", delay=0.05),
+        _scraper("broken", "https://b.example", error=RuntimeError("down")),
+        _scraper("fast", "https://c.example"),
+    ]
+
+    results = engine.scrape(sequence, "Show", "(.*)", imdb_id="tt1")
+
+    assert results == [["slow:Show"], None, ["fast:Show"]]
+
+
+def test_scrapers_run_concurrently(monkeypatch):
+    engine = _load_engine(monkeypatch)
+    sequence = [
+        _scraper(str(index), "https://host" + str(index) + ".example", delay=0.2)
+        for index in range(4)
+    ]
+
+    start = time.perf_counter()
+    engine.scrape(sequence, "Show", "(.*)")
+
+    assert time.perf_counter() - start < 0.6
+
+
+def test_requests_per_host_are_limited(monkeypatch):
+    engine = _load_engine(monkeypatch)
+    engine.host_limit = 2
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def scrape(query, altquery="(.*)", imdb_id=None):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        return []
+
+    sequence = [
+        SimpleNamespace(
+            name="comet" + str(index),
+            base_url="https://comet.example/" + str(index),
+            scrape=scrape,
+        )
+        for index in range(6)
+    ]
+
+    engine.scrape(sequence, "Show", "(.*)")
+
+    assert running["max"] == 2
+    assert engine.host(sequence[0]) == "comet.example"
+    assert engine.host(SimpleNamespace(name="nyaa")) == "nyaa"
+
+
+def test_worker_threads_are_reused_between_calls(monkeypatch):
+    engine = _load_engine(monkeypatch)
+    engine.workers = 1
+    seen = []
+
+    engine.scrape([_scraper("a", seen=seen)], "One", "(.*)")
+    engine.scrape([_scraper("b", seen=seen)], "Two", "(.*)", imdb_id="tt2")
+
+    assert seen[0][1] is seen[1][1]
+    assert seen[1][3] == "tt2"
+    assert engine.loop() is engine.loop()
+
+
+def test_scrapes_are_recorded_per_scraper(monkeypatch):
+    engine = _load_engine(monkeypatch)
+    sequence = [
+        _scraper("comet", "https://a.example", delay=0.05),
+        _scraper("empty", "https://b.example", result=[]),
+        _scraper("broken", "https://c.example", error=RuntimeError("down")),
+    ]
+
+    engine.scrape(sequence, "Show", "(.*)")
+    engine.scrape(sequence, "Show", "(.*)")
+    report = engine.health.report()
+
+    assert report["comet"]["calls"] == 2
+    assert report["comet"]["found"] == 2
+    assert report["comet"]["p95"] >= 0.05
+    assert sum(report["comet"]["histogram"].values()) == 2
+    assert report["empty"]["empty_ratio"] == 1.0
+    assert report["broken"]["success_ratio"] == 0.0
+    assert report["broken"]["p95"] is None
+
+
+def test_hedged_scrapes_stop_waiting_for_slow_scrapers(monkeypatch):
+    engine = _load_engine(monkeypatch)
+    engine.mode = "hedged"
+    engine.quorum = "1"
+    sequence = [
+        _scraper("fast", "https://a.example", delay=0.05),
+        _scraper("mirror", "https://b.example", delay=0.1),
+        _scraper("slow", "https://c.example", delay=1.5),
+    ]
+    # the fast scraper usually takes 0.2 s, the mirror finishes within that
+    for _ in range(5):
+        engine.health.record("fast", 0.2, ["release"])
+
+    start = time.perf_counter()
+    results = engine.scrape(sequence, "Show", "(.*)")
+
+    assert time.perf_counter() - start < 1
+    assert results == [["fast:Show"], ["mirror:Show"], None]
+
+
+def test_hedged_scrapes_wait_for_all_when_nothing_was_found(monkeypatch):
+    engine = _load_engine(monkeypatch)
+    engine.mode = "hedged"
+    sequence = [
+        _scraper("empty", "https://a.example", result=[]),
+        _scraper("slow", "https://c.example", delay=0.3),
+    ]
+
+    results = engine.scrape(sequence, "Show", "(.*)")
+
+    assert results == [[], ["slow:Show"]]
+
+
+def test_several_scrapes_are_sent_at_once(monkeypatch):
+    engine = _load_engine(monkeypatch)
+    sequence = [_scraper("comet", "https://a.example", delay=0.2)]
+
+    start = time.perf_counter()
+    results = engine.scrape_many(
+        [(sequence, "S01E0" + str(index), "(.*)", None) for index in range(1, 5)]
+    )
+
+    assert time.perf_counter() - start < 0.6
+    assert results == [[["comet:S01E0" + str(index)]] for index in range(1, 5)]
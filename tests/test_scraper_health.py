@@ -0,0 +1,82 @@
+"""Tests for the circuit breakers of scraper hosts."""
+
+import importlib.util
+from pathlib import Path
+from types import SimpleNamespace
+
+
+def _load_health():
+    repo_root = Path(__file__).resolve().parents[1]
+    spec = importlib.util.spec_from_file_location(
+        "scraper_health_under_test", repo_root / "scraper" / "health.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_breaker_opens_after_repeated_failures_and_probes_with_backoff(monkeypatch):
+    health = _load_health()
+    now = [1000.0]
+    monkeypatch.setattr(health.time, "time", lambda: now[0])
+    host = "comet.example"
+
+    for _ in range(health.threshold - 1):
+        health.failed(host)
+    assert health.available(host)
+    health.failed(host)
+    assert health.breakers()[host]["state"] == "open"
+    assert health.skipped(host)
+    assert not health.available(host)
+
+    # the first request after the back-off is the only probe
+    now[0] += health.backoff
+    assert not health.skipped(host)
+    assert health.available(host)
+    assert not health.available(host)
+    assert health.skipped(host)
+
+    # a failed probe doubles the back-off
+    health.failed(host)
+    assert health.breakers()[host] == {
+        "state": "open",
+        "failures": health.threshold + 1,
+        "retry_in": health.backoff * 2,
+    }
+    now[0] += health.backoff * 2
+    assert health.available(host)
+    health.succeeded(host)
+    assert health.breakers()[host]["state"] == "closed"
+    assert not health.skipped(host)
+
+    # after a success the back-off starts over
+    for _ in range(health.threshold):
+        health.failed(host)
+    assert health.breakers()[host]["retry_in"] == health.backoff
+
+
+def test_lost_probes_are_retried(monkeypatch):
+    health = _load_health()
+    now = [1000.0]
+    monkeypatch.setattr(health.time, "time", lambda: now[0])
+    for _ in range(health.threshold):
+        health.failed("aio.example")
+    now[0] += health.backoff
+    assert health.available("aio.example")
+
+    now[0] += health.probe_timeout
+    assert health.available("aio.example")
+
+
+def test_service_hosts():
+    health = _load_health()
+
+    assert (
+        health.service_host(
+            SimpleNamespace(name="comet", base_url="https://Comet.example/x")
+        )
+        == "comet.example"
+    )
+    assert health.service_host(SimpleNamespace(name="comet-base", base_url="")) == (
+        "comet-base"
+    )
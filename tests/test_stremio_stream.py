@@ -0,0 +1,96 @@
+"""Tests for the incremental parser of stremio stream responses."""
+
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+
+def _load_stremio():
+    repo_root = Path(__file__).resolve().parents[1]
+    spec = importlib.util.spec_from_file_location(
+        "scraper_stremio_under_test", repo_root / "scraper" / "stremio.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _chunks(payload, size, indent=None):
+    content = json.dumps(payload, indent=indent, ensure_ascii=False).encode()
+    return [content[i : i + size] for i in range(0, len(content), size)]
+
+
+def _plain(value):
+    if hasattr(value, "__dict__"):
+        return {key: _plain(item) for key, item in vars(value).items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+PAYLOAD = {
+    "streams": [
+        {
+            "name": "[RD⚡] Comet 2160p",
+            "title": "Show.S01E02.2160p.WEB-DL 😀\n💾 14.6 GB",
+            "infoHash": "a" * 40,
+            "behaviorHints": {"filename": "Show.S01E02.mkv", "videoSize": 15676630630},
+            "seeders": 12,
+            "ratio": -1.5e-3,
+            "cached": True,
+            "sources": [None, "tracker:udp://x"],
+        }
+    ]
+    * 50,
+    "cacheMaxAge": 3600,
+}
+
+
+@pytest.mark.parametrize("size", [1, 3, 17, 65536])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_responses_parse_the_same_at_every_chunk_boundary(size, indent):
+    stremio = _load_stremio()
+
+    response = stremio.load(_chunks(PAYLOAD, size, indent))
+
+    assert _plain(response) == PAYLOAD
+    assert response.streams[0].behaviorHints.filename == "Show.S01E02.mkv"
+
+
+def test_streams_are_yielded_before_the_response_is_complete():
+    stremio = _load_stremio()
+    read = []
+
+    def chunks():
+        for chunk in _chunks(PAYLOAD, 64):
+            read.append(chunk)
+            yield chunk
+
+    events = stremio.iterparse(chunks())
+    assert next(events) == ("value", "streams", [])
+    event, key, stream = next(events)
+
+    assert (event, key) == ("item", "streams")
+    assert stream.seeders == 12
+    assert len(read) < len(_chunks(PAYLOAD, 64)) / 10
+
+
+def test_empty_and_missing_stream_lists():
+    stremio = _load_stremio()
+
+    assert stremio.load([b'{"streams": []}']).streams == []
+    assert not hasattr(stremio.load([b"{}"]), "streams")
+    assert stremio.load([b'{"error": "bad config"}']).error == "bad config"
+
+
+@pytest.mark.parametrize(
+    "content",
+    [b"", b"<html>502</html>", b'{"streams": [{"name": "x"}', b'{"streams": [1 2]}'],
+)
+def test_invalid_responses_raise_value_errors(content):
+    stremio = _load_stremio()
+
+    with pytest.raises(ValueError):
+        stremio.load([content])
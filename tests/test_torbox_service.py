@@ -192,3 +192,116 @@ def test_download_torrent_requests_links_and_calls_downloader(monkeypatch):
 
     assert torbox.download(element, force=True) is True
     assert called["count"] == 1
+
+
+def test_links_of_a_torrent_that_is_not_ready_are_requested_once_it_is(monkeypatch):
+    torbox, _logs = _load_torbox_module(monkeypatch)
+    torbox.poll_interval = 0.01
+    lists = []
+
+    def fake_get(path, params=None, context=None):
+        if path == "/v1/api/torrents/mylist":
+            lists.append(params)
+            finished = len(lists) > 2
+            torrent = {
+                "id": 42,
+                "download_finished": finished,
+                "files": [{"id": 1, "name": "movie.mkv"}],
+            }
+            # the poller asks for all torrents of the account
+            return SimpleNamespace(
+                success=True, data=torrent if "id" in params else [torrent]
+            )
+        if path == "/v1/api/torrents/requestdl":
+            return SimpleNamespace(success=True, data={"download": "https://cdn/x"})
+        raise AssertionError(f"Unexpected path: {path}")
+
+    monkeypatch.setattr(torbox, "get", fake_get)
+    release = SimpleNamespace(title="Movie 2026 1080p")
+
+    assert torbox._fetch_release_links(release, 42) is True
+    assert release.download == ["https://cdn/x"]
+    assert [params.get("id") for params in lists] == [42, None, None]
+
+
+def test_download_reuses_a_ready_torrent_of_the_account(monkeypatch):
+    torbox, _logs = _load_torbox_module(monkeypatch)
+    monkeypatch.setattr(torbox, "api_key", "test-token")
+    torrent = {
+        "id": 7,
+        "hash": "A" * 40,
+        "download_finished": True,
+        "files": [{"id": 1, "name": "movie.mkv"}],
+    }
+
+    def fake_get(path, params=None, context=None):
+        if path == "/v1/api/torrents/mylist":
+            data = torrent if "id" in params else [torrent]
+            return SimpleNamespace(success=True, data=data)
+        if path == "/v1/api/torrents/requestdl":
+            assert params["torrent_id"] == 7
+            return SimpleNamespace(success=True, data={"download": "https://cdn/x"})
+        raise AssertionError(f"Unexpected path: {path}")
+
+    def fake_post(path, data=None, files=None, context=None):
+        raise AssertionError("the magnet was added again")
+
+    monkeypatch.setattr(torbox, "get", fake_get)
+    monkeypatch.setattr(torbox, "post", fake_post)
+    monkeypatch.setattr(
+        torbox.downloader,
+        "download_from_realdebrid",
+        lambda release, element: True,
+        raising=False,
+    )
+    debrid_stub = ModuleType("debrid")
+    debrid_stub.downloading = []
+    monkeypatch.setitem(__import__("sys").modules, "debrid", debrid_stub)
+    release = SimpleNamespace(
+        title="Movie 2026 1080p",
+        hash="a" * 40,
+        download=["magnet:?xt=urn:btih:" + "a" * 40],
+        cached=["TB"],
+    )
+    element = SimpleNamespace(
+        Releases=[release],
+        deviation=lambda: r"(.*)",
+        query=lambda: "movie.2026",
+        type="movie",
+    )
+
+    assert torbox.download(element, force=True) is True
+    assert release.download == ["https://cdn/x"]
+
+
+def test_files_whose_link_request_fails_are_left_out(monkeypatch):
+    torbox, _logs = _load_torbox_module(monkeypatch)
+
+    def fake_get(path, params=None, context=None):
+        if path == "/v1/api/torrents/mylist":
+            return SimpleNamespace(
+                success=True,
+                data={
+                    "id": 42,
+                    "download_finished": True,
+                    "files": [
+                        {"id": 1, "name": "e01.mkv"},
+                        {"id": 2, "name": "e02.mkv"},
+                        {"id": 3, "name": "e03.mkv"},
+                    ],
+                },
+            )
+        if path == "/v1/api/torrents/requestdl":
+            if params["file_id"] == 2:
+                return SimpleNamespace(success=False, data=None)
+            link = "https://cdn/" + str(params["file_id"])
+            return SimpleNamespace(success=True, data={"download": link})
+        raise AssertionError(f"Unexpected path: {path}")
+
+    monkeypatch.setattr(torbox, "get", fake_get)
+    release = SimpleNamespace(title="Show S01 1080p")
+
+    assert torbox._fetch_release_links(release, 42) is True
+    # None for the downloader to skip, the names stay aligned with the links
+    assert release.download == ["https://cdn/1", None, "https://cdn/3"]
+    assert release.filenames == ["e01.mkv", "e02.mkv", "e03.mkv"]